@@ -11,7 +11,7 @@ from app.services.auth import (
 from app.services.google_auth import handle_google_auth
 from pydantic import BaseModel
 from app.db.queries.auth_queries import reset_user_password
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -44,7 +44,7 @@ async def forgot_password(data: PasswordReset):
 async def reset_password(data: PasswordReset):
     """Reset user password"""
     try:
-        hashed_password = get_password_hash(data.newPassword)
+        hashed_password = await get_password_hash_async(data.newPassword)
         await reset_user_password(data.email, hashed_password)
         return {"message": "Password reset successfully"}
     except ValueError as e:
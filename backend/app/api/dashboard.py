@@ -1,21 +1,40 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
 from app.db.queries.dashboard_queries import (
-    get_user_overall_stats,
-    get_weekly_progress,
-    get_difficulty_stats,
-    get_recent_activities,
-    get_performance_metrics,
     get_user_sessions,
     get_session_details
 )
+from app.services.dashboard import DashboardService, DASHBOARD_SECTIONS
 from app.services.auth import get_current_user
 
 router = APIRouter()
 
+@router.get("/summary")
+async def get_dashboard_summary(
+    current_user: dict = Depends(get_current_user),
+    sections: Optional[str] = Query(
+        default=None,
+        description=f"Comma-separated subset of {', '.join(DASHBOARD_SECTIONS)}; all when omitted"
+    ),
+    recent_limit: int = Query(default=10, ge=1, le=50)
+):
+    """Get several dashboard panels in one request"""
+    requested = DASHBOARD_SECTIONS
+    if sections:
+        requested = list(dict.fromkeys(s.strip() for s in sections.split(",") if s.strip()))
+        unknown = [s for s in requested if s not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown dashboard sections: {', '.join(unknown)}")
+
+    try:
+        return await DashboardService.get_summary(current_user["id"], requested, recent_limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/stats/overall")
 async def get_overall_stats(current_user: dict = Depends(get_current_user)):
     try:
-        stats = await get_user_overall_stats(current_user["id"])
+        stats = await DashboardService.get_user_stats(current_user["id"])
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -23,7 +42,7 @@ async def get_overall_stats(current_user: dict = Depends(get_current_user)):
 @router.get("/stats/weekly")
 async def get_weekly_stats(current_user: dict = Depends(get_current_user)):
     try:
-        stats = await get_weekly_progress(current_user["id"])
+        stats = await DashboardService.get_weekly_stats(current_user["id"])
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -31,7 +50,7 @@ async def get_weekly_stats(current_user: dict = Depends(get_current_user)):
 @router.get("/stats/difficulty")
 async def get_difficulty_statistics(current_user: dict = Depends(get_current_user)):
     try:
-        stats = await get_difficulty_stats(current_user["id"])
+        stats = await DashboardService.get_difficulty_stats(current_user["id"])
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -42,7 +61,7 @@ async def get_recent_user_activities(
     current_user: dict = Depends(get_current_user)
 ):
     try:
-        activities = await get_recent_activities(current_user["id"], limit)
+        activities = await DashboardService.get_recent_activities(current_user["id"], limit)
         return activities
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -50,7 +69,7 @@ async def get_recent_user_activities(
 @router.get("/stats/performance")
 async def get_user_performance(current_user: dict = Depends(get_current_user)):
     try:
-        metrics = await get_performance_metrics(current_user["id"])
+        metrics = await DashboardService.get_performance_metrics(current_user["id"])
         return metrics
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -59,16 +78,23 @@ async def get_user_performance(current_user: dict = Depends(get_current_user)):
 async def get_sessions(
     current_user: dict = Depends(get_current_user),
     limit: int = Query(default=10, ge=1, le=50),
-    offset: int = Query(default=0, ge=0)
+    before_id: Optional[int] = Query(default=None, description="id of the last session on the previous page")
 ):
-    """Get user's game sessions with pagination"""
+    """Get user's game sessions, newest first, with keyset pagination"""
     try:
         sessions = await get_user_sessions(
             user_id=current_user["id"],
             limit=limit,
-            offset=offset
+            before_id=before_id
         )
+        if sessions is None:
+            raise HTTPException(
+                status_code=404,
+                detail="before_id is not one of your sessions"
+            )
         return sessions
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
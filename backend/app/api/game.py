@@ -1,21 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.schemas.game import ImageRecognitionRequest, GameSessionComplete, DrawingAttempt, GameSession
-from app.services.ai import recognize_doodle
-from app.services.game import record_drawing_attempt, start_game_session, end_game_session
-from app.db.queries.game_queries import get_leaderboard
+from fastapi import APIRouter, HTTPException, Depends, Request
+from app.schemas.game import ImageRecognitionRequest, GameSessionComplete, DrawingAttempt, DrawingAttemptBatch, GameSession
+from app.core.config import settings
+from app.core.exceptions import ImageTooLarge, InvalidImage, RecognitionOverloaded, RecognitionTimeout
+from app.services.ai import recognize_doodle, recognize_image, recognize_strokes
+from app.services.imaging import read_png_stream
+from app.services.game import record_drawing_attempt, record_drawing_attempts, start_game_session, end_game_session, fetch_leaderboard
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def recognition_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, ImageTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, InvalidImage):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, RecognitionOverloaded):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if isinstance(e, RecognitionTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    print(e)
+    return HTTPException(status_code=500, detail=str(e))
+
 @router.post("/recognize")
 async def recognize_doodle_api(request: ImageRecognitionRequest):
     try:
+        if request.strokes is not None:
+            return await recognize_strokes(request.strokes)
         result = await recognize_doodle(request.image)
         return result  # Now returns both result and confidence
     except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500, detail=str(e))
+        raise recognition_http_error(e)
+
+@router.post("/recognize/upload")
+async def recognize_upload_api(request: Request):
+    """Recognize a raw PNG body (Content-Type: image/png).
+
+    The body is read in chunks and refused with 413 as soon as its
+    Content-Length, running size or PNG header dimensions go over the limits,
+    without the base64 and JSON overhead of /recognize.
+    """
+    if request.headers.get("content-type", "").split(";")[0].strip() != "image/png":
+        raise HTTPException(status_code=415, detail="Send the canvas as image/png")
+    try:
+        length = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if length > settings.RECOGNITION_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image is over {settings.RECOGNITION_MAX_UPLOAD_BYTES} bytes")
+    try:
+        image = await read_png_stream(
+            request.stream(), settings.RECOGNITION_MAX_UPLOAD_BYTES, settings.RECOGNITION_MAX_IMAGE_SIDE
+        )
+        return await recognize_image(image)
+    except Exception as e:
+        raise recognition_http_error(e)
 
 @router.post("/attempt")
 async def save_attempt(attempt_data: DrawingAttempt):
@@ -25,6 +64,19 @@ async def save_attempt(attempt_data: DrawingAttempt):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/attempts")
+async def save_attempts(batch: DrawingAttemptBatch):
+    """Record a game's attempts in one round-trip and one transaction.
+
+    Takes 1 to MAX_ATTEMPTS_PER_BATCH (250) attempts; send more as several
+    batches. Returns the new attempt ids in request order.
+    """
+    try:
+        result = await record_drawing_attempts(batch.attempts)
+        return {"message": "Attempts recorded successfully", "attempt_ids": result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/session")
 async def create_game_session(session_data: GameSession):
     try:
@@ -39,10 +91,14 @@ async def complete_game_session(session_id: int, session_data: GameSessionComple
         logger.debug(f"Received complete session request for session {session_id}")
         logger.debug(f"Session data: {session_data.dict()}")
         
-        result = await end_game_session(session_id, session_data)
+        summary = await end_game_session(session_id, session_data)
+        if not summary:
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        logger.debug(f"Session completion result: {result}")
-        return {"message": "Session completed successfully", "session_id": result}
+        logger.debug(f"Session completion result: {summary}")
+        return {"message": "Session completed successfully", "session_id": session_id, "session": summary}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error completing session {session_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -51,7 +107,7 @@ async def complete_game_session(session_id: int, session_data: GameSessionComple
 async def get_leaderboard_endpoint(user_id: int = None):
     try:
         logger.debug(f"Fetching leaderboard data for user_id: {user_id}")
-        leaderboard_data = await get_leaderboard(user_id)
+        leaderboard_data = await fetch_leaderboard(user_id)
         logger.debug(f"Retrieved {len(leaderboard_data)} leaderboard entries")
         return {"leaderboard": leaderboard_data}
     except Exception as e:
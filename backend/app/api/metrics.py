@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from app.db.connection import get_pool_stats
+from app.core.cache import get_cache_stats
+from app.services.revocation import revocation_list
+from app.services.ai import recognition_engine
+
+router = APIRouter()
+
+@router.get("/db")
+async def get_db_metrics():
+    """Connection pool sizing, checkout wait times and failures"""
+    return get_pool_stats()
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """Hit/miss statistics for the in-process read caches"""
+    return get_cache_stats()
+
+@router.get("/revocation")
+async def get_revocation_metrics():
+    """Revoked-token filter size and how many lookups it answered without a query"""
+    return revocation_list.stats()
+
+@router.get("/recognition")
+async def get_recognition_metrics():
+    """Recognition calls in flight and queued, and how many were shed or timed out"""
+    return recognition_engine.stats()
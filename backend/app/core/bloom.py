@@ -0,0 +1,61 @@
+import hashlib
+import math
+
+class BloomFilter:
+    """Fixed-size Bloom filter over uniformly distributed digests (e.g. SHA-256).
+
+    The bit array size is rounded up to a power of two so each probe position
+    is just the next slice of bits of the digest; no extra hashing is needed
+    until the digest runs out. "Not in the filter" is always correct; "in the
+    filter" is wrong with probability at most about error_rate while no more
+    than capacity items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        optimal_bits = -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        self._index_bits = max(3, math.ceil(math.log2(optimal_bits)))
+        self._mask = (1 << self._index_bits) - 1
+        self.num_bits = 1 << self._index_bits
+        # Rounding the size up lowers the false-positive rate, so don't spend
+        # more probes than the target rate needs
+        self.num_hashes = max(1, min(
+            round(self.num_bits / capacity * math.log(2)),
+            math.ceil(-math.log2(error_rate))
+        ))
+        self.count = 0
+        self._bits = bytearray(self.num_bits >> 3)
+
+    def _positions(self, digest: bytes):
+        step, mask = self._index_bits, self._mask
+        value = int.from_bytes(digest, "little")
+        available = len(digest) * 8
+        positions = []
+        for _ in range(self.num_hashes):
+            if available < step:
+                digest = hashlib.sha256(digest).digest()
+                value = int.from_bytes(digest, "little")
+                available = 256
+            positions.append(value & mask)
+            value >>= step
+            available -= step
+        return positions
+
+    def add(self, digest: bytes):
+        bits = self._bits
+        for position in self._positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self._bits
+        for position in self._positions(digest):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
@@ -0,0 +1,203 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# Every cache registers itself here so the metrics endpoint can report on all of them
+_registry: Dict[str, "TTLCache"] = {}
+
+class TTLCache:
+    """In-process LRU cache with per-entry expiry and owner-scoped invalidation.
+
+    Entries can be tagged with an owner (e.g. a user id); invalidate(owner)
+    drops all of that owner's entries at once. A load that started before an
+    invalidation is not stored, so a slow read can't re-insert stale data.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, owner, value)
+        self._owners: Dict[Hashable, set] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any, owner: Hashable = None, ttl: Optional[float] = None):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), owner, value)
+        if owner is not None:
+            self._owners.setdefault(owner, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        owner: Hashable = None,
+        ttl: Optional[float] = None
+    ) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        generation = (self._generation, self._generations.get(owner, 0))
+        value = await loader()
+        if generation == (self._generation, self._generations.get(owner, 0)):
+            self.set(key, value, owner=owner, ttl=ttl)
+        return value
+
+    async def get_many_or_load(
+        self,
+        keys: List[Hashable],
+        loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        owner: Hashable = None,
+        ttl: Optional[float] = None
+    ) -> Dict[Hashable, Any]:
+        """Like get_or_load, but hands every missing key to a single loader call"""
+        missing = object()
+        values = {}
+        misses = []
+        for key in keys:
+            value = self.get(key, missing)
+            if value is missing:
+                misses.append(key)
+            else:
+                values[key] = value
+        if not misses:
+            return values
+
+        generation = (self._generation, self._generations.get(owner, 0))
+        loaded = await loader(misses)
+        store = generation == (self._generation, self._generations.get(owner, 0))
+        for key in misses:
+            values[key] = loaded[key]
+            if store:
+                self.set(key, loaded[key], owner=owner, ttl=ttl)
+        return values
+
+    def invalidate(self, owner: Hashable):
+        """Drop every entry tagged with owner"""
+        self._generations[owner] = self._generations.get(owner, 0) + 1
+        for key in list(self._owners.get(owner, ())):
+            self._remove(key)
+        self.invalidations += 1
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._owners.clear()
+        self.invalidations += 1
+
+    def _remove(self, key: Hashable):
+        _, owner, _ = self._entries.pop(key)
+        if owner is not None:
+            keys = self._owners.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._owners[owner]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+class NearDuplicateCache(TTLCache):
+    """TTLCache keyed by perceptual hashes that also answers for similar keys.
+
+    Keys are ints of `bits` bits. A lookup that misses exactly returns the
+    closest entry within max_distance differing bits. Near matches go
+    through max_distance + 1 band indexes. Two hashes that differ in at most
+    max_distance bits must agree on at least one band, so a lookup compares
+    only the entries that share a band instead of scanning the cache.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, bits: int = 64, max_distance: int = 0):
+        super().__init__(name, maxsize, ttl)
+        self.bits = bits
+        self.max_distance = max_distance
+        edges = [bits * i // (max_distance + 1) for i in range(max_distance + 2)]
+        self._bands = [(low, (1 << (high - low)) - 1) for low, high in zip(edges, edges[1:])]
+        self._index: List[Dict[int, set]] = [{} for _ in self._bands]
+        self.near_hits = 0
+
+    def _band_values(self, key: int):
+        return [(key >> shift) & mask for shift, mask in self._bands]
+
+    def nearest(self, key: int) -> Optional[int]:
+        """The cached key closest to key within max_distance bits, or None"""
+        best, best_distance = None, self.max_distance + 1
+        for index, value in zip(self._index, self._band_values(key)):
+            for candidate in index.get(value, ()):
+                distance = bin(candidate ^ key).count("1")
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+    def get(self, key: int, default: Any = None) -> Any:
+        if not self.max_distance or key in self._entries:
+            return super().get(key, default)
+        match = self.nearest(key)
+        if match is None:
+            self.misses += 1
+            return default
+        missing = object()
+        value = super().get(match, missing)
+        if value is missing:
+            return default
+        self.near_hits += 1
+        return value
+
+    def set(self, key: int, value: Any, owner: Hashable = None, ttl: Optional[float] = None):
+        super().set(key, value, owner=owner, ttl=ttl)
+        if key in self._entries:
+            for index, band in zip(self._index, self._band_values(key)):
+                index.setdefault(band, set()).add(key)
+
+    def clear(self):
+        super().clear()
+        for index in self._index:
+            index.clear()
+
+    def _remove(self, key: int):
+        super()._remove(key)
+        for index, band in zip(self._index, self._band_values(key)):
+            keys = index.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[band]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "near_hits": self.near_hits, "max_distance": self.max_distance}
+
+def get_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from functools import lru_cache
 from typing import Optional
 import os
@@ -6,6 +6,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# bcrypt log2 rounds per PASSWORD_HASH_PROFILE; 12 is passlib's default, so existing hashes match it
+BCRYPT_PROFILE_ROUNDS = {"default": 12, "fast": 4}
+
 class Settings(BaseModel):
     PROJECT_NAME: str = "Doodle Learn Joy"
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
@@ -16,6 +21,92 @@ class Settings(BaseModel):
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     GOOGLE_REDIRECT_URI: str = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:5173/auth/google")
+    # Overridable so tests can point sign-in at a local stub (scripts/google_userinfo_stub.py)
+    GOOGLE_USERINFO_URL: str = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v3/userinfo")
+    GOOGLE_USERINFO_CACHE_TTL_SECONDS: float = float(os.getenv("GOOGLE_USERINFO_CACHE_TTL_SECONDS", "60"))
+    GOOGLE_USERINFO_CACHE_MAX_ENTRIES: int = int(os.getenv("GOOGLE_USERINFO_CACHE_MAX_ENTRIES", "1000"))
+
+    # Shared outbound HTTP client
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "2"))
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "5"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+    # Database pool sizing; size DB_POOL_MAX_SIZE * worker count below Postgres max_connections
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_MAX_WAITING: int = int(os.getenv("DB_POOL_MAX_WAITING", "0"))  # 0 = unbounded queue
+    DB_POOL_MAX_LIFETIME_SECONDS: float = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "3600"))
+    DB_POOL_MAX_IDLE_SECONDS: float = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "600"))
+
+    # Read caches; entries are dropped on writes in this worker, the TTL bounds staleness across workers
+    DASHBOARD_CACHE_TTL_SECONDS: float = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+    DASHBOARD_CACHE_MAX_ENTRIES: int = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "5000"))
+    LEADERBOARD_CACHE_TTL_SECONDS: float = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "10"))
+    LEADERBOARD_CACHE_MAX_ENTRIES: int = int(os.getenv("LEADERBOARD_CACHE_MAX_ENTRIES", "1000"))
+    # Verified tokens live until their exp, capped so a logout in another worker is honored within this time
+    AUTH_CACHE_MAX_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_MAX_TTL_SECONDS", "300"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+    # bcrypt cost: "default" for production, "fast" for tests and seeding; BCRYPT_ROUNDS overrides.
+    # Stored hashes with a different cost are rehashed on the next successful login.
+    PASSWORD_HASH_PROFILE: str = os.getenv("PASSWORD_HASH_PROFILE", "default")
+    # None until validation fills it in from PASSWORD_HASH_PROFILE
+    BCRYPT_ROUNDS: Optional[int] = int(os.environ["BCRYPT_ROUNDS"]) if os.getenv("BCRYPT_ROUNDS") else None
+
+    # Threads for bcrypt; each busy thread occupies a core for the length of one hash
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # Revoked-token Bloom filter; other workers' logouts are picked up every REVOCATION_SYNC_SECONDS
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    REVOCATION_SYNC_SECONDS: float = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+    REVOCATION_PRUNE_SECONDS: float = float(os.getenv("REVOCATION_PRUNE_SECONDS", "600"))
+
+    # Doodle recognition: "gemini", "local" (CPU classifier, no network) or "fake" for load tests
+    RECOGNITION_BACKEND: str = os.getenv("RECOGNITION_BACKEND", "gemini")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    # Written by scripts/train_local_recognizer.py
+    LOCAL_RECOGNIZER_WEIGHTS: str = os.getenv(
+        "LOCAL_RECOGNIZER_WEIGHTS", os.path.join(BACKEND_DIR, "models", "local_recognizer.npz")
+    )
+    # Guesses returned per recognition, most likely first, each with its probability
+    RECOGNITION_TOP_K: int = int(os.getenv("RECOGNITION_TOP_K", "5"))
+    # Calls past MAX_CONCURRENCY wait; past MAX_CONCURRENCY + MAX_QUEUE they are rejected with 503.
+    # The timeout covers the wait and the call.
+    RECOGNITION_MAX_CONCURRENCY: int = int(os.getenv("RECOGNITION_MAX_CONCURRENCY", "8"))
+    RECOGNITION_MAX_QUEUE: int = int(os.getenv("RECOGNITION_MAX_QUEUE", "32"))
+    RECOGNITION_TIMEOUT_SECONDS: float = float(os.getenv("RECOGNITION_TIMEOUT_SECONDS", "15"))
+    # Calls arriving within MAX_BATCH_WAIT of each other go to the recognizer as one batch of up
+    # to MAX_BATCH_SIZE, and MAX_CONCURRENCY then caps batches rather than single calls. 1 turns
+    # batching off; it pays with the local recognizer, not with Gemini, which has no batch call.
+    RECOGNITION_MAX_BATCH_SIZE: int = int(os.getenv("RECOGNITION_MAX_BATCH_SIZE", "1"))
+    RECOGNITION_MAX_BATCH_WAIT_SECONDS: float = float(os.getenv("RECOGNITION_MAX_BATCH_WAIT_SECONDS", "0.005"))
+    RECOGNITION_FAKE_LATENCY_SECONDS: float = float(os.getenv("RECOGNITION_FAKE_LATENCY_SECONDS", "0.5"))
+    # Largest PNG accepted for recognition, checked while the body streams in
+    RECOGNITION_MAX_UPLOAD_BYTES: int = int(os.getenv("RECOGNITION_MAX_UPLOAD_BYTES", str(2 * 1024 * 1024)))
+    RECOGNITION_MAX_IMAGE_SIDE: int = int(os.getenv("RECOGNITION_MAX_IMAGE_SIDE", "4096"))
+    # Most points accepted in a stroke-encoded drawing; a doodle is usually a few hundred
+    RECOGNITION_MAX_STROKE_POINTS: int = int(os.getenv("RECOGNITION_MAX_STROKE_POINTS", "20000"))
+    # Canvases are cropped to the drawing and scaled to this square, in grayscale, before recognition
+    RECOGNITION_IMAGE_SIZE: int = int(os.getenv("RECOGNITION_IMAGE_SIZE", "256"))
+    # Results by perceptual hash of the drawing; a resubmission within MAX_DISTANCE of the
+    # 256 hash bits reuses the earlier result. 0 means exact matches only.
+    RECOGNITION_CACHE_MAX_ENTRIES: int = int(os.getenv("RECOGNITION_CACHE_MAX_ENTRIES", "10000"))
+    RECOGNITION_CACHE_TTL_SECONDS: float = float(os.getenv("RECOGNITION_CACHE_TTL_SECONDS", "3600"))
+    RECOGNITION_CACHE_MAX_DISTANCE: int = int(os.getenv("RECOGNITION_CACHE_MAX_DISTANCE", "12"))
+
+    @model_validator(mode="after")
+    def bcrypt_rounds_from_profile(self) -> "Settings":
+        if self.PASSWORD_HASH_PROFILE not in BCRYPT_PROFILE_ROUNDS:
+            raise ValueError(
+                f"Unknown PASSWORD_HASH_PROFILE {self.PASSWORD_HASH_PROFILE!r}; "
+                f"use one of: {', '.join(BCRYPT_PROFILE_ROUNDS)}"
+            )
+        if self.BCRYPT_ROUNDS is None:
+            self.BCRYPT_ROUNDS = BCRYPT_PROFILE_ROUNDS[self.PASSWORD_HASH_PROFILE]
+        return self
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -0,0 +1,14 @@
+class RecognitionError(Exception):
+    """Doodle recognition failed"""
+
+class RecognitionOverloaded(RecognitionError):
+    """Too many recognitions in flight and queued; the caller should retry later"""
+
+class RecognitionTimeout(RecognitionError):
+    """Recognition did not finish within RECOGNITION_TIMEOUT_SECONDS"""
+
+class InvalidImage(RecognitionError):
+    """The image isn't a PNG the recognizer accepts"""
+
+class ImageTooLarge(InvalidImage):
+    """The image is over RECOGNITION_MAX_UPLOAD_BYTES or RECOGNITION_MAX_IMAGE_SIDE"""
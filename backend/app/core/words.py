@@ -0,0 +1,23 @@
+WORD_DIFFICULTY = {
+    'EASY': [
+        'cat', 'dog', 'sun', 'tree', 'house', 'ball', 'fish',
+        'star', 'bird', 'flower', 'apple', 'book', 'moon',
+        'car', 'hat', 'circle', 'square', 'heart',  # Added from real data
+        'triangle', 'line'
+    ],
+    'MEDIUM': [
+        'bicycle', 'elephant', 'butterfly', 'rainbow', 'dinosaur',
+        'airplane', 'castle', 'dolphin', 'penguin', 'lion',
+        'monkey', 'giraffe', 'turtle', 'robot', 'rocket',
+        'cat', 'dog'  # These appear as medium in real data
+    ],
+    'HARD': [
+        'spaceship', 'submarine', 'helicopter', 'waterfall',
+        'volcano', 'octopus', 'unicorn', 'dragon', 'mermaid',
+        'lighthouse', 'windmill', 'telescope', 'rollercoaster',
+        'skateboard', 'treehouse', 'giraffe', 'castle'  # Added from real data
+    ]
+}
+
+# Every word the game can prompt, in a stable order (the local recognizer's label space)
+VOCABULARY = sorted({word for words in WORD_DIFFICULTY.values() for word in words})
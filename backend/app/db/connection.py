@@ -1,40 +1,139 @@
-import os
-from psycopg2 import pool
-from contextlib import contextmanager
+import time
+import psycopg
+from psycopg import ClientCursor
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
+from contextlib import asynccontextmanager, contextmanager
 from app.core.config import settings
 
 connection_pool = None
 
-def init_connection_pool():
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class PoolMetrics:
+    """Checkout counters kept alongside the pool's own statistics"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_in_use = 0
+        self.max_waiting = 0
+        self.wait_ms_total = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, wait_ms: float):
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                self.wait_histogram[i] += 1
+                return
+        self.wait_histogram[-1] += 1
+
+    def snapshot(self) -> dict:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_histogram)}
+        buckets["le_inf"] = self.wait_histogram[-1]
+        return {
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_in_use": self.max_in_use,
+            "max_waiting": self.max_waiting,
+            "avg_wait_ms": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_histogram": buckets,
+        }
+
+pool_metrics = PoolMetrics()
+
+async def init_connection_pool():
     global connection_pool
     try:
-        connection_pool = pool.SimpleConnectionPool(
-            1,  # Minimum connections
-            20,  # Maximum connections
-            settings.DATABASE_URL
+        connection_pool = AsyncConnectionPool(
+            settings.DATABASE_URL,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            max_waiting=settings.DB_POOL_MAX_WAITING,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+            max_idle=settings.DB_POOL_MAX_IDLE_SECONDS,
+            # Validate connections on checkout so a Postgres restart doesn't hand out dead sockets
+            check=AsyncConnectionPool.check_connection,
+            open=False
         )
+        # Warm up: block startup until min_size connections are established
+        await connection_pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT_SECONDS)
         print("Database pool initialized successfully")
     except Exception as e:
         print(f"Error creating connection pool: {e}")
         raise
 
-@contextmanager
-def get_db_connection():
-    """Get a database connection from the pool"""
+@asynccontextmanager
+async def get_db_connection():
+    """Get an async database connection from the pool, waiting up to DB_POOL_TIMEOUT_SECONDS"""
     if connection_pool is None:
-        init_connection_pool()
-    
-    conn = connection_pool.getconn()
+        await init_connection_pool()
+
+    pool_metrics.waiting += 1
+    pool_metrics.max_waiting = max(pool_metrics.max_waiting, pool_metrics.waiting)
+    started = time.perf_counter()
     try:
-        yield conn
+        conn = await connection_pool.getconn()
+    except (PoolTimeout, TooManyRequests):
+        pool_metrics.checkout_failures += 1
+        raise
     finally:
-        connection_pool.putconn(conn)
+        pool_metrics.waiting -= 1
 
-def close_all_connections():
+    pool_metrics.record_wait((time.perf_counter() - started) * 1000)
+    pool_metrics.in_use += 1
+    pool_metrics.max_in_use = max(pool_metrics.max_in_use, pool_metrics.in_use)
+    try:
+        async with conn:
+            yield conn
+    finally:
+        pool_metrics.in_use -= 1
+        await connection_pool.putconn(conn)
+
+@asynccontextmanager
+async def get_db_cursor(row_factory=None):
+    """Get a cursor on a pooled connection; the transaction commits on clean exit"""
+    async with get_db_connection() as conn:
+        async with conn.cursor(row_factory=row_factory) as cur:
+            yield cur
+
+def get_pool_stats() -> dict:
+    """Pool sizing and checkout statistics for the metrics endpoint"""
+    if connection_pool is None:
+        return {"initialized": False, **pool_metrics.snapshot()}
+
+    pool_stats = connection_pool.get_stats()
+    return {
+        "initialized": True,
+        "min_size": connection_pool.min_size,
+        "max_size": connection_pool.max_size,
+        "size": pool_stats.get("pool_size", 0),
+        "available": pool_stats.get("pool_available", 0),
+        "connections_lost": pool_stats.get("connections_lost", 0),
+        "connection_errors": pool_stats.get("connections_errors", 0),
+        "returns_bad": pool_stats.get("returns_bad", 0),
+        **pool_metrics.snapshot(),
+    }
+
+async def close_all_connections():
     """Close all database connections"""
+    global connection_pool
     if connection_pool is not None:
-        connection_pool.closeall()
+        await connection_pool.close()
+        connection_pool = None
 
-# Clean up on module unload
-import atexit
-atexit.register(close_all_connections)
+@contextmanager
+def get_sync_db_connection():
+    """Blocking connection for maintenance scripts (seeding, cleanup) that run outside the event loop"""
+    with psycopg.connect(settings.DATABASE_URL, cursor_factory=ClientCursor) as conn:
+        yield conn
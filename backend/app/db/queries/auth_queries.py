@@ -1,5 +1,7 @@
-from app.db.connection import get_db_connection
-from psycopg2.extras import DictCursor
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+from app.db.connection import get_db_connection, get_db_cursor
+from psycopg.rows import dict_row
 from app.schemas.auth import PasswordReset
 
 async def get_user(username: str):
@@ -8,17 +10,15 @@ async def get_user(username: str):
         FROM users 
         WHERE username = %s
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (username,))
-            return cur.fetchone()
+    async with get_db_cursor(row_factory=dict_row) as cur:
+        await cur.execute(query, (username,))
+        return await cur.fetchone()
 
 async def get_user_by_email(email: str):
     query = "SELECT * FROM users WHERE email = %s"
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (email,))
-            return cur.fetchone()
+    async with get_db_cursor(row_factory=dict_row) as cur:
+        await cur.execute(query, (email,))
+        return await cur.fetchone()
 
 async def create_new_user(user_data: dict):
     query = """
@@ -26,41 +26,105 @@ async def create_new_user(user_data: dict):
         VALUES (%s, %s, %s, %s)
         RETURNING id
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (
                 user_data["username"],
                 user_data["password"],
                 user_data["email"],
                 user_data["name"]
             ))
-            conn.commit()
-            return cur.fetchone()[0]
+            await conn.commit()
+            return (await cur.fetchone())[0]
 
-async def blacklist_token(token: str):
+async def create_oauth_user(base_username: str, email: str, name: Optional[str], password: str):
+    """Create a user for an external sign-in, picking the username in the same statement.
+
+    Takes base_username when it is free, otherwise base_username plus a random
+    suffix. Returns None when a concurrent request took the email or the
+    username first.
+    """
+    query = """
+        WITH candidate AS (
+            SELECT CASE
+                WHEN EXISTS (SELECT 1 FROM users WHERE username = %(base)s)
+                THEN %(base)s || '_' || substr(md5(random()::text), 1, 6)
+                ELSE %(base)s
+            END AS username
+        )
+        INSERT INTO users (username, password, email, name)
+        SELECT username, %(password)s, %(email)s, COALESCE(%(name)s, username)
+        FROM candidate
+        ON CONFLICT DO NOTHING
+        RETURNING id, username, email, name
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(query, {"base": base_username, "password": password, "email": email, "name": name})
+            user = await cur.fetchone()
+            await conn.commit()
+            return user
+
+async def update_password_hash(user_id: int, old_hash: str, new_hash: str):
+    """Replace a hash with an upgraded one, unless the password changed in the meantime"""
+    query = "UPDATE users SET password = %s WHERE id = %s AND password = %s"
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (new_hash, user_id, old_hash))
+            await conn.commit()
+
+async def revoke_token(token_hash: bytes, expires_at: datetime):
+    query = """
+        INSERT INTO revoked_tokens (token_hash, expires_at)
+        VALUES (%s, %s)
+        ON CONFLICT (token_hash) DO NOTHING
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (token_hash, expires_at))
+            await conn.commit()
+
+async def is_token_revoked(token_hash: bytes) -> bool:
+    query = "SELECT EXISTS(SELECT 1 FROM revoked_tokens WHERE token_hash = %s AND expires_at > NOW())"
+    async with get_db_cursor() as cur:
+        await cur.execute(query, (token_hash,))
+        return (await cur.fetchone())[0]
+
+async def count_revoked_tokens() -> int:
+    async with get_db_cursor() as cur:
+        await cur.execute("SELECT COUNT(*) FROM revoked_tokens WHERE expires_at > NOW()")
+        return (await cur.fetchone())[0]
+
+async def iter_revoked_tokens(since: Optional[datetime] = None) -> AsyncIterator[Tuple[bytes, datetime]]:
+    """Stream (token_hash, revoked_at) of unexpired revocations, optionally only those revoked after since"""
     query = """
-        INSERT INTO token_blacklist (token, blacklisted_on)
-        VALUES (%s, NOW())
+        SELECT token_hash, revoked_at
+        FROM revoked_tokens
+        WHERE expires_at > NOW()
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (token,))
-            conn.commit()
+    params = ()
+    if since is not None:
+        query += " AND revoked_at > %s"
+        params = (since,)
+    async with get_db_cursor() as cur:
+        async for token_hash, revoked_at in cur.stream(query, params):
+            yield bytes(token_hash), revoked_at
 
-async def is_token_blacklisted(token: str) -> bool:
-    query = "SELECT EXISTS(SELECT 1 FROM token_blacklist WHERE token = %s)"
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (token,))
-            return cur.fetchone()[0]
+async def prune_revoked_tokens() -> int:
+    """Delete revocations of tokens that have expired anyway"""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("DELETE FROM revoked_tokens WHERE expires_at <= NOW()")
+            await conn.commit()
+            return cur.rowcount
 
 async def reset_user_password(email: str, new_password: str):
     query = "UPDATE users SET password = %s WHERE email = %s RETURNING id"
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (new_password, email))
-            result = cur.fetchone()
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (new_password, email))
+            result = await cur.fetchone()
             if not result:
                 raise ValueError("Email not found")
-            conn.commit()
+            await conn.commit()
             return result[0]
@@ -1,30 +1,19 @@
-from app.db.connection import get_db_connection
-from psycopg2.extras import DictCursor
+from app.db.connection import get_db_connection, get_db_cursor
+from psycopg.rows import dict_row
+from typing import Dict, Iterable, Optional
 
-
-async def get_user_overall_stats(user_id: int):
-    query = """
+OVERALL_STATS_QUERY = """
     SELECT * FROM user_progress_view WHERE user_id = %s
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id,))
-            return dict(cur.fetchone())
 
-async def get_weekly_progress(user_id: int):
-    query = """
+WEEKLY_PROGRESS_QUERY = """
     SELECT * FROM weekly_progress_view 
     WHERE user_id = %s 
     ORDER BY week_start DESC 
     LIMIT 8
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id,))
-            return [dict(row) for row in cur.fetchall()]
 
-async def get_difficulty_stats(user_id: int):
-    query = """
+DIFFICULTY_STATS_QUERY = """
     SELECT 
         difficulty,
         COUNT(*) as total_attempts,
@@ -35,13 +24,8 @@ async def get_difficulty_stats(user_id: int):
     WHERE user_id = %s
     GROUP BY difficulty
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id,))
-            return [dict(row) for row in cur.fetchall()]
 
-async def get_recent_activities(user_id: int, limit: int = 10):
-    query = """
+RECENT_ACTIVITIES_QUERY = """
     SELECT 
         da.id,
         da.word_prompt,
@@ -57,120 +41,151 @@ async def get_recent_activities(user_id: int, limit: int = 10):
     ORDER BY da.created_at DESC
     LIMIT %s
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id, limit))
-            return [dict(row) for row in cur.fetchall()]
+
+# Record dates are stored on user_metrics by the attempts trigger and by
+# session completion, so this is a primary-key lookup
+PERFORMANCE_METRICS_QUERY = """
+    SELECT 
+        total_games_played,
+        total_attempts,
+        successful_attempts,
+        total_time_spent_seconds,
+        current_level,
+        experience_points,
+        best_score,
+        fastest_correct_ms,
+        highest_streak,
+        easy_accuracy,
+        medium_accuracy,
+        hard_accuracy,
+        avg_drawing_time_ms,
+        best_score_date,
+        fastest_correct_date,
+        highest_streak_date
+    FROM user_metrics
+    WHERE user_id = %s
+    """
+
+def _first_row(rows):
+    return dict(rows[0])
+
+def _all_rows(rows):
+    return [dict(row) for row in rows]
+
+def _performance_row(rows):
+    result = dict(rows[0]) if rows else {}
+    # Ensure dates are returned even if NULL
+    if result:
+        result['best_score_date'] = result.get('best_score_date') or result.get('last_updated')
+        result['fastest_correct_date'] = result.get('fastest_correct_date') or result.get('last_updated')
+        result['highest_streak_date'] = result.get('highest_streak_date') or result.get('last_updated')
+    return result
+
+# Dashboard panels: name -> (query, params(user_id, recent_limit), shape(rows))
+DASHBOARD_PANELS = {
+    "overall": (OVERALL_STATS_QUERY, lambda user_id, limit: (user_id,), _first_row),
+    "weekly": (WEEKLY_PROGRESS_QUERY, lambda user_id, limit: (user_id,), _all_rows),
+    "difficulty": (DIFFICULTY_STATS_QUERY, lambda user_id, limit: (user_id,), _all_rows),
+    "recent": (RECENT_ACTIVITIES_QUERY, lambda user_id, limit: (user_id, limit), _all_rows),
+    "performance": (PERFORMANCE_METRICS_QUERY, lambda user_id, limit: (user_id,), _performance_row),
+}
+
+async def _fetch_panel(name: str, user_id: int, limit: int = 10):
+    query, params, shape = DASHBOARD_PANELS[name]
+    async with get_db_cursor(row_factory=dict_row) as cur:
+        await cur.execute(query, params(user_id, limit))
+        return shape(await cur.fetchall())
+
+async def get_dashboard_panels(user_id: int, names: Iterable[str], recent_limit: int = 10) -> Dict[str, object]:
+    """Run several panel queries on one connection in a single round-trip.
+
+    The statements are pipelined: all are sent before any result is read,
+    then one sync collects every result set.
+    """
+    names = list(names)
+    if not names:
+        return {}
+
+    async with get_db_connection() as conn:
+        cursors = {}
+        async with conn.pipeline():
+            for name in names:
+                query, params, _ = DASHBOARD_PANELS[name]
+                cur = conn.cursor(row_factory=dict_row)
+                await cur.execute(query, params(user_id, recent_limit))
+                cursors[name] = cur
+
+        results = {}
+        for name, cur in cursors.items():
+            _, _, shape = DASHBOARD_PANELS[name]
+            results[name] = shape(await cur.fetchall())
+            await cur.close()
+        return results
+
+async def get_user_overall_stats(user_id: int):
+    return await _fetch_panel("overall", user_id)
+
+async def get_weekly_progress(user_id: int):
+    return await _fetch_panel("weekly", user_id)
+
+async def get_difficulty_stats(user_id: int):
+    return await _fetch_panel("difficulty", user_id)
+
+async def get_recent_activities(user_id: int, limit: int = 10):
+    return await _fetch_panel("recent", user_id, limit)
 
 async def get_performance_metrics(user_id: int):
-    query = """
-    WITH best_metrics AS (
+    return await _fetch_panel("performance", user_id)
+
+async def get_user_sessions(user_id: int, limit: int = 10, before_id: Optional[int] = None):
+    """Get a page of the user's game sessions, newest first.
+
+    Keyset pagination: pass the id of the last session of the previous page as
+    before_id. Returns None when before_id isn't one of the user's sessions,
+    so a bad cursor isn't mistaken for the end of the list. Streaks come from
+    game_sessions.streak_count, which the attempts trigger keeps current.
+    """
+    sessions_query = """
         SELECT 
-            MAX(gs.total_score) as best_score,
-            MIN(CASE WHEN da.is_correct THEN da.drawing_time_ms END) as fastest_correct_ms,
-            MAX(gs.streak_count) as highest_streak,
-            MAX(CASE WHEN gs.total_score = um.best_score THEN gs.created_at END) as best_score_date,
-            MIN(CASE WHEN da.is_correct AND da.drawing_time_ms = um.fastest_correct_ms THEN da.created_at END) as fastest_correct_date,
-            MAX(CASE WHEN gs.streak_count = um.highest_streak THEN gs.created_at END) as highest_streak_date
-        FROM user_metrics um
-        LEFT JOIN game_sessions gs ON gs.user_id = um.user_id
-        LEFT JOIN drawing_attempts da ON da.user_id = um.user_id
-        WHERE um.user_id = %s
-    )
-    SELECT 
-        um.total_games_played,
-        um.total_attempts,
-        um.successful_attempts,
-        um.total_time_spent_seconds,
-        um.current_level,
-        um.experience_points,
-        um.best_score,
-        um.fastest_correct_ms,
-        um.highest_streak,
-        um.easy_accuracy,
-        um.medium_accuracy,
-        um.hard_accuracy,
-        um.avg_drawing_time_ms,
-        bm.best_score_date,
-        bm.fastest_correct_date,
-        bm.highest_streak_date
-    FROM user_metrics um
-    CROSS JOIN best_metrics bm
-    WHERE um.user_id = %s
+            gs.id,
+            gs.start_time,
+            gs.end_time,
+            gs.total_score,
+            gs.total_attempts,
+            gs.successful_attempts,
+            gs.avg_drawing_time_ms,
+            gs.streak_count
+        FROM game_sessions gs
+        WHERE gs.user_id = %(user_id)s
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id, user_id))
-            result = dict(cur.fetchone() or {})
-            # Ensure dates are returned even if NULL
-            if result:
-                result['best_score_date'] = result.get('best_score_date') or result.get('last_updated')
-                result['fastest_correct_date'] = result.get('fastest_correct_date') or result.get('last_updated')
-                result['highest_streak_date'] = result.get('highest_streak_date') or result.get('last_updated')
-            return result
-
-def calculate_max_streak(attempts):
-    """Calculate the longest streak of correct attempts"""
-    if not attempts:
-        return 0
-        
-    current_streak = 0
-    max_streak = 0
-    
-    # Sort attempts by created_at to ensure correct order
-    sorted_attempts = sorted(attempts, key=lambda x: x['created_at'])
-    
-    for attempt in sorted_attempts:
-        if attempt['is_correct']:
-            current_streak += 1
-            max_streak = max(max_streak, current_streak)
-        else:
-            current_streak = 0
-            
-    return max_streak
+    if before_id is not None:
+        sessions_query += """
+        AND (gs.start_time, gs.id) < (%(before_start_time)s, %(before_id)s)
+        """
+    sessions_query += """
+        ORDER BY gs.start_time DESC, gs.id DESC
+        LIMIT %(limit)s
+    """
+    params = {"user_id": user_id, "before_id": before_id, "limit": limit}
 
-async def get_user_sessions(user_id: int, limit: int = 10, offset: int = 0):
-    """Get paginated list of user's game sessions"""
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            # Get basic session info
-            sessions_query = """
-                SELECT 
-                    gs.id,
-                    gs.start_time,
-                    gs.end_time,
-                    gs.total_score,
-                    gs.total_attempts,
-                    gs.successful_attempts,
-                    gs.avg_drawing_time_ms
-                FROM game_sessions gs
-                WHERE gs.user_id = %s
-                ORDER BY gs.start_time DESC
-                LIMIT %s OFFSET %s
-            """
-            cur.execute(sessions_query, (user_id, limit, offset))
-            sessions = [dict(session) for session in cur.fetchall()]
-
-            # For each session, get its attempts and calculate streak
-            for session in sessions:
-                attempts_query = """
-                    SELECT 
-                        is_correct,
-                        created_at
-                    FROM drawing_attempts
-                    WHERE session_id = %s
-                    ORDER BY created_at ASC
-                """
-                cur.execute(attempts_query, (session['id'],))
-                attempts = cur.fetchall()
-                session['streak_count'] = calculate_max_streak(attempts)
-
-            return sessions
+    async with get_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            if before_id is not None:
+                await cur.execute(
+                    "SELECT start_time FROM game_sessions WHERE id = %s AND user_id = %s",
+                    (before_id, user_id)
+                )
+                cursor_row = await cur.fetchone()
+                if not cursor_row:
+                    return None
+                params["before_start_time"] = cursor_row["start_time"]
+            await cur.execute(sessions_query, params)
+            return [dict(session) for session in await cur.fetchall()]
 
 async def get_session_details(user_id: int, session_id: int):
     """Get detailed information about a specific game session"""
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
+    async with get_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
             # Get basic session info
             session_query = """
                 SELECT 
@@ -180,12 +195,13 @@ async def get_session_details(user_id: int, session_id: int):
                     total_score,
                     total_attempts,
                     successful_attempts,
-                    avg_drawing_time_ms
+                    avg_drawing_time_ms,
+                    streak_count
                 FROM game_sessions
                 WHERE id = %s AND user_id = %s
             """
-            cur.execute(session_query, (session_id, user_id))
-            session = cur.fetchone()
+            await cur.execute(session_query, (session_id, user_id))
+            session = await cur.fetchone()
             
             if not session:
                 return None
@@ -202,15 +218,11 @@ async def get_session_details(user_id: int, session_id: int):
                     created_at
                 FROM drawing_attempts
                 WHERE session_id = %s
-                ORDER BY created_at ASC
+                ORDER BY created_at ASC, id ASC
             """
-            cur.execute(attempts_query, (session_id,))
-            attempts = [dict(attempt) for attempt in cur.fetchall()]
+            await cur.execute(attempts_query, (session_id,))
+            attempts = [dict(attempt) for attempt in await cur.fetchall()]
 
-            # Calculate streak using the helper function
-            session = dict(session)
-            session['streak_count'] = calculate_max_streak(attempts)
-            
             return {
                 **session,
                 "attempts": attempts
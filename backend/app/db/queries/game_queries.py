@@ -1,5 +1,7 @@
 from app.db.connection import get_db_connection
 from app.schemas.game import DrawingAttempt, GameSession, GameScore, GameSessionComplete
+from typing import List, Optional
+from psycopg.rows import dict_row
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -11,11 +13,11 @@ async def create_game_session(session_data: GameSession) -> int:
         VALUES (%s)
         RETURNING id
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (session_data.user_id,))
-            conn.commit()
-            session_row = cur.fetchone()
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (session_data.user_id,))
+            await conn.commit()
+            session_row = await cur.fetchone()
             if not session_row or len(session_row) == 0:
                 raise Exception("Failed to create game session")
             return session_row[0]
@@ -27,9 +29,9 @@ async def save_drawing_attempt(attempt: DrawingAttempt) -> int:
         VALUES (%s, %s, %s, %s, %s, %s, %s)
         RETURNING id
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, (
                 attempt.session_id,
                 attempt.user_id,
                 attempt.word_prompt,
@@ -38,155 +40,174 @@ async def save_drawing_attempt(attempt: DrawingAttempt) -> int:
                 attempt.drawing_time_ms,
                 attempt.recognition_accuracy
             ))
-            conn.commit()
-            return cur.fetchone()[0]
+            await conn.commit()
+            return (await cur.fetchone())[0]
 
-async def complete_game_session(session_id: int, data: GameSessionComplete) -> int:
-    queries = [
-        # 0: Get user_id; ensure session exists.
-        """SELECT user_id FROM game_sessions WHERE id = %s""",
-        
-        # 1: Get drawing attempt statistics.
-        """SELECT 
-              COUNT(*) as total_attempts,
-              COUNT(*) FILTER (WHERE is_correct = true) as correct_attempts,
-              COALESCE(AVG(drawing_time_ms), 0) as avg_time
-           FROM drawing_attempts 
-           WHERE session_id = %s""",
-        
-        # 2: Calculate max streak.
-        """WITH consecutive_attempts AS (
-                SELECT 
-                    is_correct,
-                    row_number() OVER (ORDER BY created_at) - 
-                    row_number() OVER (PARTITION BY is_correct ORDER BY created_at) as grp
-                FROM drawing_attempts
-                WHERE session_id = %s AND is_correct = true
-            )
-            SELECT COALESCE(MAX(count), 0) as max_streak
-            FROM (
-                SELECT COUNT(*) as count
-                FROM consecutive_attempts
-                GROUP BY grp
-            ) t""",
-        
-        # 3: Update game_sessions.
-        """UPDATE game_sessions 
-           SET 
-              end_time = NOW(),
-              total_score = %s,
-              total_attempts = %s,
-              total_time_seconds = %s,
-              successful_attempts = %s,
-              streak_count = %s,
-              avg_drawing_time_ms = %s
-           WHERE id = %s""",
-        
-        # 4: Update user_metrics.
-        """UPDATE user_metrics 
-           SET 
-              total_games_played = total_games_played + 1,
-              total_time_spent_seconds = total_time_spent_seconds + %s,
-              best_score = GREATEST(COALESCE(best_score, 0), %s)
-           WHERE user_id = %s"""
-    ]
-    
+async def save_drawing_attempts(attempts: List[DrawingAttempt]) -> List[int]:
+    """Insert a batch of attempts with one multi-row INSERT in a single transaction.
+
+    Returns the new ids in the order of attempts. The metrics trigger runs
+    once for the whole statement. created_at uses clock_timestamp() so rows
+    keep their submission order within the batch. Callers cap the batch at
+    MAX_ATTEMPTS_PER_BATCH (app.schemas.game).
+    """
+    row_placeholder = "(%s, %s, %s, %s, %s, %s, %s, clock_timestamp())"
+    query = f"""
+        INSERT INTO drawing_attempts 
+        (session_id, user_id, word_prompt, difficulty, is_correct, drawing_time_ms, recognition_accuracy, created_at)
+        VALUES {", ".join([row_placeholder] * len(attempts))}
+        RETURNING id
+    """
+    params = []
+    for attempt in attempts:
+        params.extend((
+            attempt.session_id,
+            attempt.user_id,
+            attempt.word_prompt,
+            attempt.difficulty,
+            attempt.is_correct,
+            attempt.drawing_time_ms,
+            attempt.recognition_accuracy
+        ))
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            attempt_ids = [row[0] for row in await cur.fetchall()]
+            await conn.commit()
+            return attempt_ids
+
+# Completes a session in one statement and one round-trip: stamps the session,
+# folds it into user_metrics and returns the final summary. Streak and success
+# counts are already maintained by trg_update_user_metrics as attempts arrive,
+# so the only scan left is the index range over this session's attempt times.
+COMPLETE_SESSION_QUERY = """
+    WITH attempt_stats AS (
+        SELECT COALESCE(AVG(drawing_time_ms), 0)::integer as avg_time
+        FROM drawing_attempts
+        WHERE session_id = %(session_id)s
+    ),
+    session AS (
+        UPDATE game_sessions gs
+        SET 
+            end_time = NOW(),
+            total_score = %(total_score)s,
+            total_attempts = %(total_attempts)s,
+            total_time_seconds = %(total_time_seconds)s,
+            avg_drawing_time_ms = a.avg_time
+        FROM attempt_stats a
+        WHERE gs.id = %(session_id)s
+        RETURNING 
+            gs.id,
+            gs.user_id,
+            gs.start_time,
+            gs.end_time,
+            gs.total_time_seconds,
+            gs.total_score,
+            gs.total_attempts,
+            gs.successful_attempts,
+            gs.streak_count,
+            gs.avg_drawing_time_ms,
+            gs.created_at
+    ),
+    metrics AS (
+        UPDATE user_metrics um
+        SET 
+            total_games_played = um.total_games_played + 1,
+            total_time_spent_seconds = um.total_time_spent_seconds + s.total_time_seconds,
+            best_score = GREATEST(COALESCE(um.best_score, 0), s.successful_attempts),
+            best_score_date = CASE
+                WHEN s.successful_attempts >= COALESCE(um.best_score, 0) THEN s.created_at
+                ELSE um.best_score_date
+            END,
+            last_updated = CURRENT_TIMESTAMP
+        FROM session s
+        WHERE um.user_id = s.user_id
+    )
+    SELECT
+        id, user_id, start_time, end_time, total_time_seconds, total_score,
+        total_attempts, successful_attempts, streak_count, avg_drawing_time_ms
+    FROM session
+"""
+
+async def complete_game_session(session_id: int, data: GameSessionComplete) -> Optional[dict]:
+    """Complete a session and return its final summary, or None if it doesn't exist"""
+    params = {
+        "session_id": session_id,
+        "total_score": data.total_score,
+        "total_attempts": data.total_attempts,
+        "total_time_seconds": data.total_time_seconds,
+    }
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Query 0: Get user_id
-                logger.debug(f"Executing user query for session {session_id}")
-                cur.execute(queries[0], (session_id,))
-                user_result = cur.fetchone()
-                logger.debug(f"User query result: {user_result}")
-                
-                if not user_result:
-                    logger.error(f"Session {session_id} not found")
-                    return None
-                user_id = user_result[0]
-                logger.debug(f"Found user_id: {user_id}")
-                
-                # Query 1: Get attempt statistics
-                logger.debug(f"Executing stats query for session {session_id}")
-                cur.execute(queries[1], (session_id,))
-                stats = cur.fetchone()
-                logger.debug(f"Stats query result: {stats}")
-                total_attempts, correct_attempts, avg_time = stats if stats else (0, 0, 0)
-                
-                # Query 2: Get max streak
-                logger.debug(f"Executing streak query for session {session_id}")
-                cur.execute(queries[2], (session_id,))
-                streak_result = cur.fetchone()
-                logger.debug(f"Streak query result: {streak_result}")
-                max_streak = streak_result[0] if streak_result and len(streak_result) > 0 else 0
-                
-                # Query 3: Update session
-                logger.debug(f"Executing session update for session {session_id}")
-                logger.debug(f"Update params: score={data.total_score}, attempts={data.total_attempts}, "
-                           f"time={data.total_time_seconds}, correct={correct_attempts}, "
-                           f"streak={max_streak}, avg_time={avg_time}")
-                cur.execute(queries[3], (
-                    data.total_score,
-                    data.total_attempts,
-                    data.total_time_seconds,
-                    correct_attempts,
-                    max_streak,
-                    avg_time,
-                    session_id
-                ))
-                
-                # Query 4: Update metrics
-                logger.debug(f"Executing metrics update for user {user_id}")
-                cur.execute(queries[4], (
-                    data.total_time_seconds,
-                    correct_attempts,
-                    user_id
-                ))
-                
-                conn.commit()
-                logger.debug(f"Successfully completed session {session_id}")
-                return user_id
-                
+        async with get_db_connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(COMPLETE_SESSION_QUERY, params)
+                summary = await cur.fetchone()
+                await conn.commit()
+
+        if not summary:
+            logger.error(f"Session {session_id} not found")
+            return None
+        logger.debug(f"Completed session {session_id}: {summary}")
+        return summary
+
     except Exception as e:
         logger.error(f"Error in complete_game_session: {e}", exc_info=True)
         raise
 
-async def get_leaderboard(user_id: int = None):
-    """Get top 10 players and current user's rank if not in top 10"""
-    top_players_query = """
-        WITH rankings AS (
-            SELECT 
-                u.id,
-                u.username,
-                COUNT(DISTINCT gs.id) as games_played,
-                COALESCE(SUM(gs.total_score), 0) as total_score,
-                COALESCE(SUM(gs.total_attempts), 0) as total_attempts,
-                ROUND(AVG(gs.avg_drawing_time_ms)::numeric, 2) as avg_time,
-                MAX(gs.streak_count) as best_streak,
-                RANK() OVER (ORDER BY COALESCE(SUM(gs.total_score), 0) DESC) as rank
-            FROM users u
-            LEFT JOIN game_sessions gs ON u.id = gs.user_id
-            GROUP BY u.id, u.username
-        )
+LEADERBOARD_QUERY = """
+    WITH cutoff AS (
+        -- RANK() <= 10 holds exactly for scores at or above the 10th highest score
+        SELECT MIN(total_score) as score
+        FROM (
+            SELECT total_score
+            FROM leaderboard_stats
+            ORDER BY total_score DESC
+            LIMIT 10
+        ) top_scores
+    ),
+    top_players AS (
+        SELECT 
+            l.*,
+            RANK() OVER (ORDER BY l.total_score DESC) as rank
+        FROM leaderboard_stats l, cutoff c
+        WHERE l.total_score >= c.score
+    ),
+    current_player AS (
         SELECT 
-            username,
-            games_played,
-            total_score,
-            total_attempts,
-            avg_time,
-            best_streak,
-            rank
-        FROM rankings
-        WHERE rank <= 10 
-        OR (id = %s AND %s IS NOT NULL)
-        ORDER BY rank ASC
+            l.*,
+            (SELECT COUNT(*) FROM leaderboard_stats h WHERE h.total_score > l.total_score) + 1 as rank
+        FROM leaderboard_stats l
+        WHERE l.user_id = %s
+        AND l.user_id NOT IN (SELECT user_id FROM top_players)
+    )
+    SELECT 
+        u.username,
+        p.games_played,
+        p.total_score,
+        p.total_attempts,
+        ROUND(p.avg_time_sum::numeric / NULLIF(p.avg_time_count, 0), 2) as avg_time,
+        p.best_streak,
+        p.rank
+    FROM (
+        SELECT * FROM top_players
+        UNION ALL
+        SELECT * FROM current_player
+    ) p
+    JOIN users u ON u.id = p.user_id
+    ORDER BY p.rank ASC
+"""
+
+async def get_leaderboard(user_id: int = None):
+    """Get top 10 players and current user's rank if not in top 10.
+
+    Served from leaderboard_stats, which triggers keep in step with game_sessions.
     """
-    
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(top_players_query, (user_id, user_id))
-                rows = cur.fetchall()
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(LEADERBOARD_QUERY, (user_id,))
+                rows = await cur.fetchall()
                 return [
                     {
                         "username": row[0],
@@ -1,6 +1,6 @@
 from app.db.connection import get_db_connection
-from psycopg2.extras import DictCursor
-from app.core.security import verify_password, get_password_hash
+from psycopg.rows import dict_row
+from app.core.security import verify_password_async, get_password_hash_async
 
 class ProfileError(Exception):
     def __init__(self, message: str, error_type: str):
@@ -32,29 +32,35 @@ async def get_user_profile_data(user_id: int):
     WHERE u.id = %s
     """
     
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute(query, (user_id,))
-            result = dict(cur.fetchone() or {})
+    async with get_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(query, (user_id,))
+            result = dict(await cur.fetchone() or {})
             return result
 
 async def update_user_password(user_id: int, current_password: str, new_password: str):
     verify_query = "SELECT password FROM users WHERE id = %s"
-    update_query = "UPDATE users SET password = %s WHERE id = %s"
+    # Only replace the hash that was verified, in case the password changed meanwhile
+    update_query = "UPDATE users SET password = %s WHERE id = %s AND password = %s"
     
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            # Verify user exists
-            cur.execute(verify_query, (user_id,))
-            result = cur.fetchone()
-            if not result:
-                raise ProfileError("User not found", "USER_NOT_FOUND")
-            
-            # Verify current password
-            if not verify_password(current_password, result[0]):
+    # Verify user exists
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(verify_query, (user_id,))
+            result = await cur.fetchone()
+    if not result:
+        raise ProfileError("User not found", "USER_NOT_FOUND")
+    current_hash = result[0]
+
+    # Verify current password and hash the new one without holding a connection
+    if not await verify_password_async(current_password, current_hash):
+        raise ProfileError("Current password is incorrect", "INVALID_PASSWORD")
+    hashed_password = await get_password_hash_async(new_password)
+
+    # Update to new password
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(update_query, (hashed_password, user_id, current_hash))
+            if cur.rowcount == 0:
                 raise ProfileError("Current password is incorrect", "INVALID_PASSWORD")
-            
-            # Update to new password
-            hashed_password = get_password_hash(new_password)
-            cur.execute(update_query, (hashed_password, user_id))
-            conn.commit()
+            await conn.commit()
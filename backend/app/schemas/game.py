@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
 from enum import Enum
+from app.core.config import settings
 
 class DifficultyLevel(str, Enum):
     EASY = "EASY"
@@ -8,7 +9,18 @@ class DifficultyLevel(str, Enum):
     HARD = "HARD"
 
 class ImageRecognitionRequest(BaseModel):
-    image: str
+    """The drawing as exactly one of a PNG or its strokes"""
+    # Base64 data URL of a PNG; 4 characters per 3 bytes, plus room for the prefix
+    image: Optional[str] = Field(None, max_length=settings.RECOGNITION_MAX_UPLOAD_BYTES * 4 // 3 + 64)
+    # Base64 of the int16 stroke encoding in app.services.imaging.decode_strokes; at most
+    # 6 bytes a point (a stroke count per point, at worst), so 8 characters
+    strokes: Optional[str] = Field(None, max_length=settings.RECOGNITION_MAX_STROKE_POINTS * 8 + 4)
+
+    @model_validator(mode="after")
+    def one_drawing(self) -> "ImageRecognitionRequest":
+        if (self.image is None) == (self.strokes is None):
+            raise ValueError("Send either image or strokes")
+        return self
 
 class GameScore(BaseModel):
     username: str
@@ -33,3 +45,10 @@ class DrawingAttempt(BaseModel):
     is_correct: bool
     drawing_time_ms: int
     recognition_accuracy: float
+
+# Most attempts accepted in one batch; larger requests are rejected with 422.
+# A game has at most a few dozen, and one INSERT binds 7 parameters per row.
+MAX_ATTEMPTS_PER_BATCH = 250
+
+class DrawingAttemptBatch(BaseModel):
+    attempts: List[DrawingAttempt] = Field(..., min_length=1, max_length=MAX_ATTEMPTS_PER_BATCH)
@@ -1,51 +1,255 @@
-import base64
-import random
-import google.generativeai as genai
+import asyncio
+import binascii
+import io
+import time
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+from app.core.cache import NearDuplicateCache
 from app.core.config import settings
-
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from app.core.exceptions import ImageTooLarge, InvalidImage, RecognitionError, RecognitionOverloaded, RecognitionTimeout
+from app.services.imaging import (
+    HASH_SIZE, PNG_HEADER_BYTES, check_png_header, decode_strokes, drawing_square, square_ahash, square_png, strokes_square
+)
+from app.services.recognizers.base import Guess, Recognizer
+from app.services.recognizers.fake import FakeRecognizer
+from app.services.recognizers.gemini import GeminiRecognizer
+from app.services.recognizers.local import LocalRecognizer
 
 def preprocess_image(image_base64: str) -> bytes:
-    """Preprocess the base64 encoded image for AI recognition"""
-    if "base64," in image_base64:
-        image_base64 = image_base64.split("base64,")[1]
-    return base64.b64decode(image_base64)
+    """Decode a base64 image, with or without its data: URL prefix"""
+    start = image_base64.find("base64,")
+    # One ASCII copy, then decode from a view instead of splitting the string
+    data = memoryview(image_base64.encode("ascii"))
+    return binascii.a2b_base64(data[start + len("base64,"):] if start >= 0 else data)
 
-async def recognize_doodle(image_base64: str) -> dict:
+def normalize_canvas(image: bytes, size: int = settings.RECOGNITION_IMAGE_SIZE) -> Tuple[bytes, int]:
+    """Crop a canvas PNG to its drawing, scale it to size x size grayscale and re-encode it.
+
+    Returns the normalized PNG and its perceptual hash, both from one decode.
+    Recognizers get a small image with no empty border, whatever the canvas
+    size. Canvases that differ only in where the doodle sits or how large the
+    canvas is come out byte-identical.
+    """
+    with Image.open(io.BytesIO(image)) as img:
+        square = drawing_square(img, size)
+    return square_png(square, size), square_ahash(square)
+
+def normalize_strokes(strokes: List[np.ndarray], size: int = settings.RECOGNITION_IMAGE_SIZE) -> Tuple[bytes, int]:
+    """normalize_canvas for a stroke-encoded drawing: draw the strokes straight
+    into the cropped square, with no canvas PNG to decode"""
+    square = strokes_square(strokes, size)
+    return square_png(square, size), square_ahash(square)
+
+RECOGNIZERS = {
+    "gemini": GeminiRecognizer,
+    "local": LocalRecognizer.load,
+    "fake": FakeRecognizer,
+}
+
+def create_recognizer(name: str) -> Recognizer:
     try:
-        base64_image = preprocess_image(image_base64)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content([
-            """
-            IMPORTANT: IF THE IMAGE IS HAS TEXT OR NUMBERS, DO NOT INCLUDE THEM IN THE RESPONSE. ONLY RESPOND WITH THE DRAWING MADE IN THE IMAGE, TEXT DRAW IN THE IMAGE SHOULD NOT BE CONSIDERED.
-
-            IGNORE THE TEXT IN THE IMAGE. DO NOT READ THE TEXT ONLY READ THE DRAWING MADE IN THE IMAGE. 
-            IGNORE WHAT EVER IS WRITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE. 
-
-            JUST RECOGNIZE THE DOODLE
-            Identify the (DOODLE, NOT TEXT) in this doodle in a single word.
-            
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
-
-            IF the image only have text the response should be "BLANK" and a word. 
-            IF the image have any text/letters which is not doodle then the response should be "BLANK" and a word.
-            IF the image only have text the response should be "BLANK" and a word.
-            """,
-            {
-                "mime_type": "image/png",
-                "data": base64_image
-            }
-        ])
+        factory = RECOGNIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognizer {name!r}, expected one of {', '.join(RECOGNIZERS)}")
+    return factory()
+
+class RecognitionEngine:
+    """Runs recognitions on a shared recognizer with a cap on concurrent calls.
+
+    Up to max_concurrency calls run at once and up to max_queue more wait for
+    a slot; anything beyond that is rejected straight away with
+    RecognitionOverloaded instead of piling up. timeout bounds the wait plus
+    the call.
+
+    With max_batch_size above 1, calls that arrive within max_batch_wait of
+    the first one waiting are sent to the recognizer together, as one
+    recognize_batch of up to max_batch_size images, and each caller gets its
+    own result back. max_concurrency then caps batches in flight.
+    """
+
+    def __init__(self, recognizer: Recognizer = None, max_concurrency: int = settings.RECOGNITION_MAX_CONCURRENCY,
+                 max_queue: int = settings.RECOGNITION_MAX_QUEUE, timeout: float = settings.RECOGNITION_TIMEOUT_SECONDS,
+                 max_batch_size: int = settings.RECOGNITION_MAX_BATCH_SIZE,
+                 max_batch_wait: float = settings.RECOGNITION_MAX_BATCH_WAIT_SECONDS):
+        self._recognizer = recognizer
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # Images and their callers' futures, gathering for the next batch
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._flush_timer: asyncio.TimerHandle = None
+        self._batch_tasks = set()
+        # Admitted calls, running or waiting for a slot
+        self.admitted = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.failed = 0
+        # Calls to the recognizer; one per request, or one per batch
+        self.recognizer_calls = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def recognizer(self) -> Recognizer:
+        # Built on first use so importing the app doesn't need model credentials or weights
+        if self._recognizer is None:
+            self._recognizer = create_recognizer(settings.RECOGNITION_BACKEND)
+        return self._recognizer
+
+    def load(self) -> Recognizer:
+        """Build the recognizer now instead of on the first call, so a bad
+        configuration (e.g. missing local weights) fails at startup"""
+        return self.recognizer
+
+    @property
+    def queued(self) -> int:
+        return self.admitted - self.in_flight
+
+    async def recognize(self, image: bytes) -> List[Guess]:
+        if self.admitted >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise RecognitionOverloaded("Recognition is at capacity, try again shortly")
+        self.admitted += 1
+        try:
+            run = self._run(image) if self.max_batch_size <= 1 else self._join_batch(image)
+            return await asyncio.wait_for(run, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise RecognitionTimeout(f"Recognition took longer than {self.timeout:g}s")
+        finally:
+            self.admitted -= 1
+
+    async def _run(self, image: bytes) -> List[Guess]:
+        return (await self._call([image]))[0]
+
+    async def _join_batch(self, image: bytes) -> List[Guess]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((image, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.max_batch_wait, self._flush)
+        # A caller that times out cancels its future, and the batch skips or ignores it
+        return await future
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch = [(image, future) for image, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        try:
+            # No caller is left waiting past the timeout, so don't hold a slot longer either
+            results = await asyncio.wait_for(self._call([image for image, _ in batch]), self.timeout)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _call(self, images: List[bytes]) -> List[List[Guess]]:
+        async with self._slots:
+            self.in_flight += len(images)
+            self.recognizer_calls += 1
+            started = time.perf_counter()
+            try:
+                if len(images) == 1:
+                    results = [await self.recognizer.recognize(images[0])]
+                else:
+                    results = await self.recognizer.recognize_batch(images)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += len(images)
+                raise RecognitionError(f"Failed to recognize doodle: {str(e)}") from e
+            finally:
+                self._busy_seconds += time.perf_counter() - started
+                self.in_flight -= len(images)
+            self.completed += len(images)
+            return results
+
+    def stats(self) -> dict:
         return {
-            "result": response.text.split()[0].strip(".,!?").lower(),
-            "confidence": round(random.uniform(0.6, 1.0), 2)  # Random accuracy between 60% and 100%
+            "recognizer": type(self._recognizer).__name__ if self._recognizer else settings.RECOGNITION_BACKEND,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout_seconds": self.timeout,
+            "max_batch_size": self.max_batch_size,
+            "max_batch_wait_seconds": self.max_batch_wait,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "recognizer_calls": self.recognizer_calls,
+            "avg_batch_size": round((self.completed + self.failed) / self.recognizer_calls, 2) if self.recognizer_calls else 0.0,
+            "avg_call_seconds": round(self._busy_seconds / self.recognizer_calls, 4) if self.recognizer_calls else 0.0,
         }
+
+recognition_engine = RecognitionEngine()
+
+# Average hash of the cropped drawing -> the recognizer's guesses. Canvases posted again while
+# drawing, or redrawn almost the same, skip the recognizer.
+recognition_cache = NearDuplicateCache(
+    "recognition",
+    maxsize=settings.RECOGNITION_CACHE_MAX_ENTRIES,
+    ttl=settings.RECOGNITION_CACHE_TTL_SECONDS,
+    bits=HASH_SIZE * HASH_SIZE,
+    max_distance=settings.RECOGNITION_CACHE_MAX_DISTANCE
+)
+
+async def recognize_image(image: bytes) -> dict:
+    if len(image) > settings.RECOGNITION_MAX_UPLOAD_BYTES:
+        raise ImageTooLarge(f"Image is over {settings.RECOGNITION_MAX_UPLOAD_BYTES} bytes")
+    check_png_header(image[:PNG_HEADER_BYTES], settings.RECOGNITION_MAX_IMAGE_SIDE)
+    try:
+        normalized, key = await asyncio.to_thread(normalize_canvas, image)
     except Exception as e:
-        raise Exception(f"Failed to recognize doodle: {str(e)}")
- 
\ No newline at end of file
+        raise InvalidImage(f"Could not decode image: {str(e)}") from e
+    return await recognize_normalized(normalized, key)
+
+async def recognize_strokes(strokes_base64: str) -> dict:
+    """Recognize a drawing sent as strokes (see app.services.imaging.decode_strokes).
+
+    A few hundred points take a couple of kilobytes, against tens of kilobytes
+    for the canvas PNG, and drawing them is cheaper than decoding that PNG.
+    """
+    try:
+        data = binascii.a2b_base64(strokes_base64.encode("ascii"))
+    except (ValueError, binascii.Error) as e:
+        raise InvalidImage("Strokes are not valid base64") from e
+    strokes = decode_strokes(data, settings.RECOGNITION_MAX_STROKE_POINTS)
+    normalized, key = await asyncio.to_thread(normalize_strokes, strokes)
+    return await recognize_normalized(normalized, key)
+
+async def recognize_normalized(normalized: bytes, key: int) -> dict:
+    """The best guess as result and its probability as confidence, plus the
+    top guesses so a client can tell a confident answer from a coin toss"""
+    guesses = await recognition_cache.get_or_load(key, lambda: recognition_engine.recognize(normalized))
+    return {
+        "result": guesses[0].word,
+        "confidence": round(guesses[0].probability, 2),
+        "guesses": [{"word": guess.word, "probability": round(guess.probability, 4)} for guess in guesses],
+    }
+
+async def recognize_doodle(image_base64: str) -> dict:
+    try:
+        image = preprocess_image(image_base64)
+    except (ValueError, binascii.Error) as e:
+        raise InvalidImage("Image is not valid base64") from e
+    return await recognize_image(image)
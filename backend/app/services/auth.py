@@ -1,8 +1,19 @@
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, Depends
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash, create_access_token, oauth2_scheme
-from app.db.queries.auth_queries import get_user, create_new_user, get_user_by_email, blacklist_token, is_token_blacklisted
+from app.core.security import verify_and_update_password_async, get_password_hash_async, create_access_token, oauth2_scheme, token_digest
+from app.db.queries.auth_queries import get_user, create_new_user, get_user_by_email, revoke_token, update_password_hash
+from app.services.revocation import revocation_list
+
+# Token digest -> verified user, owned by username so logout drops the
+# user's entries and cancels any verification still in flight
+auth_cache = TTLCache(
+    "auth",
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_MAX_TTL_SECONDS
+)
 
 async def authenticate_user(user_data):
     user = await get_user(user_data.username)
@@ -12,11 +23,15 @@ async def authenticate_user(user_data):
             detail="User not found. Please check your username."
         )
     
-    if not verify_password(user_data.password, user["password"]):
+    valid, new_hash = await verify_and_update_password_async(user_data.password, user["password"])
+    if not valid:
         raise HTTPException(
             status_code=401, 
             detail="Incorrect password. Please try again."
         )
+    if new_hash:
+        # Stored with an older bcrypt cost; upgrade now that we have the plaintext
+        await update_password_hash(user["id"], user["password"], new_hash)
     
     access_token = create_access_token(
         data={"sub": user["username"]},
@@ -46,7 +61,7 @@ async def create_user(user_data):
         raise HTTPException(status_code=400, detail="Email is already registered")
     
     # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user_id = await create_new_user({
         **user_data.dict(),
         "password": hashed_password
@@ -84,26 +99,38 @@ async def verify_token(token: str):
     from jose import JWTError, jwt
     
     try:
-        # Check if token is blacklisted
-        if await is_token_blacklisted(token):
-            raise HTTPException(status_code=401, detail="Token has been invalidated")
-            
-        # Decode JWT token (works for both Google and email/password auth)
+        # Decode JWT token (works for both Google and email/password auth).
+        # Done on every call so an expired token is rejected even while cached.
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user = await get_user(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-            
-        return {
-            "id": user["id"],
-            "username": user["username"],
-            "email": user["email"],
-            "name": user["name"]
-        }
+
+        digest = token_digest(token)
+
+        # Check if token has been revoked (logged out). Done before the cache, so a
+        # logout in another worker applies here at its next revocation sync rather
+        # than when the cached entry expires; a filter miss costs no query.
+        if await revocation_list.is_revoked(digest):
+            raise HTTPException(status_code=401, detail="Token has been invalidated")
+
+        async def load_user():
+            user = await get_user(username)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+
+            return {
+                "id": user["id"],
+                "username": user["username"],
+                "email": user["email"],
+                "name": user["name"]
+            }
+
+        ttl = settings.AUTH_CACHE_MAX_TTL_SECONDS
+        if payload.get("exp") is not None:
+            ttl = min(ttl, payload["exp"] - time.time())
+        user = await auth_cache.get_or_load(digest, load_user, owner=username, ttl=ttl)
+        return dict(user)
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -111,8 +138,17 @@ async def invalidate_token(token: str):
     try:
         # First verify the token
         user_data = await verify_token(token)
-        # If verification passes, blacklist the token
-        await blacklist_token(token)
+        # If verification passes, revoke the token until it would have expired anyway
+        from jose import jwt
+        exp = jwt.get_unverified_claims(token).get("exp")
+        expires_at = (
+            datetime.fromtimestamp(exp, tz=timezone.utc) if exp is not None
+            else datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        digest = token_digest(token)
+        await revoke_token(digest, expires_at)
+        revocation_list.add(digest)
+        auth_cache.invalidate(user_data["username"])
         return {"message": "Successfully logged out"}
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
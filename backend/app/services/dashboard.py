@@ -1,4 +1,9 @@
+from app.core.cache import TTLCache
+from app.core.config import settings
+from typing import Iterable
 from app.db.queries.dashboard_queries import (
+    DASHBOARD_PANELS,
+    get_dashboard_panels,
     get_user_overall_stats,
     get_weekly_progress,
     get_difficulty_stats,
@@ -6,23 +11,68 @@ from app.db.queries.dashboard_queries import (
     get_performance_metrics
 )
 
+# Keyed by (panel, user_id, *args) and owned by the user, so a write by one
+# user only drops that user's panels
+dashboard_cache = TTLCache(
+    "dashboard",
+    maxsize=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+
+DASHBOARD_SECTIONS = tuple(DASHBOARD_PANELS)
+
+def _panel_key(section: str, user_id: int, recent_limit: int):
+    return (section, user_id, recent_limit) if section == "recent" else (section, user_id)
+
 class DashboardService:
     @staticmethod
     async def get_user_stats(user_id: int):
-        return await get_user_overall_stats(user_id)
+        return await dashboard_cache.get_or_load(
+            ("overall", user_id), lambda: get_user_overall_stats(user_id), owner=user_id
+        )
     
     @staticmethod
     async def get_weekly_stats(user_id: int):
-        return await get_weekly_progress(user_id)
+        return await dashboard_cache.get_or_load(
+            ("weekly", user_id), lambda: get_weekly_progress(user_id), owner=user_id
+        )
     
     @staticmethod
     async def get_difficulty_stats(user_id: int):
-        return await get_difficulty_stats(user_id)
+        return await dashboard_cache.get_or_load(
+            ("difficulty", user_id), lambda: get_difficulty_stats(user_id), owner=user_id
+        )
     
     @staticmethod
     async def get_recent_activities(user_id: int, limit: int = 10):
-        return await get_recent_activities(user_id, limit)
+        return await dashboard_cache.get_or_load(
+            ("recent", user_id, limit), lambda: get_recent_activities(user_id, limit), owner=user_id
+        )
     
     @staticmethod
     async def get_performance_metrics(user_id: int):
-        return await get_performance_metrics(user_id)
+        return await dashboard_cache.get_or_load(
+            ("performance", user_id), lambda: get_performance_metrics(user_id), owner=user_id
+        )
+
+    @staticmethod
+    async def get_summary(user_id: int, sections: Iterable[str] = DASHBOARD_SECTIONS, recent_limit: int = 10):
+        """Return the requested panels in one payload.
+
+        Cached panels are served from dashboard_cache (the same entries the
+        single-panel endpoints use); the rest are fetched together over one
+        pooled connection.
+        """
+        keys = {section: _panel_key(section, user_id, recent_limit) for section in sections}
+
+        async def load(missing):
+            panels = await get_dashboard_panels(user_id, [key[0] for key in missing], recent_limit)
+            return {key: panels[key[0]] for key in missing}
+
+        values = await dashboard_cache.get_many_or_load(list(keys.values()), load, owner=user_id)
+        return {section: values[key] for section, key in keys.items()}
+
+    @staticmethod
+    def invalidate_user(user_id: int):
+        """Drop cached panels after the user's attempts or sessions change"""
+        dashboard_cache.invalidate(user_id)
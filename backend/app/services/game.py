@@ -1,81 +1,53 @@
 from app.db.queries.game_queries import (
     create_game_session,
     save_drawing_attempt,
-    complete_game_session
+    save_drawing_attempts,
+    complete_game_session,
+    get_leaderboard
 )
-from app.db.connection import get_db_connection
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.dashboard import DashboardService
 from app.schemas.game import DrawingAttempt, GameSession, GameSessionComplete
+from typing import List, Optional
+
+# Rankings depend on every player's totals, so any session or attempt write clears it
+leaderboard_cache = TTLCache(
+    "leaderboard",
+    maxsize=settings.LEADERBOARD_CACHE_MAX_ENTRIES,
+    ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS
+)
+
+def invalidate_user_reads(user_ids):
+    for user_id in set(user_ids):
+        DashboardService.invalidate_user(user_id)
+    leaderboard_cache.clear()
+
+async def fetch_leaderboard(user_id: int = None):
+    return await leaderboard_cache.get_or_load(user_id, lambda: get_leaderboard(user_id))
 
 async def start_game_session(session_data: GameSession) -> int:
-    return await create_game_session(session_data)
+    session_id = await create_game_session(session_data)
+    invalidate_user_reads([session_data.user_id])
+    return session_id
 
-async def end_game_session(session_id: int, session_data: GameSessionComplete) -> int:
+async def end_game_session(session_id: int, session_data: GameSessionComplete) -> Optional[dict]:
     try:
         # Complete the session and update all metrics in one go
-        result = await complete_game_session(session_id, session_data)
-        
-        # Update user metrics after session completion
-        await update_user_metrics_after_session(session_id)
-        
-        return result
+        summary = await complete_game_session(session_id, session_data)
+        if summary:
+            invalidate_user_reads([summary["user_id"]])
+        return summary
     except Exception as e:
         print(f"Error ending game session: {e}")
         raise e
 
 async def record_drawing_attempt(attempt_data: DrawingAttempt) -> int:
-    return await save_drawing_attempt(attempt_data)
+    attempt_id = await save_drawing_attempt(attempt_data)
+    invalidate_user_reads([attempt_data.user_id])
+    return attempt_id
 
-async def update_user_metrics_after_session(session_id: int):
-    """Update user metrics based on session performance"""
-    query = """
-        WITH streak_calc AS (
-            SELECT 
-                is_correct,
-                session_id,
-                COUNT(*) FILTER (WHERE NOT is_correct) OVER (ORDER BY created_at) as grp
-            FROM drawing_attempts 
-            WHERE session_id = %s
-        ),
-        session_stats AS (
-            SELECT 
-                user_id,
-                COUNT(*) as total_attempts,
-                SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as successful_attempts,
-                MIN(CASE WHEN is_correct THEN drawing_time_ms ELSE NULL END) as fastest_correct,
-                AVG(drawing_time_ms) as avg_time,
-                (
-                    SELECT MAX(streak_length)
-                    FROM (
-                        SELECT COUNT(*) as streak_length
-                        FROM streak_calc
-                        WHERE is_correct = true
-                        GROUP BY grp
-                    ) s
-                ) as max_streak
-            FROM drawing_attempts
-            WHERE session_id = %s
-            GROUP BY user_id
-        )
-        UPDATE user_metrics um
-        SET 
-            total_attempts = um.total_attempts + s.total_attempts,
-            successful_attempts = um.successful_attempts + s.successful_attempts,
-            fastest_correct_ms = LEAST(COALESCE(um.fastest_correct_ms, s.fastest_correct), s.fastest_correct),
-            highest_streak = GREATEST(COALESCE(um.highest_streak, 0), s.max_streak),
-            avg_drawing_time_ms = (
-                (COALESCE(um.avg_drawing_time_ms, 0) * COALESCE(um.total_attempts, 0) + 
-                 s.avg_time * s.total_attempts) / 
-                NULLIF(COALESCE(um.total_attempts, 0) + s.total_attempts, 0)
-            )
-        FROM session_stats s
-        WHERE um.user_id = s.user_id
-    """
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Pass session_id twice for both subqueries
-                cur.execute(query, (session_id, session_id))
-                conn.commit()
-    except Exception as e:
-        print(f"Error updating user metrics: {e}")
-        raise
+async def record_drawing_attempts(attempts: List[DrawingAttempt]) -> List[int]:
+    attempt_ids = await save_drawing_attempts(attempts)
+    invalidate_user_reads(attempt.user_id for attempt in attempts)
+    return attempt_ids
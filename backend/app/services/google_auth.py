@@ -1,52 +1,65 @@
-from google.oauth2 import id_token
-from google.auth.transport import requests
-import requests as http_requests
+import httpx
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.security import create_access_token
-from app.db.queries.auth_queries import get_user_by_email, create_new_user, get_user
+from app.core.http import get_http_client
+from app.core.security import create_access_token, token_digest
+from app.db.queries.auth_queries import get_user_by_email, create_oauth_user
 from datetime import timedelta
 import uuid
 
-async def verify_google_token(token: str):
+# Access token digest -> Google userinfo, so retried or repeated sign-ins
+# with the same token skip the round trip to Google
+userinfo_cache = TTLCache(
+    "google_userinfo",
+    maxsize=settings.GOOGLE_USERINFO_CACHE_MAX_ENTRIES,
+    ttl=settings.GOOGLE_USERINFO_CACHE_TTL_SECONDS
+)
+
+# A lost race for a username or email is retried this many times
+CREATE_USER_ATTEMPTS = 3
+
+async def fetch_google_userinfo(token: str):
     try:
         # Use access token to get user info from Google
-        response = http_requests.get(
-            'https://www.googleapis.com/oauth2/v3/userinfo',
+        response = await get_http_client().get(
+            settings.GOOGLE_USERINFO_URL,
             headers={'Authorization': f'Bearer {token}'}
         )
-        if response.status_code != 200:
-            raise ValueError('Invalid token')
-        return response.json()
-    except Exception as e:
-        raise ValueError("Invalid token") from e
+    except httpx.HTTPError as e:
+        raise ValueError("Could not reach Google") from e
+    if response.status_code != 200:
+        raise ValueError('Invalid token')
+    user_info = response.json()
+    if not user_info.get('email'):
+        raise ValueError('Invalid token')
+    return user_info
+
+async def verify_google_token(token: str):
+    # Failures raise and are never cached
+    return await userinfo_cache.get_or_load(token_digest(token), lambda: fetch_google_userinfo(token))
+
+async def get_or_create_google_user(user_info: dict):
+    email = user_info['email']
+    for _ in range(CREATE_USER_ATTEMPTS):
+        user = await get_user_by_email(email)
+        if user:
+            return user
+        # Generate a username from email; random password (they'll login via Google)
+        user = await create_oauth_user(
+            base_username=email.split('@')[0],
+            email=email,
+            name=user_info.get('name'),
+            password=uuid.uuid4().hex
+        )
+        if user:
+            return user
+    raise ValueError("Could not allocate a username")
 
 async def handle_google_auth(google_token: str):
     try:
         # Get user info from Google
         user_info = await verify_google_token(google_token)
-        
-        # Check if user exists
-        user = await get_user_by_email(user_info['email'])
-        
-        if not user:
-            # Generate a unique username from email
-            base_username = user_info['email'].split('@')[0]
-            username = base_username
-            
-            # Keep trying with a random suffix until we find a unique username
-            while await get_user(username):
-                username = f"{base_username}_{uuid.uuid4().hex[:6]}"
-            
-            # Create new user with a random password (they'll login via Google)
-            user_data = {
-                "username": username,
-                "email": user_info['email'],
-                "name": user_info.get('name', username),
-                "password": uuid.uuid4().hex  # Random password for Google users
-            }
-            
-            user_id = await create_new_user(user_data)
-            user = await get_user_by_email(user_info['email'])
+        user = await get_or_create_google_user(user_info)
         
         # Generate our JWT token
         access_token = create_access_token(
@@ -65,4 +78,4 @@ async def handle_google_auth(google_token: str):
             }
         }
     except Exception as e:
-        raise ValueError(f"Google authentication failed: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Google authentication failed: {str(e)}")
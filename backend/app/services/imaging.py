@@ -0,0 +1,172 @@
+import io
+import struct
+from typing import AsyncIterator, List
+import numpy as np
+from PIL import Image, ImageDraw
+from app.core.exceptions import ImageTooLarge, InvalidImage
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Signature, then the IHDR chunk's length, type, width and height
+PNG_HEADER_BYTES = 24
+# Grayscale ink level (0-255) that counts as part of the drawing when cropping
+INK_THRESHOLD = 32
+# Empty border kept around the drawing, as a fraction of its longer side
+MARGIN = 0.08
+# Perceptual hash grid: HASH_SIZE x HASH_SIZE cells, one bit each
+HASH_SIZE = 16
+# Pen width of the game canvas, in canvas pixels; stroke-encoded drawings are drawn with it
+LINE_WIDTH = 3
+
+def ink_array(img: Image.Image) -> np.ndarray:
+    """Ink per pixel as uint8, 0 for background; transparent pixels are background"""
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        gray, alpha = np.moveaxis(np.asarray(img.convert("LA"), dtype=np.uint16), -1, 0)
+        return ((255 - gray) * alpha // 255).astype(np.uint8)
+    return 255 - np.asarray(img.convert("L"), dtype=np.uint8)
+
+def max_pool(ink: np.ndarray, target: int) -> np.ndarray:
+    """Max-pool ink down to about 2 * target pixels across, so that 3 px
+    strokes survive a later downscale to target instead of averaging away"""
+    factor = max(1, max(ink.shape) // (target * 2))
+    if factor == 1:
+        return ink
+    height = -(-ink.shape[0] // factor) * factor
+    width = -(-ink.shape[1] // factor) * factor
+    padded = np.zeros((height, width), dtype=np.uint8)
+    padded[:ink.shape[0], :ink.shape[1]] = ink
+    return padded.reshape(height // factor, factor, width // factor, factor).max(axis=(1, 3))
+
+def drawing_square(img: Image.Image, target: int) -> np.ndarray:
+    """The drawing cropped to its ink, max-pooled for target and centered on
+    a square with a margin.
+
+    Translation and overall scale drop out, which is what recognition and
+    near-duplicate matching both want. A blank canvas gives an empty array.
+    """
+    ink = ink_array(img)
+    rows = np.flatnonzero((ink > INK_THRESHOLD).any(axis=1))
+    cols = np.flatnonzero((ink > INK_THRESHOLD).any(axis=0))
+    if rows.size == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+    ink = max_pool(ink[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], target)
+
+    side = int(max(ink.shape) * (1 + 2 * MARGIN)) + 1
+    square = np.zeros((side, side), dtype=np.uint8)
+    top = (side - ink.shape[0]) // 2
+    left = (side - ink.shape[1]) // 2
+    square[top:top + ink.shape[0], left:left + ink.shape[1]] = ink
+    return square
+
+def decode_strokes(data: bytes, max_points: int) -> List[np.ndarray]:
+    """Unpack the compact stroke encoding into one (n, 2) int32 array per stroke.
+
+    The encoding is little-endian int16 throughout. Each stroke is its point
+    count n, then n (x, y) pairs: the first is where the stroke starts, in
+    canvas pixels, and every later pair is the step from the point before.
+    """
+    if len(data) % 2:
+        raise InvalidImage("Stroke data is not a whole number of int16 values")
+    values = np.frombuffer(data, dtype="<i2")
+    # A stroke takes at least 3 values (its count and one point), so this bounds the loop below
+    if values.size > max_points * 3:
+        raise ImageTooLarge(f"Drawing has over {max_points} points")
+    strokes = []
+    points = 0
+    start = 0
+    while start < values.size:
+        count = int(values[start])
+        end = start + 1 + 2 * count
+        if count <= 0 or end > values.size:
+            raise InvalidImage("Malformed stroke data")
+        points += count
+        if points > max_points:
+            raise ImageTooLarge(f"Drawing has over {max_points} points")
+        strokes.append(np.cumsum(values[start + 1:end].reshape(count, 2), axis=0, dtype=np.int32))
+        start = end
+    if not strokes:
+        raise InvalidImage("Empty drawing")
+    return strokes
+
+def strokes_square(strokes: List[np.ndarray], target: int, line_width: int = LINE_WIDTH) -> np.ndarray:
+    """The same square drawing_square makes from a canvas, drawn straight from strokes.
+
+    Strokes are scaled to at most 2 * target pixels across before drawing, so
+    the cost depends on target and the number of points, not on the canvas.
+    """
+    points = np.concatenate(strokes)
+    low = points.min(axis=0)
+    # The ink box: the points' span plus the pen width, as a canvas crop would see it
+    box = points.max(axis=0) - low + line_width
+    scale = min(1.0, target * 2 / box.max())
+    box = box * scale
+    width = max(1, round(line_width * scale))
+
+    side = int(box.max() * (1 + 2 * MARGIN)) + 1
+    origin = (side - box) / 2 + line_width * scale / 2
+    img = Image.new("L", (side, side))
+    draw = ImageDraw.Draw(img)
+    for stroke in strokes:
+        xy = ((stroke - low) * scale + origin).ravel().tolist()
+        if len(xy) == 2:
+            x, y = xy
+            draw.ellipse((x - width / 2, y - width / 2, x + width / 2, y + width / 2), fill=255)
+        else:
+            draw.line(xy, fill=255, width=width, joint="curve")
+    return np.asarray(img)
+
+def resize_square(square: np.ndarray, width: int, height: int) -> np.ndarray:
+    if square.size == 0:
+        return np.zeros((height, width), dtype=np.float32)
+    return np.asarray(Image.fromarray(square).resize((width, height), Image.BOX), dtype=np.float32)
+
+def square_ahash(square: np.ndarray, size: int = HASH_SIZE) -> int:
+    """Average hash of a drawing square: size*size bits, set for cells with
+    more ink than the mean. Reposting or redrawing nearly the same doodle
+    flips only a few bits.
+    """
+    cells = resize_square(max_pool(square, size), size, size)
+    bits = (cells > cells.mean()).ravel()
+    # Fixed shuffle of the bit positions. Near-duplicate lookups index runs of
+    # adjacent bits; unshuffled, a run is a strip of the grid, and the empty
+    # strips along the margins would match for almost every drawing.
+    bits = bits[np.random.default_rng(0).permutation(bits.size)]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def square_png(square: np.ndarray, size: int) -> bytes:
+    """A drawing square as a size x size grayscale PNG, black ink on white"""
+    ink = resize_square(square, size, size)
+    buffer = io.BytesIO()
+    Image.fromarray((255 - ink).astype(np.uint8), "L").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def check_png_header(header: bytes, max_side: int):
+    """Reject anything but a PNG of at most max_side pixels a side, from its first 24 bytes"""
+    if len(header) < PNG_HEADER_BYTES or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise InvalidImage("Expected a PNG image")
+    width, height = struct.unpack(">II", header[16:PNG_HEADER_BYTES])
+    if not width or not height:
+        raise InvalidImage("Empty image")
+    if width > max_side or height > max_side:
+        raise ImageTooLarge(f"Image is {width}x{height}, the limit is {max_side}x{max_side}")
+
+async def read_png_stream(chunks: AsyncIterator[bytes], max_bytes: int, max_side: int) -> bytes:
+    """Collect a streamed PNG body, failing as soon as it breaks a limit.
+
+    The header is checked once its first 24 bytes have arrived, so an
+    oversized or non-PNG upload is refused before the rest of it is read.
+    The chunks are joined once at the end.
+    """
+    parts = []
+    size = 0
+    checked = False
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise ImageTooLarge(f"Image is over {max_bytes} bytes")
+        parts.append(chunk)
+        if not checked and size >= PNG_HEADER_BYTES:
+            check_png_header(b"".join(parts)[:PNG_HEADER_BYTES], max_side)
+            checked = True
+    if not checked:
+        raise InvalidImage("Expected a PNG image")
+    return b"".join(parts)
@@ -0,0 +1,24 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple
+
+class Guess(NamedTuple):
+    word: str
+    # The recognizer's estimate that word is right, in [0, 1]
+    probability: float
+
+class Recognizer(ABC):
+    """Guesses the word a doodle shows from its PNG bytes.
+
+    One instance serves the whole process, so implementations hold their
+    clients or weights and must be safe to call concurrently.
+    """
+
+    @abstractmethod
+    async def recognize(self, image: bytes) -> List[Guess]:
+        """At least one guess, most likely first, words lowercase"""
+
+    async def recognize_batch(self, images: List[bytes]) -> List[List[Guess]]:
+        """Guesses for several doodles, in order. Recognizers that can run a
+        batch as one model call override this; by default it's one call each."""
+        return list(await asyncio.gather(*(self.recognize(image) for image in images)))
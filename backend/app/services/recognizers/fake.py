@@ -0,0 +1,24 @@
+import asyncio
+import random
+from typing import List
+from app.core.config import settings
+from app.services.recognizers.base import Guess, Recognizer
+
+class FakeRecognizer(Recognizer):
+    """Answers a fixed word after a simulated model round-trip, for load tests"""
+
+    def __init__(self, latency: float = settings.RECOGNITION_FAKE_LATENCY_SECONDS, jitter: float = 0.2, word: str = "cat",
+                 probability: float = 0.9):
+        self.latency = latency
+        self.jitter = jitter
+        self.word = word
+        self.probability = probability
+
+    async def recognize(self, image: bytes) -> List[Guess]:
+        await asyncio.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+        return [Guess(self.word, self.probability)]
+
+    async def recognize_batch(self, images: List[bytes]) -> List[List[Guess]]:
+        # Like a batched model call: one round-trip for the whole batch
+        guesses = await self.recognize(images[0])
+        return [guesses] * len(images)
@@ -0,0 +1,77 @@
+import json
+import re
+from typing import List
+from app.core.config import settings
+from app.services.recognizers.base import Guess, Recognizer
+
+RECOGNITION_PROMPT = """
+            IMPORTANT: IF THE IMAGE IS HAS TEXT OR NUMBERS, DO NOT INCLUDE THEM IN THE RESPONSE. ONLY RESPOND WITH THE DRAWING MADE IN THE IMAGE, TEXT DRAW IN THE IMAGE SHOULD NOT BE CONSIDERED.
+
+            IGNORE THE TEXT IN THE IMAGE. DO NOT READ THE TEXT ONLY READ THE DRAWING MADE IN THE IMAGE. 
+            IGNORE WHAT EVER IS WRITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE. 
+
+            JUST RECOGNIZE THE DOODLE
+            Identify the (DOODLE, NOT TEXT) in this doodle in a single word.
+            
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+            DO NOT RESPOND WITH THE TEXT WITTEN IN THE IMAGE.
+
+            IF the image only have text the response should be "BLANK" and a word. 
+            IF the image have any text/letters which is not doodle then the response should be "BLANK" and a word.
+            IF the image only have text the response should be "BLANK" and a word.
+            """
+
+# Appended to the prompt; {top_k} is the number of guesses wanted
+RESPONSE_FORMAT = """
+            Respond with JSON only, no other text: a list of your {top_k} best guesses, most likely first,
+            like [{{"word": "cat", "probability": 0.7}}, {{"word": "dog", "probability": 0.2}}].
+            Each word is a single lowercase word. Each probability is how likely that guess is to be
+            right, and together they add up to at most 1.
+            """
+
+def parse_guesses(text: str, top_k: int) -> List[Guess]:
+    """Guesses from the model's JSON answer.
+
+    The probabilities are the model's own estimate. They are clipped to [0, 1]
+    and scaled down if they add up to more than 1. An answer that isn't the
+    JSON asked for falls back to its first word with probability 0.
+    """
+    try:
+        answer = json.loads(re.sub(r"^```(?:json)?|```$", "", text.strip()).strip())
+        guesses = [
+            Guess(str(item["word"]).split()[0].strip(".,!?").lower(), min(1.0, max(0.0, float(item["probability"]))))
+            for item in answer
+        ]
+    except (ValueError, TypeError, KeyError, IndexError):
+        return [Guess(text.split()[0].strip(".,!?").lower() if text.split() else "", 0.0)]
+    if not guesses:
+        return [Guess("", 0.0)]
+    total = sum(guess.probability for guess in guesses)
+    if total > 1:
+        guesses = [Guess(guess.word, guess.probability / total) for guess in guesses]
+    return sorted(guesses, key=lambda guess: guess.probability, reverse=True)[:top_k]
+
+class GeminiRecognizer(Recognizer):
+    """Gemini with one model object for the process, called through its async API"""
+
+    def __init__(self, model_name: str = settings.GEMINI_MODEL, top_k: int = settings.RECOGNITION_TOP_K):
+        # Configured here rather than at import, so other recognizers don't need a key
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model_name)
+        self.top_k = top_k
+
+    async def recognize(self, image: bytes) -> List[Guess]:
+        response = await self.model.generate_content_async([
+            RECOGNITION_PROMPT + RESPONSE_FORMAT.format(top_k=self.top_k),
+            {
+                "mime_type": "image/png",
+                "data": image
+            }
+        ])
+        return parse_guesses(response.text, self.top_k)
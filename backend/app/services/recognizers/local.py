@@ -0,0 +1,112 @@
+import asyncio
+import io
+import logging
+from typing import List
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.services.imaging import drawing_square, resize_square
+from app.services.recognizers.base import Guess, Recognizer
+
+logger = logging.getLogger(__name__)
+
+# Quick, Draw! numpy bitmaps: the drawing scaled into 28x28, white ink on black
+BITMAP_SIZE = 28
+
+def image_to_bitmap(img: Image.Image, size: int = BITMAP_SIZE) -> np.ndarray:
+    """Crop a canvas image to its drawing and reduce it to a flat size*size ink bitmap in [0, 1]"""
+    return normalize_bitmaps(resize_square(drawing_square(img, size), size, size).ravel())
+
+def to_bitmap(image: bytes, size: int = BITMAP_SIZE) -> np.ndarray:
+    with Image.open(io.BytesIO(image)) as img:
+        return image_to_bitmap(img, size)
+
+def normalize_bitmaps(bitmaps: np.ndarray) -> np.ndarray:
+    """Scale each bitmap so its strongest ink is 1; the training data goes through this too"""
+    bitmaps = np.asarray(bitmaps, dtype=np.float32)
+    peak = bitmaps.max(axis=-1, keepdims=True)
+    return np.divide(bitmaps, peak, out=np.zeros_like(bitmaps), where=peak > 0)
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=-1, keepdims=True)
+    return logits
+
+def top_guesses(probabilities: np.ndarray, labels: list, k: int) -> List[Guess]:
+    best = np.argsort(probabilities)[::-1][:k]
+    return [Guess(labels[i], float(probabilities[i])) for i in best]
+
+class LocalRecognizer(Recognizer):
+    """Softmax regression over 28x28 bitmaps, on the CPU with numpy.
+
+    The weights come from scripts/train_local_recognizer.py. A guess costs a
+    PNG decode and one small matrix product, so it runs in milliseconds with
+    no network.
+
+    Logits are divided by temperature before the softmax. The trainer fits it
+    on held-out drawings so that the probabilities are calibrated: of the
+    guesses made with probability 0.8, about 80% are right.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: list, temperature: float = 1.0,
+                 top_k: int = settings.RECOGNITION_TOP_K):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.temperature = float(temperature)
+        self.top_k = top_k
+        if self.weights.shape != (BITMAP_SIZE * BITMAP_SIZE, len(self.labels)) or self.bias.shape != (len(self.labels),):
+            raise ValueError(f"Weights of shape {self.weights.shape} don't match {len(self.labels)} labels")
+
+    @classmethod
+    def load(cls, path: str = None) -> "LocalRecognizer":
+        """Load weights written by scripts/train_local_recognizer.py (none are committed).
+
+        Vocabulary words the weights have no class for are logged: the
+        recognizer can never guess them.
+        """
+        path = path or settings.LOCAL_RECOGNIZER_WEIGHTS
+        try:
+            with np.load(path) as data:
+                # Weights trained before calibration have no temperature
+                temperature = float(data["temperature"]) if "temperature" in data.files else 1.0
+                recognizer = cls(data["weights"], data["bias"], [str(label) for label in data["labels"]], temperature)
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"No local recognizer weights at {path}. Train them with "
+                f"`python scripts/train_local_recognizer.py --data-dir <Quick, Draw! bitmaps> --out {path}`, "
+                f"point LOCAL_RECOGNIZER_WEIGHTS at existing weights, or choose another RECOGNITION_BACKEND"
+            ) from None
+        if recognizer.missing_words:
+            logger.warning(
+                f"Local recognizer weights at {path} have no class for {len(recognizer.missing_words)} "
+                f"vocabulary word(s), which it can never guess: {', '.join(recognizer.missing_words)}"
+            )
+        return recognizer
+
+    @property
+    def missing_words(self) -> List[str]:
+        """Vocabulary words outside the label set"""
+        labels = set(self.labels)
+        return [word for word in VOCABULARY if word not in labels]
+
+    def predict(self, bitmaps: np.ndarray) -> np.ndarray:
+        """Class probabilities for a (n, 784) batch of bitmaps"""
+        return softmax((bitmaps @ self.weights + self.bias) / self.temperature)
+
+    def classify(self, image: bytes) -> List[Guess]:
+        return top_guesses(self.predict(to_bitmap(image)[None, :])[0], self.labels, self.top_k)
+
+    def classify_batch(self, images: List[bytes]) -> List[List[Guess]]:
+        probabilities = self.predict(np.stack([to_bitmap(image) for image in images]))
+        return [top_guesses(row, self.labels, self.top_k) for row in probabilities]
+
+    async def recognize(self, image: bytes) -> List[Guess]:
+        # PNG decoding and numpy release the GIL, so a thread keeps the loop free
+        return await asyncio.to_thread(self.classify, image)
+
+    async def recognize_batch(self, images: List[bytes]) -> List[List[Guess]]:
+        # One thread hop and one matrix product for the batch
+        return await asyncio.to_thread(self.classify_batch, images)
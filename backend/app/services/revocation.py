@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.db.queries.auth_queries import (
+    count_revoked_tokens,
+    is_token_revoked,
+    iter_revoked_tokens,
+    prune_revoked_tokens
+)
+
+logger = logging.getLogger(__name__)
+
+# Revocations can commit slightly after their revoked_at timestamp; re-read
+# this much history on every sync so none are skipped (adding twice is harmless)
+SYNC_OVERLAP = timedelta(seconds=30)
+
+class TokenRevocationList:
+    """Bloom filter of revoked token hashes in front of the revoked_tokens table.
+
+    A token that isn't in the filter is known not to be revoked, which is the
+    answer for almost every request, so it costs no query. A filter hit is
+    confirmed against revoked_tokens (the exact set). Until the filter has
+    been loaded every lookup goes to the database.
+
+    Revocations made in this worker are added immediately; other workers'
+    are picked up by sync(). Bloom filters can't drop items, so prune()
+    deletes expired rows and rebuilds the filter from what's left.
+    """
+
+    def __init__(self):
+        self._bloom: Optional[BloomFilter] = None
+        self._pending: Optional[list] = None  # revocations made while a rebuild is streaming
+        self._watermark = None
+        self.lookups = 0
+        self.db_checks = 0
+        self.revoked_hits = 0
+        self.rebuilds = 0
+        self.last_rebuild_seconds = 0.0
+        self.pruned = 0
+
+    async def is_revoked(self, token_hash: bytes) -> bool:
+        self.lookups += 1
+        bloom = self._bloom
+        if bloom is not None and token_hash not in bloom:
+            return False
+        self.db_checks += 1
+        revoked = await is_token_revoked(token_hash)
+        self.revoked_hits += revoked
+        return revoked
+
+    def add(self, token_hash: bytes):
+        """Record a revocation made by this worker (after it is stored)"""
+        if self._pending is not None:
+            self._pending.append(token_hash)
+        if self._bloom is not None:
+            self._bloom.add(token_hash)
+
+    async def rebuild(self):
+        started = time.perf_counter()
+        self._pending = []
+        try:
+            count = await count_revoked_tokens()
+            bloom = BloomFilter(
+                max(settings.REVOCATION_BLOOM_CAPACITY, 2 * count),
+                settings.REVOCATION_BLOOM_ERROR_RATE
+            )
+            watermark = None
+            async for token_hash, revoked_at in iter_revoked_tokens():
+                bloom.add(token_hash)
+                watermark = revoked_at if watermark is None else max(watermark, revoked_at)
+            for token_hash in self._pending:
+                bloom.add(token_hash)
+        finally:
+            self._pending = None
+        self._bloom = bloom
+        self._watermark = watermark
+        self.rebuilds += 1
+        self.last_rebuild_seconds = time.perf_counter() - started
+
+    async def sync(self):
+        """Add revocations stored by other workers since the last load"""
+        if self._bloom is None:
+            return await self.rebuild()
+        since = self._watermark - SYNC_OVERLAP if self._watermark is not None else None
+        async for token_hash, revoked_at in iter_revoked_tokens(since):
+            self._bloom.add(token_hash)
+            self._watermark = revoked_at if self._watermark is None else max(self._watermark, revoked_at)
+        if self._bloom.count > self._bloom.capacity:
+            # Past capacity the false-positive rate climbs; resize
+            await self.rebuild()
+
+    async def prune(self):
+        self.pruned += await prune_revoked_tokens()
+        await self.rebuild()
+
+    async def run(self):
+        """Background loop: load, then sync and prune on their intervals"""
+        last_prune = time.monotonic()
+        while True:
+            try:
+                if time.monotonic() - last_prune >= settings.REVOCATION_PRUNE_SECONDS:
+                    await self.prune()
+                    last_prune = time.monotonic()
+                else:
+                    await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Token revocation sync failed")
+            await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "loaded": bloom is not None,
+            "revoked_tokens": bloom.count if bloom else None,
+            "bloom_capacity": bloom.capacity if bloom else None,
+            "bloom_bytes": bloom.size_bytes if bloom else 0,
+            "bloom_hashes": bloom.num_hashes if bloom else None,
+            "lookups": self.lookups,
+            "db_checks": self.db_checks,
+            "revoked_hits": self.revoked_hits,
+            "filtered_rate": round(1 - self.db_checks / self.lookups, 4) if self.lookups else 0.0,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_seconds": round(self.last_rebuild_seconds, 3),
+            "pruned": self.pruned,
+        }
+
+revocation_list = TokenRevocationList()
@@ -10,22 +10,38 @@ script_dir = Path(__file__).resolve().parent
 # This ensures Python looks here first for the 'app' directory
 sys.path.insert(0, str(script_dir))
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, game, users, dashboard, profile
+from app.api import auth, game, users, dashboard, profile, metrics
 from app.core.config import settings
+from app.core.http import close_http_client
+from app.core.security import shutdown_password_executor
 from app.db.connection import init_connection_pool, close_all_connections
+from app.services.ai import recognition_engine
+from app.services.revocation import revocation_list
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    init_connection_pool()
+    # Fails here, not on every recognition, when RECOGNITION_BACKEND can't be set up
+    recognition_engine.load()
+    await init_connection_pool()
+    # Loads the revoked-token filter, then keeps it synced and pruned
+    revocation_task = asyncio.create_task(revocation_list.run())
     yield
     # Shutdown
-    close_all_connections()
+    revocation_task.cancel()
+    try:
+        await revocation_task
+    except asyncio.CancelledError:
+        pass
+    await close_all_connections()
+    await close_http_client()
+    shutdown_password_executor()
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
@@ -44,6 +60,7 @@ app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(game.router, prefix="/api/game", tags=["Game"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 if __name__ == "__main__":
     import uvicorn
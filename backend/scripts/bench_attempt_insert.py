@@ -0,0 +1,84 @@
+"""
+Attempt insert latency as a session grows.
+
+Creates a throwaway user and session, inserts attempts one statement at a
+time (the /api/game/attempt path) and reports insert latency around each
+checkpoint. With the incremental metrics trigger the latency stays flat;
+the old trigger re-scanned the whole session on every insert and grew
+linearly. Run it before and after applying sql/migrations to compare.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_attempt_insert.py --checkpoints 10 100 1000 5000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.db.connection import get_sync_db_connection
+
+INSERT_ATTEMPT = """
+    INSERT INTO drawing_attempts
+    (session_id, user_id, word_prompt, difficulty, is_correct, drawing_time_ms, recognition_accuracy)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--window", type=int, default=50, help="inserts timed at each checkpoint")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+
+    with get_sync_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (username, password, email, name) VALUES (%s, 'x', %s, %s) RETURNING id",
+                (name, f"{name}@bench.local", name)
+            )
+            user_id = cur.fetchone()[0]
+            cur.execute("INSERT INTO game_sessions (user_id) VALUES (%s) RETURNING id", (user_id,))
+            session_id = cur.fetchone()[0]
+            conn.commit()
+
+            try:
+                length = 0
+                print(f"{'session length':>15} {'p50 ms':>10} {'p95 ms':>10}")
+                for checkpoint in sorted(args.checkpoints):
+                    samples = []
+                    while length < checkpoint + args.window:
+                        values = (
+                            session_id, user_id, "cat",
+                            rng.choice(["EASY", "MEDIUM", "HARD"]),
+                            rng.random() < 0.8,
+                            rng.randint(1500, 4000),
+                            rng.uniform(0.6, 1.0)
+                        )
+                        started = time.perf_counter()
+                        cur.execute(INSERT_ATTEMPT, values)
+                        conn.commit()
+                        elapsed = time.perf_counter() - started
+                        length += 1
+                        if length > checkpoint:
+                            samples.append(elapsed * 1000)
+                    samples.sort()
+                    print(
+                        f"{checkpoint:>15} {statistics.median(samples):>10.3f} "
+                        f"{samples[int(len(samples) * 0.95) - 1]:>10.3f}"
+                    )
+            finally:
+                # Cascades to the session, attempts and metrics rows
+                cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                conn.commit()
+
+
+if __name__ == "__main__":
+    main()
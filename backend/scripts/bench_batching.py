@@ -0,0 +1,114 @@
+"""
+Throughput against tail latency of app.services.ai.RecognitionEngine with
+and without micro-batching.
+
+--clients players each post a drawing, wait for the answer and post again,
+for --duration seconds. Each run uses one --batch-size and --batch-wait
+(batch size 1 is the unbatched engine). The drawings are synthetic doodles
+from scripts/synthetic_doodles.py, already normalized the way
+recognize_image hands them to the engine. The recognizer is:
+
+local  - LocalRecognizer, on the weights at LOCAL_RECOGNIZER_WEIGHTS or on
+         random weights of the same shape, which cost the same
+fake   - FakeRecognizer with --latency per call, and per batch when batched,
+         like a remote model with a batch endpoint
+
+The script reports requests/s, p50 and p99 latency, and the mean number of
+requests per recognizer call.
+
+Usage:
+    python scripts/bench_batching.py
+    python scripts/bench_batching.py --recognizer fake --latency 0.05 --clients 16 64 256
+    python scripts/bench_batching.py --batch-size 1 8 32 --batch-wait 0.002 0.01 --duration 5
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.services.ai import RecognitionEngine, normalize_canvas
+from app.services.recognizers.fake import FakeRecognizer
+from app.services.recognizers.local import BITMAP_SIZE, LocalRecognizer
+from synthetic_doodles import label_template, png_bytes, render, sample_strokes
+
+
+def make_recognizer(name, latency):
+    if name == "fake":
+        return FakeRecognizer(latency=latency, jitter=0.1)
+    if os.path.exists(settings.LOCAL_RECOGNIZER_WEIGHTS):
+        return LocalRecognizer.load()
+    rng = np.random.default_rng(0)
+    return LocalRecognizer(
+        rng.normal(0, 0.01, size=(BITMAP_SIZE * BITMAP_SIZE, len(VOCABULARY))),
+        np.zeros(len(VOCABULARY)),
+        VOCABULARY
+    )
+
+
+def drawings(count, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        normalize_canvas(png_bytes(render(sample_strokes(label_template(VOCABULARY[i % len(VOCABULARY)]), rng))))[0]
+        for i in range(count)
+    ]
+
+
+async def run(engine, images, clients, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def player(offset):
+        for image in itertools.islice(itertools.cycle(images), offset, None):
+            if time.perf_counter() >= deadline:
+                return
+            started = time.perf_counter()
+            await engine.recognize(image)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(player(i) for i in range(clients)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recognizer", choices=["local", "fake"], default="local")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake recognizer seconds per call")
+    parser.add_argument("--clients", type=int, nargs="+", default=[4, 32, 128])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-wait", type=float, nargs="+", default=[0.002, 0.01])
+    parser.add_argument("--max-concurrency", type=int, default=settings.RECOGNITION_MAX_CONCURRENCY)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--drawings", type=int, default=100)
+    args = parser.parse_args()
+
+    images = drawings(args.drawings, 0)
+    recognizer = make_recognizer(args.recognizer, args.latency)
+    configs = [(1, 0.0)] + [(size, wait) for size in args.batch_size if size > 1 for wait in args.batch_wait]
+    print(f"{type(recognizer).__name__}, max concurrency {args.max_concurrency}")
+    print(f"{'clients':>7} {'batch':>5} {'wait ms':>7} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'per call':>8}")
+    for clients in args.clients:
+        for size, wait in configs:
+            engine = RecognitionEngine(
+                recognizer, max_concurrency=args.max_concurrency, max_queue=clients, timeout=60,
+                max_batch_size=size, max_batch_wait=wait
+            )
+            latencies, elapsed = asyncio.run(run(engine, images, clients, args.duration))
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            stats = engine.stats()
+            print(
+                f"{clients:>7} {size:>5} {wait * 1000:>7.0f} {len(latencies) / elapsed:>8.0f} "
+                f"{p50:>7.1f} {p99:>7.1f} {stats['avg_batch_size']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Load benchmark for the database layer.
+
+Simulates many concurrent clients inside one event loop, the way uvicorn
+serves them, and compares:
+
+  blocking - the old code path: psycopg calls made synchronously from a
+             coroutine, which stalls the loop for every round-trip
+  async    - the pooled async layer in app.db.connection
+
+A small share of the clients run a slow "dashboard" query so the effect
+of one slow statement on everyone else's latency is visible.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_db_concurrency.py --clients 200 --requests 20
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import contextmanager
+
+import psycopg
+from psycopg_pool import ConnectionPool
+
+from app.core.config import settings
+from app.db.connection import init_connection_pool, close_all_connections, get_db_cursor
+
+FAST_QUERY = "SELECT id, username FROM users ORDER BY id LIMIT 1"
+SLOW_QUERY = "SELECT pg_sleep(%s)"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_blocking(args):
+    pool = ConnectionPool(settings.DATABASE_URL, min_size=1, max_size=args.pool_size)
+
+    @contextmanager
+    def cursor():
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    async def fast():
+        with cursor() as cur:
+            cur.execute(FAST_QUERY)
+            cur.fetchall()
+
+    async def slow():
+        with cursor() as cur:
+            cur.execute(SLOW_QUERY, (args.slow_seconds,))
+
+    try:
+        return await drive(args, fast, slow)
+    finally:
+        pool.close()
+
+
+async def run_async(args):
+    await init_connection_pool()
+
+    async def fast():
+        async with get_db_cursor() as cur:
+            await cur.execute(FAST_QUERY)
+            await cur.fetchall()
+
+    async def slow():
+        async with get_db_cursor() as cur:
+            await cur.execute(SLOW_QUERY, (args.slow_seconds,))
+
+    try:
+        return await drive(args, fast, slow)
+    finally:
+        await close_all_connections()
+
+
+async def drive(args, fast, slow):
+    latencies = []
+
+    async def client(index):
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            if index % args.slow_every == 0:
+                await slow()
+            else:
+                await fast()
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    total = args.clients * args.requests
+    return {
+        "requests_per_second": total / elapsed,
+        "fast_p50_ms": statistics.median(latencies) * 1000,
+        "fast_p99_ms": percentile(latencies, 99) * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--slow-every", type=int, default=20, help="every Nth client runs the slow query")
+    parser.add_argument("--slow-seconds", type=float, default=0.2)
+    parser.add_argument("--pool-size", type=int, default=20)
+    args = parser.parse_args()
+
+    # Make sure the database is reachable before timing anything
+    psycopg.connect(settings.DATABASE_URL).close()
+
+    for name, runner in (("blocking", run_blocking), ("async", run_async)):
+        result = asyncio.run(runner(args))
+        print(
+            f"{name:>8}: {result['requests_per_second']:8.1f} req/s  "
+            f"fast p50 {result['fast_p50_ms']:7.2f} ms  "
+            f"fast p99 {result['fast_p99_ms']:7.2f} ms  "
+            f"({result['elapsed_s']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Bytes on the wire, peak memory and time to get recognizable PNG bytes out
+of a request, for the two recognition intake paths.
+
+json-legacy - /recognize before this change: parse the JSON body, split the
+              data URL on "base64," and b64decode the second half
+json        - /recognize now: parse the JSON body, validate it with
+              ImageRecognitionRequest, decode through app.services.ai.preprocess_image
+upload      - /recognize/upload: app.services.imaging.read_png_stream over the raw
+              body in 64 KiB chunks, the way Starlette delivers it
+
+Each canvas is a --side x --side noise image, which barely compresses. That
+is the worst case for upload size. Peak memory is measured with tracemalloc
+from the moment the request body is in memory, and includes that body.
+
+Usage:
+    python scripts/bench_image_intake.py
+    python scripts/bench_image_intake.py --sides 300 500 700 --repeat 20
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import time
+import tracemalloc
+
+from PIL import Image
+
+from app.schemas.game import ImageRecognitionRequest
+from app.services.ai import preprocess_image
+from app.services.imaging import read_png_stream
+
+CHUNK_SIZE = 64 * 1024
+
+
+def noise_png(side):
+    buffer = io.BytesIO()
+    Image.effect_noise((side, side), 64).convert("RGBA").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def json_legacy(body):
+    image_base64 = json.loads(body)["image"]
+    if "base64," in image_base64:
+        image_base64 = image_base64.split("base64,")[1]
+    return base64.b64decode(image_base64)
+
+
+def json_current(body):
+    return preprocess_image(ImageRecognitionRequest(**json.loads(body)).image)
+
+
+def upload(chunks, loop):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return loop.run_until_complete(read_png_stream(stream(), 64 * 1024 * 1024, 1 << 16))
+
+
+def measure(intake, body, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        image = intake(body)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    tracemalloc.start()
+    intake(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return image, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sides", type=int, nargs="+", default=[300, 500, 700])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    # One loop for every run; asyncio.run would count a new loop's allocations against upload
+    loop = asyncio.new_event_loop()
+    print(f"{'side':>5} {'path':>12} {'wire KiB':>9} {'peak KiB':>9} {'peak/PNG':>9} {'ms':>7}")
+    for side in args.sides:
+        png = noise_png(side)
+        json_body = json.dumps({"image": "data:image/png;base64," + base64.b64encode(png).decode()}).encode()
+        chunks = [png[i:i + CHUNK_SIZE] for i in range(0, len(png), CHUNK_SIZE)]
+        for label, intake, body, wire in (
+            ("json-legacy", json_legacy, json_body, len(json_body)),
+            ("json", json_current, json_body, len(json_body)),
+            ("upload", lambda body: upload(body, loop), chunks, len(png)),
+        ):
+            image, peak, elapsed = measure(intake, body, args.repeat)
+            assert image == png
+            # The body is already in memory before intake starts; count it too
+            peak += wire
+            print(
+                f"{side:>5} {label:>12} {wire / 1024:>9.0f} {peak / 1024:>9.0f} "
+                f"{peak / len(png):>9.2f} {elapsed:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Login throughput and event-loop stalls under concurrent load.
+
+inline    - the old path: look the user up, then run bcrypt verify on the
+            event loop
+offloaded - authenticate_user from app.services.auth, which verifies on
+            the bounded password-hash executor (PASSWORD_HASH_WORKERS)
+
+For each mode, --concurrency clients each log in --logins times as a
+throwaway user. The script reports logins per second and how late a 10 ms
+ticker on the same loop ran. The ticker stands in for every other request
+that the worker is serving.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_login.py --concurrency 16 --logins 4
+    PASSWORD_HASH_WORKERS=8 DATABASE_URL=postgresql://... python scripts/bench_login.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+from app.db.connection import init_connection_pool, close_all_connections, get_db_cursor
+from app.db.queries.auth_queries import get_user
+from app.schemas.auth import UserLogin
+from app.services.auth import authenticate_user
+
+PASSWORD = "bench-password"
+
+
+async def login_inline(credentials):
+    user = await get_user(credentials.username)
+    if not verify_password(credentials.password, user["password"]):
+        raise RuntimeError("login failed")
+
+
+async def login_offloaded(credentials):
+    await authenticate_user(credentials)
+
+
+async def ticker(lags, stop):
+    interval = 0.01
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def run(login, credentials, concurrency, logins):
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+
+    async def client():
+        for _ in range(logins):
+            await login(credentials)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    lags.sort()
+    return concurrency * logins / elapsed, lags
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=4, help="logins per client")
+    args = parser.parse_args()
+
+    await init_connection_pool()
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    async with get_db_cursor() as cur:
+        await cur.execute(
+            "INSERT INTO users (username, password, email, name) VALUES (%s, %s, %s, %s)",
+            (name, get_password_hash(PASSWORD), f"{name}@bench.local", name)
+        )
+    credentials = UserLogin(username=name, password=PASSWORD)
+
+    try:
+        print(
+            f"{args.concurrency} clients x {args.logins} logins, "
+            f"PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}, {os.cpu_count()} CPUs"
+        )
+        print(f"{'':>10} {'logins/s':>9} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+        for label, login in (("inline", login_inline), ("offloaded", login_offloaded)):
+            throughput, lags = await run(login, credentials, args.concurrency, args.logins)
+            print(
+                f"{label:>10} {throughput:>9.1f} {statistics.median(lags):>11.1f} "
+                f"{lags[int(len(lags) * 0.99) - 1]:>11.1f} {lags[-1]:>11.1f}"
+            )
+    finally:
+        async with get_db_cursor() as cur:
+            await cur.execute("DELETE FROM users WHERE username = %s", (name,))
+        await close_all_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Throughput and output size of canvas normalization
+(app.services.ai.normalize_canvas) on synthetic doodles.
+
+For each --canvas size, --images antialiased doodles from
+scripts/synthetic_doodles.py are normalized to RECOGNITION_IMAGE_SIZE. The
+script reports:
+
+raw / norm KiB   - mean PNG size before and after; the bytes sent to a
+                   remote recognizer
+normalize ms     - decode + crop + scale + re-encode + hash, per image and
+                   as images/s on one thread
+local ms         - the local recognizer on the raw PNG vs the normalized
+                   one (random weights when LOCAL_RECOGNIZER_WEIGHTS is
+                   missing; they cost the same)
+identical        - share of doodles whose copy, moved elsewhere on a canvas
+                   1.5 times the size, normalizes to the same bytes
+
+Usage:
+    python scripts/bench_normalize.py
+    python scripts/bench_normalize.py --images 500 --canvas 800x500 1600x1000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.services.ai import normalize_canvas
+from app.services.recognizers.local import BITMAP_SIZE, LocalRecognizer
+from synthetic_doodles import label_template, png_bytes, render, sample_strokes
+
+
+def local_recognizer():
+    if os.path.exists(settings.LOCAL_RECOGNIZER_WEIGHTS):
+        return LocalRecognizer.load()
+    rng = np.random.default_rng(0)
+    return LocalRecognizer(
+        rng.normal(0, 0.01, size=(BITMAP_SIZE * BITMAP_SIZE, len(VOCABULARY))),
+        np.zeros(len(VOCABULARY)),
+        VOCABULARY
+    )
+
+
+def per_image_ms(operation, images):
+    started = time.perf_counter()
+    results = [operation(image) for image in images]
+    return (time.perf_counter() - started) / len(images) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--canvas", nargs="+", default=["800x500", "1600x1000"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    recognizer = local_recognizer()
+    print(f"normalizing to {settings.RECOGNITION_IMAGE_SIZE}x{settings.RECOGNITION_IMAGE_SIZE} grayscale")
+    print(
+        f"{'canvas':>10} {'raw KiB':>8} {'norm KiB':>9} {'normalize ms':>13} {'images/s':>9} "
+        f"{'local raw ms':>13} {'local norm ms':>14} {'identical':>10}"
+    )
+    for canvas in args.canvas:
+        width, height = map(int, canvas.split("x"))
+        rng = np.random.default_rng(args.seed)
+        raw, moved = [], []
+        for i in range(args.images):
+            strokes = sample_strokes(label_template(VOCABULARY[i % len(VOCABULARY)]), rng, (width, height))
+            raw.append(png_bytes(render(strokes, (width, height), antialias=True)))
+            offset = np.array([width // 2, height // 3])
+            moved.append(png_bytes(render([s + offset for s in strokes], (width * 3 // 2, height * 3 // 2), antialias=True)))
+
+        normalize_ms, normalized = per_image_ms(normalize_canvas, raw)
+        moved_normalized = [normalize_canvas(image) for image in moved]
+        identical = sum(a == b for a, b in zip(normalized, moved_normalized)) / len(raw)
+        local_raw_ms, _ = per_image_ms(recognizer.classify, raw)
+        local_norm_ms, _ = per_image_ms(recognizer.classify, [png for png, _ in normalized])
+        print(
+            f"{canvas:>10} {statistics.mean(map(len, raw)) / 1024:>8.1f} "
+            f"{statistics.mean(len(png) for png, _ in normalized) / 1024:>9.1f} "
+            f"{normalize_ms:>13.2f} {1000 / normalize_ms:>9.0f} "
+            f"{local_raw_ms:>13.2f} {local_norm_ms:>14.2f} {identical:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
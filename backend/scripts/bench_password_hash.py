@@ -0,0 +1,71 @@
+"""
+bcrypt cost vs throughput.
+
+For each cost (log2 rounds) it hashes and verifies on --threads threads,
+the same way the app's password-hash executor does. It reports the
+latency of a single hash and the hashes per second per core. Use it to
+pick BCRYPT_ROUNDS, which sets login latency and how many logins a worker
+can absorb.
+
+Usage:
+    python scripts/bench_password_hash.py
+    python scripts/bench_password_hash.py --rounds 10 11 12 13 --threads 4 --seconds 3
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import BCRYPT_PROFILE_ROUNDS, settings
+from app.core.security import build_password_context
+
+
+def throughput(operation, threads, seconds):
+    """Operations per second with `threads` threads busy for about `seconds`"""
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        count = 0
+        while time.perf_counter() < deadline:
+            operation()
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    profiles = {rounds: name for name, rounds in BCRYPT_PROFILE_ROUNDS.items()}
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=sorted({*profiles, 8, 10, 12, 13}))
+    parser.add_argument("--threads", type=int, default=min(os.cpu_count() or 1, settings.PASSWORD_HASH_WORKERS))
+    parser.add_argument("--seconds", type=float, default=2.0, help="measuring time per cost and operation")
+    args = parser.parse_args()
+
+    cores = min(args.threads, os.cpu_count() or 1)
+    print(f"{args.threads} thread(s) on {os.cpu_count()} CPU(s); configured BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}")
+    print(f"{'rounds':>6} {'profile':>8} {'hash ms':>8} {'hash/s/core':>12} {'verify/s/core':>14}")
+    for rounds in args.rounds:
+        context = build_password_context(rounds)
+        stored = context.hash("bench-password")
+
+        started = time.perf_counter()
+        context.hash("bench-password")
+        single_ms = (time.perf_counter() - started) * 1000
+
+        hashes = throughput(lambda: context.hash("bench-password"), args.threads, args.seconds)
+        verifies = throughput(lambda: context.verify("bench-password", stored), args.threads, args.seconds)
+        print(
+            f"{rounds:>6} {profiles.get(rounds, ''):>8} {single_ms:>8.1f} "
+            f"{hashes / cores:>12.1f} {verifies / cores:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
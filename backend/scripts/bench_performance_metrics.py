@@ -0,0 +1,141 @@
+"""
+Performance panel latency as a user's history grows.
+
+legacy - the old get_performance_metrics query, which joined all of the
+         user's sessions with all of the user's attempts (sessions x attempts
+         rows) to find the record dates
+stored - PERFORMANCE_METRICS_QUERY from app.db.queries.dashboard_queries,
+         a lookup of the dates kept on user_metrics
+
+Creates a throwaway user and grows their history in sessions of
+--attempts attempts. At each checkpoint it times both queries and checks
+that they return the same record values and dates.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_performance_metrics.py --checkpoints 10 50 200 500
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.db.connection import get_sync_db_connection
+from app.db.queries.dashboard_queries import PERFORMANCE_METRICS_QUERY
+
+LEGACY_QUERY = """
+    WITH best_metrics AS (
+        SELECT
+            MAX(gs.total_score) as best_score,
+            MIN(CASE WHEN da.is_correct THEN da.drawing_time_ms END) as fastest_correct_ms,
+            MAX(gs.streak_count) as highest_streak,
+            MAX(CASE WHEN gs.total_score = um.best_score THEN gs.created_at END) as best_score_date,
+            MIN(CASE WHEN da.is_correct AND da.drawing_time_ms = um.fastest_correct_ms THEN da.created_at END) as fastest_correct_date,
+            MAX(CASE WHEN gs.streak_count = um.highest_streak THEN gs.created_at END) as highest_streak_date
+        FROM user_metrics um
+        LEFT JOIN game_sessions gs ON gs.user_id = um.user_id
+        LEFT JOIN drawing_attempts da ON da.user_id = um.user_id
+        WHERE um.user_id = %s
+    )
+    SELECT
+        um.best_score,
+        um.fastest_correct_ms,
+        um.highest_streak,
+        bm.best_score_date,
+        bm.fastest_correct_date,
+        bm.highest_streak_date
+    FROM user_metrics um
+    CROSS JOIN best_metrics bm
+    WHERE um.user_id = %s
+"""
+
+RECORD_FIELDS = [
+    "best_score", "fastest_correct_ms", "highest_streak",
+    "best_score_date", "fastest_correct_date", "highest_streak_date",
+]
+
+INSERT_ATTEMPT = """
+    INSERT INTO drawing_attempts
+    (session_id, user_id, word_prompt, difficulty, is_correct, drawing_time_ms, recognition_accuracy)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def timed(cur, query, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(query, params)
+        row = cur.fetchone()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[10, 50, 200, 500], help="session counts")
+    parser.add_argument("--attempts", type=int, default=15, help="attempts per session")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query and checkpoint")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    mismatches = 0
+
+    with get_sync_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (username, password, email, name) VALUES (%s, 'x', %s, %s) RETURNING id",
+                (name, f"{name}@bench.local", name)
+            )
+            user_id = cur.fetchone()[0]
+            conn.commit()
+
+            try:
+                sessions = 0
+                print(f"{'sessions':>9} {'attempts':>9} {'legacy ms':>10} {'stored ms':>10} {'match':>6}")
+                for checkpoint in sorted(args.checkpoints):
+                    while sessions < checkpoint:
+                        cur.execute("INSERT INTO game_sessions (user_id) VALUES (%s) RETURNING id", (user_id,))
+                        session_id = cur.fetchone()[0]
+                        for _ in range(args.attempts):
+                            cur.execute(INSERT_ATTEMPT, (
+                                session_id, user_id, "cat",
+                                rng.choice(["EASY", "MEDIUM", "HARD"]),
+                                rng.random() < 0.7,
+                                rng.randint(1500, 20000),
+                                rng.uniform(0.6, 1.0)
+                            ))
+                        cur.execute(
+                            "UPDATE game_sessions SET end_time = NOW(), total_score = successful_attempts WHERE id = %s",
+                            (session_id,)
+                        )
+                        conn.commit()
+                        sessions += 1
+
+                    legacy_ms, legacy = timed(cur, LEGACY_QUERY, (user_id, user_id), args.repeat)
+                    stored_ms, stored = timed(cur, PERFORMANCE_METRICS_QUERY, (user_id,), args.repeat)
+                    stored = dict(zip([column.name for column in cur.description], stored))
+                    match = tuple(legacy) == tuple(stored[field] for field in RECORD_FIELDS)
+                    if not match:
+                        mismatches += 1
+                        print(f"  legacy: {tuple(legacy)}")
+                        print(f"  stored: {tuple(stored[field] for field in RECORD_FIELDS)}")
+                    print(
+                        f"{sessions:>9} {sessions * args.attempts:>9} "
+                        f"{legacy_ms:>10.3f} {stored_ms:>10.3f} {'yes' if match else 'NO':>6}"
+                    )
+            finally:
+                cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                conn.commit()
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
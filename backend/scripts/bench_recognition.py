@@ -0,0 +1,130 @@
+"""
+Doodle recognition under a burst of concurrent requests, against a fake
+backend that simulates model latency.
+
+blocking - the old path: a synchronous model call made straight from the
+           handler, so it holds the event loop for the whole round-trip
+engine   - app.services.ai.RecognitionEngine over FakeRecognizer, with
+           --max-concurrency calls in flight, --max-queue waiting, and
+           --timeout covering both
+
+--requests recognitions start at once. For each mode the script reports
+how many succeeded, were shed (503) or timed out (504), the latency of the
+ones that succeeded, and how late a 10 ms ticker on the same loop ran. The
+ticker stands in for every other request the worker is serving.
+
+Usage:
+    python scripts/bench_recognition.py
+    python scripts/bench_recognition.py --requests 200 --latency 0.5 --max-concurrency 8 --max-queue 32 --timeout 3
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.exceptions import RecognitionOverloaded, RecognitionTimeout
+from app.services.ai import RecognitionEngine
+from app.services.recognizers.fake import FakeRecognizer
+
+IMAGE = b"\x89PNG\r\n\x1a\n"
+
+
+class BlockingRecognizer:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def recognize(self, image):
+        time.sleep(self.latency)
+        return "cat"
+
+
+async def ticker(lags, stop):
+    interval = 0.01
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def run(recognize, requests):
+    outcomes = {"ok": 0, "503": 0, "504": 0}
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    # Let the ticker arm before the burst
+    await asyncio.sleep(0.02)
+
+    async def call():
+        started = time.perf_counter()
+        try:
+            await recognize(IMAGE)
+        except RecognitionOverloaded:
+            outcomes["503"] += 1
+            return
+        except RecognitionTimeout:
+            outcomes["504"] += 1
+            return
+        outcomes["ok"] += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    latencies.sort()
+    lags.sort()
+    return outcomes, latencies, lags or [0.0], elapsed
+
+
+def percentile(values, fraction):
+    return values[max(0, int(len(values) * fraction) - 1)] if values else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated model round-trip, seconds")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--blocking-requests", type=int, default=10,
+                        help="requests for the blocking mode, which takes requests x latency seconds")
+    args = parser.parse_args()
+
+    engine = RecognitionEngine(
+        FakeRecognizer(latency=args.latency),
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        timeout=args.timeout
+    )
+    blocking = BlockingRecognizer(args.latency)
+
+    print(
+        f"latency {args.latency * 1000:.0f} ms, engine: {args.max_concurrency} in flight, "
+        f"{args.max_queue} queued, timeout {args.timeout:g} s"
+    )
+    print(
+        f"{'':>9} {'requests':>8} {'ok':>5} {'503':>5} {'504':>5} {'ok p50 ms':>10} {'ok p99 ms':>10} "
+        f"{'lag p50 ms':>11} {'lag max ms':>11} {'wall s':>7}"
+    )
+    for label, recognize, requests in (
+        ("blocking", blocking.recognize, args.blocking_requests),
+        ("engine", engine.recognize, args.requests),
+    ):
+        outcomes, latencies, lags, elapsed = await run(recognize, requests)
+        print(
+            f"{label:>9} {requests:>8} {outcomes['ok']:>5} {outcomes['503']:>5} {outcomes['504']:>5} "
+            f"{percentile(latencies, 0.5):>10.0f} {percentile(latencies, 0.99):>10.0f} "
+            f"{statistics.median(lags):>11.1f} {lags[-1]:>11.1f} {elapsed:>7.2f}"
+        )
+    print(f"engine: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Hit rate of the perceptual-hash recognition cache on simulated guesses.
+
+Each of --players draws a word from the vocabulary with
+scripts/synthetic_doodles.py and posts the canvas:
+  - once before the last stroke (an early guess)
+  - after the last stroke, then --resubmits more times, each after adding a
+    short tail to the last stroke (guessing again after a small touch-up)
+  - once more with the whole drawing shifted and shrunk (the same doodle
+    drawn again)
+Every post goes through app.core.cache.NearDuplicateCache for each
+--max-distance. The script reports:
+
+hit rate    - posts answered without calling the recognizer
+wrong hits  - hits whose cached entry came from a different word
+hash ms     - app.services.ai.normalize_canvas per PNG, which every
+              post pays for before the cache lookup
+
+Usage:
+    python scripts/bench_recognition_cache.py
+    python scripts/bench_recognition_cache.py --players 200 --max-distance 0 8 12 16 24
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+from app.core.cache import NearDuplicateCache
+from app.core.words import VOCABULARY
+from app.services.ai import normalize_canvas
+from app.services.imaging import HASH_SIZE
+from synthetic_doodles import CANVAS_SIZE, label_template, png_bytes, render, sample_strokes
+
+
+def submissions(players, resubmits, seed):
+    """(word, PNG bytes) in the order the server would see them"""
+    rng = np.random.default_rng(seed)
+    bounds = [CANVAS_SIZE[0] - 1, CANVAS_SIZE[1] - 1]
+    for _ in range(players):
+        word = VOCABULARY[rng.integers(len(VOCABULARY))]
+        strokes = sample_strokes(label_template(word), rng)
+        yield word, png_bytes(render(strokes[:-1]))
+        yield word, png_bytes(render(strokes))
+        for _ in range(resubmits):
+            tail = np.clip(strokes[-1][-1] + rng.integers(-8, 9, size=2), 0, bounds)
+            strokes[-1] = np.vstack([strokes[-1], tail])
+            yield word, png_bytes(render(strokes))
+        redrawn = [np.clip(stroke * 0.9 + rng.integers(-20, 21, size=2), 0, bounds).astype(int) for stroke in strokes]
+        yield word, png_bytes(render(redrawn))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--resubmits", type=int, default=2, help="extra posts of each canvas state")
+    parser.add_argument("--max-distance", type=int, nargs="+", default=[0, 8, 12, 16, 24])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    posted = list(submissions(args.players, args.resubmits, args.seed))
+    started = time.perf_counter()
+    hashes = [normalize_canvas(image)[1] for _, image in posted]
+    hash_ms = (time.perf_counter() - started) / len(posted) * 1000
+    print(f"{len(posted)} submissions from {args.players} players, hash {hash_ms:.2f} ms each")
+
+    print(f"{'distance':>8} {'hit rate':>9} {'wrong hits':>11} {'lookup us':>10}")
+    for distance in args.max_distance:
+        cache = NearDuplicateCache(f"bench_{distance}", maxsize=100_000, ttl=3600, bits=HASH_SIZE * HASH_SIZE, max_distance=distance)
+        missing = object()
+        wrong = 0
+        started = time.perf_counter()
+        for (word, _), key in zip(posted, hashes):
+            cached = cache.get(key, missing)
+            if cached is missing:
+                cache.set(key, word)
+            elif cached != word:
+                wrong += 1
+        lookup_us = (time.perf_counter() - started) / len(posted) * 1e6
+        stats = cache.stats()
+        print(f"{distance:>8} {stats['hit_rate']:>9.1%} {wrong / len(posted):>11.2%} {lookup_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency and throughput of the recognizer backends on synthetic doodles.
+
+Each recognizer in --recognizers sees the same --images synthetic canvas
+PNGs from scripts/synthetic_doodles.py.
+
+sequential  - one call at a time: p50/p99 latency
+concurrent  - --concurrency callers through a RecognitionEngine: images/s
+
+local loads LOCAL_RECOGNIZER_WEIGHTS. If that file doesn't exist it uses
+random weights of the same shape, which cost the same to run. gemini is
+skipped unless GEMINI_API_KEY is set.
+
+Usage:
+    python scripts/bench_recognizers.py
+    GEMINI_API_KEY=... python scripts/bench_recognizers.py --recognizers local gemini --images 20 --concurrency 4
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.services.ai import RecognitionEngine, create_recognizer
+from app.services.recognizers.local import BITMAP_SIZE, LocalRecognizer
+from synthetic_doodles import corpus, png_bytes
+
+
+def build_recognizer(name):
+    if name == "local" and not os.path.exists(settings.LOCAL_RECOGNIZER_WEIGHTS):
+        print(f"local: no weights at {settings.LOCAL_RECOGNIZER_WEIGHTS}, timing random weights")
+        rng = np.random.default_rng(0)
+        return LocalRecognizer(
+            rng.normal(0, 0.01, size=(BITMAP_SIZE * BITMAP_SIZE, len(VOCABULARY))),
+            np.zeros(len(VOCABULARY)),
+            VOCABULARY
+        )
+    return create_recognizer(name)
+
+
+async def bench(recognizer, images, concurrency):
+    latencies = []
+    for image in images:
+        started = time.perf_counter()
+        await recognizer.recognize(image)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    engine = RecognitionEngine(recognizer, max_concurrency=concurrency, max_queue=len(images), timeout=600)
+    started = time.perf_counter()
+    await asyncio.gather(*(engine.recognize(image) for image in images))
+    throughput = len(images) / (time.perf_counter() - started)
+    return latencies, throughput
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recognizers", nargs="+", default=["local", "fake", "gemini"])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    images = [png_bytes(img) for _, img in corpus(VOCABULARY, args.images)]
+    print(f"{len(images)} PNGs, mean {statistics.mean(map(len, images)) / 1024:.1f} KiB; {os.cpu_count()} CPUs")
+    print(f"{'':>8} {'p50 ms':>8} {'p99 ms':>8} {'images/s':>9}")
+    for name in args.recognizers:
+        if name == "gemini" and not settings.GEMINI_API_KEY:
+            print(f"{name:>8} skipped, GEMINI_API_KEY is not set")
+            continue
+        latencies, throughput = await bench(build_recognizer(name), images, args.concurrency)
+        print(
+            f"{name:>8} {statistics.median(latencies):>8.2f} "
+            f"{latencies[max(0, int(len(latencies) * 0.99) - 1)]:>8.2f} {throughput:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Revoked-token lookup: memory and latency at scale.
+
+In process, for --tokens revoked token digests:
+  exact - a Python set of the 32-byte SHA-256 digests
+  bloom - app.core.bloom.BloomFilter sized for --tokens at --error-rate
+reports memory (tracemalloc), lookup time for revoked and not-revoked
+tokens, and the measured false-positive rate.
+
+With --db it also loads --tokens rows into revoked_tokens (half of them
+already expired) and times the exact PK lookup, the filter rebuild that
+runs at startup and after pruning, and the prune itself. The rows are
+removed afterwards.
+
+Usage:
+    python scripts/bench_revocation.py --tokens 1000000
+    DATABASE_URL=postgresql://... python scripts/bench_revocation.py --tokens 1000000 --db
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import time
+import tracemalloc
+
+from app.core.bloom import BloomFilter
+
+# revoked_at marker for benchmark rows, so cleanup can't touch real revocations
+BENCH_REVOKED_AT = "2000-01-01 00:00:00+00"
+
+
+def digest(i: int, prefix: str = "revoked") -> bytes:
+    return hashlib.sha256(f"{prefix}-{i}".encode()).digest()
+
+
+def measure(build):
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    # Build again under tracemalloc for memory; tracing slows the build down
+    tracemalloc.start()
+    structure = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return structure, size, elapsed
+
+
+def lookup_ns(structure, keys):
+    started = time.perf_counter()
+    for key in keys:
+        key in structure
+    return (time.perf_counter() - started) / len(keys) * 1e9
+
+
+def bench_in_process(args):
+    absent = [digest(i, "live") for i in range(args.lookups)]
+    present = [digest(i) for i in range(args.lookups)]
+
+    # Both builds hash the tokens themselves, so the exact set's memory includes the digests it keeps
+    exact, exact_bytes, exact_build = measure(lambda: {digest(i) for i in range(args.tokens)})
+    bloom, bloom_bytes, bloom_build = measure(lambda: _build_bloom(args.tokens, args.error_rate))
+    false_positives = sum(key in bloom for key in absent)
+
+    print(f"{args.tokens:,} revoked tokens, {args.lookups:,} lookups each")
+    print(f"{'':>6} {'memory MB':>10} {'build s':>8} {'hit ns':>8} {'miss ns':>8}")
+    for label, structure, size, build in (
+        ("exact", exact, exact_bytes, exact_build),
+        ("bloom", bloom, bloom_bytes, bloom_build),
+    ):
+        print(
+            f"{label:>6} {size / 2**20:>10.1f} {build:>8.2f} "
+            f"{lookup_ns(structure, present):>8.0f} {lookup_ns(structure, absent):>8.0f}"
+        )
+    print(
+        f"bloom: {bloom.num_bits:,} bits, {bloom.num_hashes} hashes, "
+        f"false positives {false_positives}/{len(absent)} "
+        f"({false_positives / len(absent):.4%}, target {args.error_rate:.4%})"
+    )
+
+
+def _build_bloom(tokens, error_rate):
+    bloom = BloomFilter(tokens, error_rate)
+    for i in range(tokens):
+        bloom.add(digest(i))
+    return bloom
+
+
+async def bench_db(args):
+    from app.db.connection import init_connection_pool, close_all_connections, get_db_cursor
+    from app.db.queries.auth_queries import is_token_revoked, prune_revoked_tokens
+    from app.services.revocation import TokenRevocationList
+
+    await init_connection_pool()
+    try:
+        async with get_db_cursor() as cur:
+            started = time.perf_counter()
+            await cur.execute(
+                """INSERT INTO revoked_tokens (token_hash, expires_at, revoked_at)
+                   SELECT sha256(convert_to('revoked-' || i, 'UTF8')),
+                          NOW() + CASE WHEN i %% 2 = 0 THEN INTERVAL '1 hour' ELSE INTERVAL '-1 hour' END,
+                          %s
+                   FROM generate_series(0, %s - 1) i
+                   ON CONFLICT (token_hash) DO NOTHING""",
+                (BENCH_REVOKED_AT, args.tokens)
+            )
+            await cur.execute("ANALYZE revoked_tokens")
+        print(f"\nloaded {args.tokens:,} rows in {time.perf_counter() - started:.1f} s")
+
+        for label, keys in (
+            ("revoked", [digest(i) for i in range(0, 2 * args.db_lookups, 2)]),
+            ("not revoked", [digest(i, "live") for i in range(args.db_lookups)]),
+        ):
+            samples = []
+            for key in keys:
+                started = time.perf_counter()
+                await is_token_revoked(key)
+                samples.append((time.perf_counter() - started) * 1000)
+            print(f"exact lookup ({label}): p50 {statistics.median(samples):.3f} ms")
+
+        revocations = TokenRevocationList()
+        await revocations.rebuild()
+        stats = revocations.stats()
+        print(
+            f"filter rebuild: {stats['last_rebuild_seconds']:.2f} s for {stats['revoked_tokens']:,} "
+            f"unexpired rows, {stats['bloom_bytes'] / 2**20:.1f} MB"
+        )
+
+        misses = [digest(i, "live") for i in range(args.db_lookups)]
+        started = time.perf_counter()
+        for key in misses:
+            await revocations.is_revoked(key)
+        elapsed = (time.perf_counter() - started) / len(misses) * 1e6
+        print(
+            f"filtered lookup (not revoked): {elapsed:.1f} us, "
+            f"{revocations.db_checks} of {len(misses)} went to the database"
+        )
+
+        started = time.perf_counter()
+        pruned = await prune_revoked_tokens()
+        print(f"prune: {pruned:,} expired rows in {time.perf_counter() - started:.2f} s")
+    finally:
+        async with get_db_cursor() as cur:
+            await cur.execute("DELETE FROM revoked_tokens WHERE revoked_at = %s", (BENCH_REVOKED_AT,))
+        await close_all_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000, help="in-process lookups per case")
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    parser.add_argument("--db", action="store_true", help="also benchmark revoked_tokens and the filter rebuild")
+    parser.add_argument("--db-lookups", type=int, default=500, help="database lookups per case")
+    args = parser.parse_args()
+
+    bench_in_process(args)
+    if args.db:
+        asyncio.run(bench_db(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Session completion latency: legacy multi-statement path vs single statement.
+
+legacy - what complete_game_session and update_user_metrics_after_session
+         used to do: five sequential statements on one connection, then a
+         second pass over the same attempts on another connection
+single - COMPLETE_SESSION_QUERY from app.db.queries.game_queries
+
+Each round creates a fresh session with --attempts attempts for a
+throwaway user and completes it, so both paths see identical data.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_session_complete.py --rounds 200 --attempts 15
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.db.connection import get_sync_db_connection
+from app.db.queries.game_queries import COMPLETE_SESSION_QUERY
+
+LEGACY_QUERIES = [
+    "SELECT user_id FROM game_sessions WHERE id = %s",
+    """SELECT
+          COUNT(*) as total_attempts,
+          COUNT(*) FILTER (WHERE is_correct = true) as correct_attempts,
+          COALESCE(AVG(drawing_time_ms), 0) as avg_time
+       FROM drawing_attempts
+       WHERE session_id = %s""",
+    """WITH consecutive_attempts AS (
+            SELECT
+                is_correct,
+                row_number() OVER (ORDER BY created_at) -
+                row_number() OVER (PARTITION BY is_correct ORDER BY created_at) as grp
+            FROM drawing_attempts
+            WHERE session_id = %s AND is_correct = true
+        )
+        SELECT COALESCE(MAX(count), 0) as max_streak
+        FROM (
+            SELECT COUNT(*) as count
+            FROM consecutive_attempts
+            GROUP BY grp
+        ) t""",
+    """UPDATE game_sessions
+       SET end_time = NOW(), total_score = %s, total_attempts = %s, total_time_seconds = %s,
+           successful_attempts = %s, streak_count = %s, avg_drawing_time_ms = %s
+       WHERE id = %s""",
+    """UPDATE user_metrics
+       SET total_games_played = total_games_played + 1,
+           total_time_spent_seconds = total_time_spent_seconds + %s,
+           best_score = GREATEST(COALESCE(best_score, 0), %s)
+       WHERE user_id = %s""",
+]
+
+LEGACY_SECOND_PASS = """
+    WITH streak_calc AS (
+        SELECT is_correct, session_id,
+               COUNT(*) FILTER (WHERE NOT is_correct) OVER (ORDER BY created_at) as grp
+        FROM drawing_attempts WHERE session_id = %s
+    ),
+    session_stats AS (
+        SELECT user_id, COUNT(*) as total_attempts,
+               SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as successful_attempts,
+               MIN(CASE WHEN is_correct THEN drawing_time_ms ELSE NULL END) as fastest_correct,
+               AVG(drawing_time_ms) as avg_time,
+               (SELECT MAX(streak_length) FROM (
+                    SELECT COUNT(*) as streak_length FROM streak_calc WHERE is_correct = true GROUP BY grp
+               ) s) as max_streak
+        FROM drawing_attempts WHERE session_id = %s GROUP BY user_id
+    )
+    UPDATE user_metrics um
+    SET total_attempts = um.total_attempts + s.total_attempts,
+        successful_attempts = um.successful_attempts + s.successful_attempts,
+        fastest_correct_ms = LEAST(COALESCE(um.fastest_correct_ms, s.fastest_correct), s.fastest_correct),
+        highest_streak = GREATEST(COALESCE(um.highest_streak, 0), s.max_streak),
+        avg_drawing_time_ms = ((COALESCE(um.avg_drawing_time_ms, 0) * COALESCE(um.total_attempts, 0) +
+                                s.avg_time * s.total_attempts) /
+                               NULLIF(COALESCE(um.total_attempts, 0) + s.total_attempts, 0))
+    FROM session_stats s WHERE um.user_id = s.user_id
+"""
+
+
+def complete_legacy(conn, other_conn, session_id, score, attempts, seconds):
+    with conn.cursor() as cur:
+        cur.execute(LEGACY_QUERIES[0], (session_id,))
+        user_id = cur.fetchone()[0]
+        cur.execute(LEGACY_QUERIES[1], (session_id,))
+        _, correct, avg_time = cur.fetchone()
+        cur.execute(LEGACY_QUERIES[2], (session_id,))
+        streak = cur.fetchone()[0]
+        cur.execute(LEGACY_QUERIES[3], (score, attempts, seconds, correct, streak, avg_time, session_id))
+        cur.execute(LEGACY_QUERIES[4], (seconds, correct, user_id))
+        conn.commit()
+    with other_conn.cursor() as cur:
+        cur.execute(LEGACY_SECOND_PASS, (session_id, session_id))
+        other_conn.commit()
+
+
+def complete_single(conn, other_conn, session_id, score, attempts, seconds):
+    with conn.cursor() as cur:
+        cur.execute(COMPLETE_SESSION_QUERY, {
+            "session_id": session_id,
+            "total_score": score,
+            "total_attempts": attempts,
+            "total_time_seconds": seconds,
+        })
+        cur.fetchone()
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=15, help="attempts per session")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+
+    with get_sync_db_connection() as conn, get_sync_db_connection() as other_conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (username, password, email, name) VALUES (%s, 'x', %s, %s) RETURNING id",
+                (name, f"{name}@bench.local", name)
+            )
+            user_id = cur.fetchone()[0]
+            conn.commit()
+
+            def new_session():
+                cur.execute("INSERT INTO game_sessions (user_id) VALUES (%s) RETURNING id", (user_id,))
+                session_id = cur.fetchone()[0]
+                rows = [
+                    (session_id, user_id, "cat", "EASY", rng.random() < 0.8, rng.randint(1500, 4000), 0.9)
+                    for _ in range(args.attempts)
+                ]
+                cur.executemany(
+                    """INSERT INTO drawing_attempts
+                       (session_id, user_id, word_prompt, difficulty, is_correct, drawing_time_ms, recognition_accuracy)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                    rows
+                )
+                conn.commit()
+                return session_id
+
+            try:
+                for label, complete in (("legacy", complete_legacy), ("single", complete_single)):
+                    samples = []
+                    for _ in range(args.rounds):
+                        session_id = new_session()
+                        started = time.perf_counter()
+                        complete(conn, other_conn, session_id, args.attempts, args.attempts, 45)
+                        samples.append((time.perf_counter() - started) * 1000)
+                    samples.sort()
+                    print(
+                        f"{label:>7}: p50 {statistics.median(samples):7.3f} ms  "
+                        f"p95 {samples[int(len(samples) * 0.95) - 1]:7.3f} ms  "
+                        f"mean {statistics.fmean(samples):7.3f} ms"
+                    )
+            finally:
+                cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                conn.commit()
+
+
+if __name__ == "__main__":
+    main()
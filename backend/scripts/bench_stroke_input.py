@@ -0,0 +1,93 @@
+"""
+Request size and server CPU for a drawing sent as strokes versus as a
+canvas PNG, on synthetic doodles from scripts/synthetic_doodles.py.
+
+png      - {"image": data URL} through app.services.ai.preprocess_image and
+           normalize_canvas, as /recognize handles a PNG
+strokes  - {"strokes": base64} through decode_strokes and normalize_strokes,
+           as /recognize handles strokes
+
+Both end at the same normalized PNG and hash, so everything after that
+(cache, engine, recognizer) costs the same. The script reports:
+
+body B     - mean JSON request body
+server ms  - body -> normalized PNG and hash, per drawing on one thread
+hash bits  - mean Hamming distance between the two paths' hashes of the
+             same drawing (cache keys are shared when it is within
+             RECOGNITION_CACHE_MAX_DISTANCE)
+accuracy   - local recognizer on each path's normalized PNG, when trained
+             weights are at LOCAL_RECOGNIZER_WEIGHTS
+
+Usage:
+    python scripts/bench_stroke_input.py
+    python scripts/bench_stroke_input.py --drawings 500
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import base64
+import json
+import statistics
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.schemas.game import ImageRecognitionRequest
+from app.services.ai import normalize_canvas, normalize_strokes, preprocess_image
+from app.services.imaging import decode_strokes
+from app.services.recognizers.local import LocalRecognizer
+from synthetic_doodles import encode_strokes, label_template, png_bytes, render, sample_strokes
+
+
+def png_path(body):
+    return normalize_canvas(preprocess_image(ImageRecognitionRequest(**json.loads(body)).image))
+
+
+def strokes_path(body):
+    strokes = base64.b64decode(ImageRecognitionRequest(**json.loads(body)).strokes)
+    return normalize_strokes(decode_strokes(strokes, settings.RECOGNITION_MAX_STROKE_POINTS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drawings", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    labels, png_bodies, stroke_bodies = [], [], []
+    for i in range(args.drawings):
+        label = VOCABULARY[i % len(VOCABULARY)]
+        strokes = sample_strokes(label_template(label), rng)
+        png = png_bytes(render(strokes, antialias=True))
+        labels.append(label)
+        png_bodies.append(json.dumps({"image": "data:image/png;base64," + base64.b64encode(png).decode()}).encode())
+        stroke_bodies.append(json.dumps({"strokes": base64.b64encode(encode_strokes(strokes)).decode()}).encode())
+
+    recognizer = LocalRecognizer.load() if os.path.exists(settings.LOCAL_RECOGNIZER_WEIGHTS) else None
+    results = {}
+    print(f"{'path':>8} {'body B':>8} {'server ms':>10} {'accuracy':>9}")
+    for name, path, bodies in (("png", png_path, png_bodies), ("strokes", strokes_path, stroke_bodies)):
+        started = time.perf_counter()
+        results[name] = [path(body) for body in bodies]
+        server_ms = (time.perf_counter() - started) / len(bodies) * 1000
+        accuracy = "-"
+        if recognizer:
+            hits = sum(recognizer.classify(png)[0].word == label for (png, _), label in zip(results[name], labels))
+            accuracy = f"{hits / len(labels):.0%}"
+        print(f"{name:>8} {statistics.mean(map(len, bodies)):>8.0f} {server_ms:>10.2f} {accuracy:>9}")
+
+    distances = [bin(a ^ b).count("1") for (_, a), (_, b) in zip(results["png"], results["strokes"])]
+    print(
+        f"hash distance between paths: mean {statistics.mean(distances):.1f} bits, "
+        f"within {settings.RECOGNITION_CACHE_MAX_DISTANCE}: "
+        f"{sum(d <= settings.RECOGNITION_CACHE_MAX_DISTANCE for d in distances) / len(distances):.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
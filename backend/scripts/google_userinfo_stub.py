@@ -0,0 +1,67 @@
+"""
+Local stand-in for Google's userinfo endpoint, for exercising Google sign-in
+without real Google access tokens.
+
+A bearer token "stub:<email>" is answered with userinfo for that email.
+"slow:<email>" does the same after --delay seconds. Any other token gets 401.
+
+Run it and point the app at it with
+GOOGLE_USERINFO_URL=http://127.0.0.1:<port>/oauth2/v3/userinfo.
+tests/test_auth.py starts it in process with start_stub().
+
+Usage:
+    python scripts/google_userinfo_stub.py --port 8765
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException
+
+USERINFO_PATH = "/oauth2/v3/userinfo"
+
+
+def create_stub_app(delay: float) -> FastAPI:
+    stub = FastAPI()
+    stub.state.requests = 0
+
+    @stub.get(USERINFO_PATH)
+    async def userinfo(authorization: str = Header("")):
+        stub.state.requests += 1
+        token = authorization.removeprefix("Bearer ")
+        kind, _, email = token.partition(":")
+        if kind not in ("stub", "slow") or "@" not in email:
+            raise HTTPException(status_code=401, detail="Invalid Credentials")
+        if kind == "slow":
+            await asyncio.sleep(delay)
+        local = email.split("@")[0]
+        return {"sub": local, "email": email, "email_verified": True, "name": local.title()}
+
+    return stub
+
+
+async def start_stub(delay: float, port: int):
+    stub = create_stub_app(delay)
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return stub, server, task, f"http://127.0.0.1:{port}{USERINFO_PATH}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=10.0, help="response delay for slow: tokens, seconds")
+    args = parser.parse_args()
+
+    uvicorn.run(create_stub_app(args.delay), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
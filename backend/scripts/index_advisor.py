@@ -0,0 +1,242 @@
+"""
+Index advisor: EXPLAIN (ANALYZE, BUFFERS) every query the app issues.
+
+Runs the functions in app.db.queries against a seeded database through a
+connection pool whose cursors explain each statement before executing it.
+Reads use the most active user; writes use a throwaway user that is
+deleted afterwards. Each plan is analyzed inside a savepoint that is
+rolled back, so explaining a write doesn't apply it twice.
+
+Reports, per query function and statement: execution time, shared buffers
+hit/read, and any sequential scans. On a small seeded database the planner
+often prefers a seq scan even when a usable index exists; --no-seqscan
+sets enable_seqscan = off so that a remaining seq scan means no index
+covers the path.
+
+Exits non-zero if any statement does a seq scan on a table listed in
+--large-tables or runs slower than --slow-ms, or if a public function in
+app.db.queries never ran, so new queries can't slip past the workload.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/index_advisor.py [--no-seqscan] [--slow-ms 20]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import inspect
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.config import settings
+from app.core.security import get_password_hash, token_digest
+from app.db import connection
+from app.db.queries import auth_queries, dashboard_queries, game_queries, profile_queries
+from app.schemas.game import DrawingAttempt, GameSession, GameSessionComplete
+
+# (function, statement) -> {"ms": float, "hit": int, "read": int, "seq_scans": set, "calls": int}
+plans = {}
+
+
+def calling_query_function():
+    """Name of the innermost app.db.queries function on the stack"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.db.queries.") and not frame.f_code.co_name.startswith("_"):
+            return f"{module.rsplit('.', 1)[1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def collect(node, seq_scans):
+    if node.get("Node Type") == "Seq Scan":
+        seq_scans.add(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        collect(child, seq_scans)
+
+
+QUERY_MODULES = (auth_queries, dashboard_queries, game_queries, profile_queries)
+
+
+def query_functions():
+    """Names of the public query functions, as calling_query_function reports them"""
+    return {
+        f"{module.__name__.rsplit('.', 1)[1]}.{name}"
+        for module in QUERY_MODULES
+        for name, function in vars(module).items()
+        if not name.startswith("_")
+        and (inspect.iscoroutinefunction(function) or inspect.isasyncgenfunction(function))
+        and function.__module__ == module.__name__
+    }
+
+
+class ExplainingCursor(psycopg.AsyncCursor):
+    """Explains every statement (in a rolled-back savepoint), then runs it for real"""
+
+    async def execute(self, query, params=None, **kwargs):
+        await self.explain(query, params)
+        return await super().execute(query, params, **kwargs)
+
+    async def stream(self, query, params=None, **kwargs):
+        await self.explain(query, params)
+        async for record in super().stream(query, params, **kwargs):
+            yield record
+
+    async def explain(self, query, params):
+        function = calling_query_function()
+        if function is None:
+            # The advisor's own setup and cleanup statements
+            return
+
+        statement = " ".join(str(query).split())
+        async with self.connection.transaction(force_rollback=True):
+            async with psycopg.AsyncCursor(self.connection) as explain:
+                await explain.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+                plan = (await explain.fetchone())[0][0]
+
+        seq_scans = set()
+        collect(plan["Plan"], seq_scans)
+        entry = plans.setdefault(
+            (function, statement),
+            {"ms": 0.0, "hit": 0, "read": 0, "seq_scans": set(), "calls": 0}
+        )
+        entry["calls"] += 1
+        entry["ms"] = max(entry["ms"], plan["Execution Time"] + sum(
+            trigger["Time"] for trigger in plan.get("Triggers", ())
+        ))
+        entry["hit"] = max(entry["hit"], plan["Plan"].get("Shared Hit Blocks", 0))
+        entry["read"] = max(entry["read"], plan["Plan"].get("Shared Read Blocks", 0))
+        entry["seq_scans"] |= seq_scans
+
+
+async def run_read_workload():
+    async with connection.get_db_cursor() as cur:
+        await cur.execute("SELECT user_id FROM drawing_attempts GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1")
+        row = await cur.fetchone()
+        if row is None:
+            raise SystemExit("No attempts found; seed the database first (scripts/seed.py)")
+        user_id = row[0]
+        await cur.execute("SELECT username, email FROM users WHERE id = %s", (user_id,))
+        username, email = await cur.fetchone()
+
+    await auth_queries.get_user(username)
+    await auth_queries.get_user_by_email(email)
+    await auth_queries.is_token_revoked(token_digest("not-a-token"))
+    await auth_queries.count_revoked_tokens()
+    async for _ in auth_queries.iter_revoked_tokens():
+        pass
+    async for _ in auth_queries.iter_revoked_tokens(since=datetime.now(timezone.utc) - timedelta(minutes=5)):
+        pass
+    await dashboard_queries.get_user_overall_stats(user_id)
+    await dashboard_queries.get_weekly_progress(user_id)
+    await dashboard_queries.get_difficulty_stats(user_id)
+    await dashboard_queries.get_recent_activities(user_id, 10)
+    await dashboard_queries.get_performance_metrics(user_id)
+    await dashboard_queries.get_dashboard_panels(user_id, dashboard_queries.DASHBOARD_PANELS)
+    first_page = await dashboard_queries.get_user_sessions(user_id, limit=10)
+    if first_page:
+        await dashboard_queries.get_user_sessions(user_id, limit=10, before_id=first_page[-1]["id"])
+        await dashboard_queries.get_session_details(user_id, first_page[0]["id"])
+    await game_queries.get_leaderboard(None)
+    await game_queries.get_leaderboard(user_id)
+    await profile_queries.get_user_profile_data(user_id)
+
+
+async def run_write_workload():
+    name = f"advisor_{uuid.uuid4().hex[:8]}"
+    token = f"advisor-{uuid.uuid4().hex}"
+    password_hash = get_password_hash("advisor")
+    user_id = await auth_queries.create_new_user({
+        "username": name,
+        "password": password_hash,
+        "email": f"{name}@advisor.local",
+        "name": name,
+    })
+    try:
+        # The username is taken, so this also exercises the suffix branch
+        await auth_queries.create_oauth_user(name, f"{name}_oauth@advisor.local", None, password_hash)
+        session_id = await game_queries.create_game_session(GameSession(user_id=user_id))
+        attempt = dict(
+            session_id=session_id, user_id=user_id, word_prompt="cat", difficulty="EASY",
+            is_correct=True, drawing_time_ms=2500, recognition_accuracy=0.9
+        )
+        await game_queries.save_drawing_attempt(DrawingAttempt(**attempt))
+        await game_queries.save_drawing_attempts([DrawingAttempt(**attempt) for _ in range(5)])
+        await game_queries.complete_game_session(session_id, GameSessionComplete(
+            session_id=session_id, total_score=6, total_attempts=6, total_time_seconds=30, username=name
+        ))
+        await profile_queries.update_user_password(user_id, "advisor", "advisor2")
+        await auth_queries.reset_user_password(f"{name}@advisor.local", password_hash)
+        await auth_queries.update_password_hash(user_id, password_hash, get_password_hash("advisor"))
+        await auth_queries.revoke_token(token_digest(token), datetime.now(timezone.utc) + timedelta(minutes=5))
+        await auth_queries.prune_revoked_tokens()
+    finally:
+        async with connection.get_db_cursor() as cur:
+            await cur.execute("DELETE FROM revoked_tokens WHERE token_hash = %s", (token_digest(token),))
+            await cur.execute("DELETE FROM users WHERE email LIKE %s", (f"{name}%",))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-seqscan", action="store_true", help="SET enable_seqscan = off on every connection")
+    parser.add_argument("--slow-ms", type=float, default=20.0, help="flag statements slower than this")
+    parser.add_argument(
+        "--large-tables", nargs="*", default=["drawing_attempts", "game_sessions"],
+        help="tables where a seq scan counts as a finding"
+    )
+    parser.add_argument("--skip-writes", action="store_true", help="only run the read workload")
+    args = parser.parse_args()
+
+    kwargs = {"cursor_factory": ExplainingCursor}
+    if args.no_seqscan:
+        kwargs["options"] = "-c enable_seqscan=off"
+
+    # Swap in a pool whose connections hand out explaining cursors
+    connection.connection_pool = AsyncConnectionPool(
+        settings.DATABASE_URL,
+        min_size=1,
+        max_size=2,
+        kwargs=kwargs,
+        open=False
+    )
+    await connection.connection_pool.open(wait=True)
+    try:
+        await run_read_workload()
+        if not args.skip_writes:
+            await run_write_workload()
+    finally:
+        await connection.close_all_connections()
+
+    findings = 0
+    for (function, statement), entry in sorted(plans.items()):
+        flagged_scans = sorted(entry["seq_scans"] & set(args.large_tables))
+        slow = entry["ms"] > args.slow_ms
+        findings += bool(flagged_scans) + slow
+        marker = "!!" if flagged_scans or slow else "  "
+        print(f"{marker} {function}  ({entry['calls']} call(s))")
+        print(f"     {statement[:140]}{'...' if len(statement) > 140 else ''}")
+        print(
+            f"     {entry['ms']:.3f} ms  buffers hit={entry['hit']} read={entry['read']}"
+            f"  seq scans: {', '.join(sorted(entry['seq_scans'])) or 'none'}"
+            f"{'  SLOW' if slow else ''}"
+        )
+
+    skipped = query_functions() - {function for function, _ in plans}
+    if not args.skip_writes:
+        findings += len(skipped)
+    for function in sorted(skipped):
+        print(f"{'  ' if args.skip_writes else '!!'} {function}  (not run by the workload)")
+
+    print(f"\n{len(plans)} statement(s) explained, {findings} finding(s)")
+    if findings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,7 +2,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.connection import get_db_connection, init_connection_pool
+from app.core.config import BCRYPT_PROFILE_ROUNDS
+from app.core.security import build_password_context
+from app.db.connection import get_sync_db_connection
 from seed_data.users import USERS
 from seed_data.words import WORD_DIFFICULTY
 from seed_data.utils import generate_session_times, generate_drawing_metrics
@@ -14,11 +16,15 @@ from datetime import timedelta, datetime
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Seed users get the fast profile's cost; the app upgrades each hash to the
+# configured cost the first time that user logs in
+seed_password_context = build_password_context(BCRYPT_PROFILE_ROUNDS["fast"])
+
 def seed_users(conn, users):
     with conn.cursor() as cur:
         # Batch insert all users at once
         args_str = ','.join(cur.mogrify("(%s,%s,%s,%s)", 
-            (user['username'], user['password'], user['email'], user['name'])).decode('utf-8') 
+            (user['username'], seed_password_context.hash(user['password']), user['email'], user['name'])) 
             for user in users)
         cur.execute(f"""
             INSERT INTO users (username, password, email, name)
@@ -32,6 +38,7 @@ def seed_game_sessions_and_attempts(conn, user_ids):
     with conn.cursor() as cur:
         all_session_values = []
         all_attempt_values = [] 
+        planned_attempts = {}
         
         # First, generate all sessions and attempts data
         for user_id in user_ids:
@@ -41,25 +48,25 @@ def seed_game_sessions_and_attempts(conn, user_ids):
             # Generate session values
             for start_time, end_time in sessions:
                 total_time = int((end_time - start_time).total_seconds())
-                total_attempts = random.randint(12, 15)
-                successful = random.randint(int(total_attempts * 0.7), total_attempts)
                 avg_time = random.randint(2300, 2800)
+                planned_attempts[(user_id, start_time)] = random.randint(12, 15)
                 
                 all_session_values.append((
                     user_id, start_time, end_time, total_time,
-                    total_attempts, successful, successful,
-                    avg_time, random.randint(3, 5)
+                    0, 0, 0,
+                    avg_time, 0, 0
                 ))
 
-        # Batch insert all sessions first
+        # Batch insert all sessions first. Attempt counts, score and streaks start at
+        # zero: the attempts trigger adds each inserted attempt to them
         if all_session_values:
-            args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s,%s)", v).decode('utf-8') 
+            args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", v) 
                                for v in all_session_values)
             cur.execute(f"""
                 INSERT INTO game_sessions 
                 (user_id, start_time, end_time, total_time_seconds, 
                  total_attempts, successful_attempts, total_score,
-                 avg_drawing_time_ms, streak_count)
+                 avg_drawing_time_ms, streak_count, current_streak)
                 VALUES {args_str}
                 RETURNING id, user_id, start_time;
             """)
@@ -67,7 +74,7 @@ def seed_game_sessions_and_attempts(conn, user_ids):
 
         # Now generate attempts for each session
         for session_id, user_id, session_start in session_results:
-            num_attempts = next(s[4] for s in all_session_values if s[0] == user_id)  # total_attempts
+            num_attempts = planned_attempts[(user_id, session_start)]
             
             # Generate attempts for this session
             for i in range(num_attempts):
@@ -87,7 +94,7 @@ def seed_game_sessions_and_attempts(conn, user_ids):
 
         # Batch insert all attempts
         if all_attempt_values:
-            args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s)", v).decode('utf-8') 
+            args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s)", v) 
                                for v in all_attempt_values)
             cur.execute(f"""
                 INSERT INTO drawing_attempts 
@@ -105,7 +112,7 @@ def seed_user_metrics(conn, user_ids):
             for user_id in user_ids
         ]
         
-        args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", v).decode('utf-8') 
+        args_str = ','.join(cur.mogrify("(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", v) 
                            for v in metrics_values)
         cur.execute(f"""
             INSERT INTO user_metrics 
@@ -122,10 +129,9 @@ def seed_user_metrics(conn, user_ids):
 
 def main():
     try:
-        init_connection_pool()
-        logger.info("Connected to database successfully!")
+        with get_sync_db_connection() as conn:
+            logger.info("Connected to database successfully!")
 
-        with get_db_connection() as conn:
             logger.info("Seeding users...")
             user_ids = seed_users(conn, USERS)
             
@@ -149,10 +155,6 @@ def main():
     except Exception as e:
         logger.error(f"Error during seeding: {e}")
         raise
-    finally:
-        from app.db.connection import close_all_connections
-        close_all_connections()
-        logger.info("Closed all database connections")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+"""
+Synthetic doodles for benchmarks and smoke tests.
+
+Each label gets a fixed template of a few random strokes, seeded by the
+label. Every sample is that template with a random scale, shift, rotation
+and wobble, drawn in black 3 px lines on a white canvas like the game's. The
+samples are not real drawings of the word. They are only good for timing,
+payload sizes and plumbing checks, and as a separable toy dataset.
+"""
+import io
+import math
+import zlib
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+CANVAS_SIZE = (800, 500)
+LINE_WIDTH = 3
+
+
+def label_template(label, strokes=3, points=6):
+    """Strokes as lists of (x, y) in the unit square, the same for a label on every call"""
+    rng = np.random.default_rng(zlib.crc32(label.encode()))
+    return [rng.uniform(0.1, 0.9, size=(points, 2)) for _ in range(rng.integers(2, strokes + 2))]
+
+
+def sample_strokes(template, rng, canvas_size=CANVAS_SIZE, wobble=0.03):
+    """One drawing of a template placed on the canvas, as lists of integer points"""
+    width, height = canvas_size
+    scale = rng.uniform(0.3, 0.8) * min(width, height)
+    angle = rng.uniform(-0.3, 0.3)
+    cos, sin = math.cos(angle), math.sin(angle)
+    rotation = np.array([[cos, -sin], [sin, cos]])
+    offset = np.array([rng.uniform(0, width - scale), rng.uniform(0, height - scale)])
+    strokes = []
+    for stroke in template:
+        points = stroke + rng.normal(0, wobble, size=stroke.shape)
+        points = ((points - 0.5) @ rotation.T + 0.5) * scale + offset
+        strokes.append(np.clip(points, 0, [width - 1, height - 1]).astype(int))
+    return strokes
+
+
+def render(strokes, canvas_size=CANVAS_SIZE, mode="RGBA", antialias=False):
+    """antialias draws at 2x and downsamples, for gray stroke edges like a browser canvas's"""
+    scale = 2 if antialias else 1
+    img = Image.new(mode, (canvas_size[0] * scale, canvas_size[1] * scale), "white")
+    draw = ImageDraw.Draw(img)
+    for stroke in strokes:
+        points = [tuple(point * scale) for point in stroke]
+        draw.line(points, fill="black", width=LINE_WIDTH * scale, joint="curve")
+    return img.resize(canvas_size, Image.LANCZOS) if antialias else img
+
+
+def png_bytes(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def encode_strokes(strokes):
+    """The stroke encoding the game client sends (app.services.imaging.decode_strokes)"""
+    values = []
+    for stroke in strokes:
+        stroke = np.asarray(stroke, dtype=np.int32)
+        values.append([len(stroke)])
+        values.append(np.diff(stroke, axis=0, prepend=[[0, 0]]).ravel())
+    return np.concatenate(values).astype("<i2").tobytes()
+
+
+def corpus(labels, count, seed=0, canvas_size=CANVAS_SIZE, antialias=False):
+    """count (label, PIL image) pairs cycling through labels"""
+    rng = np.random.default_rng(seed)
+    templates = {label: label_template(label) for label in labels}
+    for i in range(count):
+        label = labels[i % len(labels)]
+        yield label, render(sample_strokes(templates[label], rng, canvas_size), canvas_size, antialias=antialias)
@@ -0,0 +1,174 @@
+"""
+Train the local CPU doodle classifier (app/services/recognizers/local.py).
+
+The classifier is a softmax regression over 28x28 bitmaps, trained with
+mini-batch gradient descent in numpy. Its labels are the words in
+app.core.words.VOCABULARY; the app can only ever get guesses it has a label for.
+
+--data-dir   a directory of Quick, Draw! numpy bitmaps, one <word>.npy or
+             full_numpy_bitmap_<word>.npy per word
+             (https://github.com/googlecreativelab/quickdraw-dataset).
+             Some words have no Quick, Draw! category (e.g. treehouse);
+             supply bitmaps for them under that name, or pass
+             --allow-missing to train without them, which is reported.
+--synthetic  N synthetic doodles per word from scripts/synthetic_doodles.py.
+             These produce a model with the full label set for plumbing and
+             latency tests; their accuracy says nothing about real drawings.
+
+A random 10% of the samples is held out. Half of it fits the softmax
+temperature that calibrates the model's probabilities. On the other half the
+script reports accuracy and the expected calibration error before and after:
+the gap between how confident the top guess is and how often it is right,
+averaged over confidence bins.
+
+Usage:
+    python scripts/train_local_recognizer.py --data-dir ~/quickdraw --per-class 5000
+    python scripts/train_local_recognizer.py --synthetic 200 --out /tmp/local_recognizer.npz
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.services.recognizers.local import BITMAP_SIZE, image_to_bitmap, normalize_bitmaps, softmax
+
+
+def load_quickdraw(data_dir, per_class, rng, allow_missing=False):
+    samples, targets, labels, missing = [], [], [], []
+    for word in VOCABULARY:
+        for name in (f"{word}.npy", f"full_numpy_bitmap_{word}.npy"):
+            path = os.path.join(data_dir, name)
+            if os.path.exists(path):
+                break
+        else:
+            missing.append(word)
+            continue
+        bitmaps = np.load(path, mmap_mode="r")
+        picked = rng.choice(len(bitmaps), size=min(per_class, len(bitmaps)), replace=False)
+        samples.append(normalize_bitmaps(bitmaps[np.sort(picked)]))
+        targets.append(np.full(len(picked), len(labels)))
+        labels.append(word)
+    if not labels:
+        raise SystemExit(f"no Quick, Draw! bitmaps for the vocabulary in {data_dir}")
+    if missing:
+        message = (
+            f"no bitmaps in {data_dir} for {len(missing)} of {len(VOCABULARY)} vocabulary words, "
+            f"which the model could never guess: {', '.join(missing)}"
+        )
+        if not allow_missing:
+            raise SystemExit(f"{message}\nAdd <word>.npy files for them, or pass --allow-missing to train without them")
+        print(f"WARNING: {message}")
+    return np.concatenate(samples), np.concatenate(targets), labels
+
+
+def load_synthetic(per_class, seed):
+    from synthetic_doodles import corpus
+
+    labels = list(VOCABULARY)
+    samples = np.empty((per_class * len(labels), BITMAP_SIZE * BITMAP_SIZE), dtype=np.float32)
+    targets = np.empty(len(samples), dtype=np.int64)
+    index = {label: i for i, label in enumerate(labels)}
+    for i, (label, img) in enumerate(corpus(labels, len(samples), seed=seed)):
+        samples[i] = image_to_bitmap(img)
+        targets[i] = index[label]
+    return samples, targets, labels
+
+
+def train(x, y, classes, epochs, learning_rate, l2, batch_size, rng):
+    weights = np.zeros((x.shape[1], classes), dtype=np.float32)
+    bias = np.zeros(classes, dtype=np.float32)
+    for epoch in range(epochs):
+        order = rng.permutation(len(x))
+        loss = 0.0
+        for start in range(0, len(x), batch_size):
+            batch = order[start:start + batch_size]
+            probabilities = softmax(x[batch] @ weights + bias)
+            loss -= np.log(probabilities[np.arange(len(batch)), y[batch]] + 1e-9).sum()
+            # Gradient of the mean cross-entropy
+            probabilities[np.arange(len(batch)), y[batch]] -= 1
+            probabilities /= len(batch)
+            weights -= learning_rate * (x[batch].T @ probabilities + l2 * weights)
+            bias -= learning_rate * probabilities.sum(axis=0)
+        print(f"epoch {epoch + 1}/{epochs}: loss {loss / len(x):.3f}")
+    return weights, bias
+
+
+def fit_temperature(logits, y):
+    """The temperature that minimizes the negative log-likelihood of y, by grid search in log space"""
+    temperatures = np.exp(np.linspace(np.log(0.05), np.log(20), 200))
+    losses = [-np.log(softmax(logits / t)[np.arange(len(y)), y] + 1e-9).mean() for t in temperatures]
+    return float(temperatures[int(np.argmin(losses))])
+
+
+def calibration_error(probabilities, y, bins=15):
+    confidence = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == y
+    which = np.minimum((confidence * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        in_bin = which == b
+        if in_bin.any():
+            error += in_bin.mean() * abs(confidence[in_bin].mean() - correct[in_bin].mean())
+    return error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data-dir")
+    source.add_argument("--synthetic", type=int, metavar="N")
+    parser.add_argument("--per-class", type=int, default=5000, help="Quick, Draw! samples per word")
+    parser.add_argument(
+        "--allow-missing", action="store_true",
+        help="train without vocabulary words that have no bitmaps instead of failing"
+    )
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=settings.LOCAL_RECOGNIZER_WEIGHTS)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    started = time.perf_counter()
+    if args.data_dir:
+        x, y, labels = load_quickdraw(args.data_dir, args.per_class, rng, args.allow_missing)
+    else:
+        x, y, labels = load_synthetic(args.synthetic, args.seed)
+    print(f"{len(x):,} samples over {len(labels)} words, loaded in {time.perf_counter() - started:.1f} s")
+
+    order = rng.permutation(len(x))
+    holdout = order[:len(x) // 10]
+    calibration, evaluation = holdout[:len(holdout) // 2], holdout[len(holdout) // 2:]
+    training = order[len(x) // 10:]
+    started = time.perf_counter()
+    weights, bias = train(
+        x[training], y[training], len(labels), args.epochs, args.learning_rate, args.l2, args.batch_size, rng
+    )
+    logits = x[evaluation] @ weights + bias
+    accuracy = (logits.argmax(axis=1) == y[evaluation]).mean()
+    print(f"trained in {time.perf_counter() - started:.1f} s, holdout accuracy {accuracy:.1%}")
+    temperature = fit_temperature(x[calibration] @ weights + bias, y[calibration])
+    print(
+        f"temperature {temperature:.2f}, calibration error "
+        f"{calibration_error(softmax(logits), y[evaluation]):.3f} -> "
+        f"{calibration_error(softmax(logits / temperature), y[evaluation]):.3f}"
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    np.savez_compressed(args.out, weights=weights, bias=bias, labels=np.array(labels), temperature=temperature)
+    print(f"wrote {args.out}")
+    uncovered = [word for word in VOCABULARY if word not in labels]
+    if uncovered:
+        print(f"WARNING: {len(uncovered)} vocabulary word(s) have no class: {', '.join(uncovered)}")
+
+
+if __name__ == "__main__":
+    main()
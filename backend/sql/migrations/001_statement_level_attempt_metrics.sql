@@ -0,0 +1,146 @@
+-- Migration 001: per-statement metric maintenance for batched attempt inserts.
+-- Replaces the FOR EACH ROW trigger with a statement-level trigger over a
+-- transition table, so a multi-row INSERT from /api/game/attempts updates each
+-- touched session and user once.
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS trg_update_user_metrics ON drawing_attempts;
+
+-- Trigger to update user metrics.
+-- Runs once per INSERT statement over the inserted rows (new_attempts), so a
+-- batch of attempts costs one recomputation per touched session, not one per row.
+CREATE OR REPLACE FUNCTION update_user_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Update game session statistics for every session touched by the batch
+    WITH consecutive_correct AS (
+        SELECT 
+            da.session_id,
+            da.is_correct,
+            row_number() OVER (PARTITION BY da.session_id ORDER BY da.created_at, da.id) - 
+            row_number() OVER (PARTITION BY da.session_id, da.is_correct ORDER BY da.created_at, da.id) as grp
+        FROM drawing_attempts da
+        WHERE da.session_id IN (SELECT DISTINCT session_id FROM new_attempts)
+    ),
+    session_stats AS (
+        SELECT 
+            session_id,
+            COUNT(*) FILTER (WHERE is_correct) as successful,
+            COUNT(*) as total
+        FROM consecutive_correct
+        GROUP BY session_id
+    ),
+    session_streaks AS (
+        SELECT session_id, MAX(cnt) as streak
+        FROM (
+            SELECT session_id, COUNT(*) as cnt
+            FROM consecutive_correct
+            WHERE is_correct = true
+            GROUP BY session_id, grp
+        ) as streak_counts
+        GROUP BY session_id
+    )
+    UPDATE game_sessions gs
+    SET 
+        streak_count = COALESCE(ss.streak, 0),
+        successful_attempts = st.successful,
+        total_score = st.successful,  -- Update total_score based on successful attempts
+        total_attempts = st.total
+    FROM session_stats st
+    LEFT JOIN session_streaks ss ON ss.session_id = st.session_id
+    WHERE gs.id = st.session_id;
+
+    -- Update user metrics with one upsert per user in the batch
+    INSERT INTO user_metrics (
+        user_id,
+        total_attempts,
+        successful_attempts,
+        avg_drawing_time_ms,
+        fastest_correct_ms,
+        highest_streak,
+        best_score
+    )
+    SELECT 
+        b.user_id,
+        b.total,
+        b.successful,
+        b.avg_time,
+        b.fastest_correct,
+        s.streak,
+        s.score
+    FROM (
+        SELECT 
+            user_id,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful,
+            AVG(drawing_time_ms)::integer as avg_time,
+            MIN(drawing_time_ms) FILTER (WHERE is_correct) as fastest_correct
+        FROM new_attempts
+        GROUP BY user_id
+    ) b
+    JOIN (
+        SELECT na.user_id, MAX(gs.streak_count) as streak, MAX(gs.successful_attempts) as score
+        FROM (SELECT DISTINCT user_id, session_id FROM new_attempts) na
+        JOIN game_sessions gs ON gs.id = na.session_id
+        GROUP BY na.user_id
+    ) s ON s.user_id = b.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_attempts = user_metrics.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_metrics.successful_attempts + EXCLUDED.successful_attempts,
+        avg_drawing_time_ms = (
+            (user_metrics.avg_drawing_time_ms * user_metrics.total_attempts + 
+             EXCLUDED.avg_drawing_time_ms * EXCLUDED.total_attempts) / 
+            (user_metrics.total_attempts + EXCLUDED.total_attempts)
+        ),
+        -- LEAST/GREATEST ignore NULLs, so batches without a correct attempt keep the old value
+        fastest_correct_ms = LEAST(user_metrics.fastest_correct_ms, EXCLUDED.fastest_correct_ms),
+        highest_streak = GREATEST(user_metrics.highest_streak, EXCLUDED.highest_streak),
+        best_score = GREATEST(user_metrics.best_score, EXCLUDED.best_score),
+        last_updated = CURRENT_TIMESTAMP;
+
+    -- Update difficulty-specific accuracy.
+    -- Each correct attempt halves the old value and adds half its own accuracy,
+    -- so k attempts fold to: old * 0.5^k + sum(accuracy_i * 0.5^(k - i + 1)).
+    WITH ordered AS (
+        SELECT 
+            user_id,
+            difficulty,
+            recognition_accuracy,
+            row_number() OVER w as pos,
+            COUNT(*) OVER (PARTITION BY user_id, difficulty) as k
+        FROM new_attempts
+        WHERE is_correct AND recognition_accuracy IS NOT NULL
+        WINDOW w AS (PARTITION BY user_id, difficulty ORDER BY created_at, id)
+    ),
+    folded AS (
+        SELECT 
+            user_id,
+            MAX(k) FILTER (WHERE difficulty = 'EASY') as easy_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'EASY') as easy_sum,
+            MAX(k) FILTER (WHERE difficulty = 'MEDIUM') as medium_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'MEDIUM') as medium_sum,
+            MAX(k) FILTER (WHERE difficulty = 'HARD') as hard_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'HARD') as hard_sum
+        FROM ordered
+        GROUP BY user_id
+    )
+    UPDATE user_metrics um
+    SET 
+        easy_accuracy = COALESCE(um.easy_accuracy * power(0.5, f.easy_k) + f.easy_sum, um.easy_accuracy),
+        medium_accuracy = COALESCE(um.medium_accuracy * power(0.5, f.medium_k) + f.medium_sum, um.medium_accuracy),
+        hard_accuracy = COALESCE(um.hard_accuracy * power(0.5, f.hard_k) + f.hard_sum, um.hard_accuracy)
+    FROM folded f
+    WHERE um.user_id = f.user_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_update_user_metrics
+AFTER INSERT ON drawing_attempts
+REFERENCING NEW TABLE AS new_attempts
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_user_metrics();
+
+COMMIT;
@@ -0,0 +1,160 @@
+-- Migration 002: constant-time streak maintenance on attempt insert.
+-- Stores the trailing run of correct attempts on game_sessions so the metrics
+-- trigger advances streaks from saved state instead of re-scanning the session.
+
+BEGIN;
+
+ALTER TABLE game_sessions ADD COLUMN IF NOT EXISTS current_streak INTEGER DEFAULT 0;
+
+-- Backfill: correct attempts after the last incorrect one in each session
+UPDATE game_sessions gs
+SET current_streak = t.run
+FROM (
+    SELECT da.session_id, COUNT(*) as run
+    FROM drawing_attempts da
+    WHERE da.is_correct
+      AND NOT EXISTS (
+          SELECT 1
+          FROM drawing_attempts later
+          WHERE later.session_id = da.session_id
+            AND NOT later.is_correct
+            AND (later.created_at, later.id) > (da.created_at, da.id)
+      )
+    GROUP BY da.session_id
+) t
+WHERE gs.id = t.session_id;
+
+-- Trigger to update user metrics.
+-- Runs once per INSERT statement over the inserted rows (new_attempts). Session
+-- streaks and counts are advanced from the state stored on game_sessions, so the
+-- work per inserted attempt is constant no matter how long the session is.
+CREATE OR REPLACE FUNCTION update_user_metrics()
+RETURNS TRIGGER AS $$
+DECLARE
+    batch record;
+    correct boolean;
+    run integer;
+    best integer;
+BEGIN
+    -- Update game session statistics for every session touched by the batch
+    FOR batch IN
+        SELECT 
+            session_id,
+            array_agg(is_correct ORDER BY created_at, id) as results,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful
+        FROM new_attempts
+        GROUP BY session_id
+    LOOP
+        SELECT COALESCE(current_streak, 0), COALESCE(streak_count, 0)
+        INTO run, best
+        FROM game_sessions
+        WHERE id = batch.session_id
+        FOR UPDATE;
+
+        FOREACH correct IN ARRAY batch.results LOOP
+            IF correct THEN
+                run := run + 1;
+                best := GREATEST(best, run);
+            ELSE
+                run := 0;
+            END IF;
+        END LOOP;
+
+        UPDATE game_sessions
+        SET 
+            current_streak = run,
+            streak_count = best,
+            successful_attempts = COALESCE(successful_attempts, 0) + batch.successful,
+            total_score = COALESCE(successful_attempts, 0) + batch.successful,  -- Update total_score based on successful attempts
+            total_attempts = COALESCE(total_attempts, 0) + batch.total
+        WHERE id = batch.session_id;
+    END LOOP;
+
+    -- Update user metrics with one upsert per user in the batch
+    INSERT INTO user_metrics (
+        user_id,
+        total_attempts,
+        successful_attempts,
+        avg_drawing_time_ms,
+        fastest_correct_ms,
+        highest_streak,
+        best_score
+    )
+    SELECT 
+        b.user_id,
+        b.total,
+        b.successful,
+        b.avg_time,
+        b.fastest_correct,
+        s.streak,
+        s.score
+    FROM (
+        SELECT 
+            user_id,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful,
+            AVG(drawing_time_ms)::integer as avg_time,
+            MIN(drawing_time_ms) FILTER (WHERE is_correct) as fastest_correct
+        FROM new_attempts
+        GROUP BY user_id
+    ) b
+    JOIN (
+        SELECT na.user_id, MAX(gs.streak_count) as streak, MAX(gs.successful_attempts) as score
+        FROM (SELECT DISTINCT user_id, session_id FROM new_attempts) na
+        JOIN game_sessions gs ON gs.id = na.session_id
+        GROUP BY na.user_id
+    ) s ON s.user_id = b.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_attempts = user_metrics.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_metrics.successful_attempts + EXCLUDED.successful_attempts,
+        avg_drawing_time_ms = (
+            (user_metrics.avg_drawing_time_ms * user_metrics.total_attempts + 
+             EXCLUDED.avg_drawing_time_ms * EXCLUDED.total_attempts) / 
+            (user_metrics.total_attempts + EXCLUDED.total_attempts)
+        ),
+        -- LEAST/GREATEST ignore NULLs, so batches without a correct attempt keep the old value
+        fastest_correct_ms = LEAST(user_metrics.fastest_correct_ms, EXCLUDED.fastest_correct_ms),
+        highest_streak = GREATEST(user_metrics.highest_streak, EXCLUDED.highest_streak),
+        best_score = GREATEST(user_metrics.best_score, EXCLUDED.best_score),
+        last_updated = CURRENT_TIMESTAMP;
+
+    -- Update difficulty-specific accuracy.
+    -- Each correct attempt halves the old value and adds half its own accuracy,
+    -- so k attempts fold to: old * 0.5^k + sum(accuracy_i * 0.5^(k - i + 1)).
+    WITH ordered AS (
+        SELECT 
+            user_id,
+            difficulty,
+            recognition_accuracy,
+            row_number() OVER w as pos,
+            COUNT(*) OVER (PARTITION BY user_id, difficulty) as k
+        FROM new_attempts
+        WHERE is_correct AND recognition_accuracy IS NOT NULL
+        WINDOW w AS (PARTITION BY user_id, difficulty ORDER BY created_at, id)
+    ),
+    folded AS (
+        SELECT 
+            user_id,
+            MAX(k) FILTER (WHERE difficulty = 'EASY') as easy_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'EASY') as easy_sum,
+            MAX(k) FILTER (WHERE difficulty = 'MEDIUM') as medium_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'MEDIUM') as medium_sum,
+            MAX(k) FILTER (WHERE difficulty = 'HARD') as hard_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'HARD') as hard_sum
+        FROM ordered
+        GROUP BY user_id
+    )
+    UPDATE user_metrics um
+    SET 
+        easy_accuracy = COALESCE(um.easy_accuracy * power(0.5, f.easy_k) + f.easy_sum, um.easy_accuracy),
+        medium_accuracy = COALESCE(um.medium_accuracy * power(0.5, f.medium_k) + f.medium_sum, um.medium_accuracy),
+        hard_accuracy = COALESCE(um.hard_accuracy * power(0.5, f.hard_k) + f.hard_sum, um.hard_accuracy)
+    FROM folded f
+    WHERE um.user_id = f.user_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
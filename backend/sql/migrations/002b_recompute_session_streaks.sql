@@ -0,0 +1,52 @@
+-- Migration 002b: second half of 002's backfill, recomputing game_sessions.streak_count.
+-- From 002 on, the metrics trigger advances streak_count from its stored value
+-- instead of re-deriving it from the session's attempts, but 002 only backfilled
+-- current_streak. Sessions completed before it still hold their number of correct
+-- attempts in streak_count (the old completion query wrote that) rather than their
+-- longest run. This restores the longest run for every session with attempts, and
+-- user_metrics.highest_streak along with it. It sorts before 003 and 004, which
+-- copy streak_count into leaderboard_stats.best_streak and match it for
+-- highest_streak_date.
+
+BEGIN;
+
+-- Gaps and islands: within a session, the attempt's position minus its position
+-- among attempts with the same outcome is constant along a run of that outcome
+UPDATE game_sessions gs
+SET streak_count = COALESCE(best.run, 0)
+FROM (
+    SELECT DISTINCT session_id FROM drawing_attempts WHERE session_id IS NOT NULL
+) touched
+LEFT JOIN (
+    SELECT session_id, MAX(run) as run
+    FROM (
+        SELECT session_id, COUNT(*) as run
+        FROM (
+            SELECT 
+                session_id,
+                COALESCE(is_correct, false) as correct,
+                ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY created_at, id)
+                    - ROW_NUMBER() OVER (PARTITION BY session_id, COALESCE(is_correct, false) ORDER BY created_at, id) as island
+            FROM drawing_attempts
+            WHERE session_id IS NOT NULL
+        ) attempts
+        WHERE correct
+        GROUP BY session_id, island
+    ) runs
+    GROUP BY session_id
+) best ON best.session_id = touched.session_id
+WHERE gs.id = touched.session_id
+  AND gs.streak_count IS DISTINCT FROM COALESCE(best.run, 0);
+
+-- highest_streak was raised from the same inflated values
+UPDATE user_metrics um
+SET highest_streak = s.streak
+FROM (
+    SELECT user_id, COALESCE(MAX(streak_count), 0) as streak
+    FROM game_sessions
+    GROUP BY user_id
+) s
+WHERE um.user_id = s.user_id
+  AND um.highest_streak IS DISTINCT FROM s.streak;
+
+COMMIT;
@@ -0,0 +1,109 @@
+-- Migration 003: materialized leaderboard.
+-- Creates leaderboard_stats with its maintenance triggers and backfills it
+-- from the existing sessions.
+
+BEGIN;
+
+-- Leaderboard totals per user, maintained by triggers on users and game_sessions
+-- so /api/game/leaderboard reads a small indexed table instead of aggregating
+-- every session on each request.
+CREATE TABLE IF NOT EXISTS leaderboard_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    total_score BIGINT NOT NULL DEFAULT 0,
+    total_attempts BIGINT NOT NULL DEFAULT 0,
+    avg_time_sum BIGINT NOT NULL DEFAULT 0,  -- sum of sessions' avg_drawing_time_ms
+    avg_time_count INTEGER NOT NULL DEFAULT 0,  -- sessions with a non-NULL avg_drawing_time_ms
+    best_streak INTEGER  -- NULL until the user has a session
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard_stats(total_score DESC);
+
+CREATE OR REPLACE FUNCTION add_leaderboard_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO leaderboard_stats (user_id) VALUES (NEW.id)
+    ON CONFLICT (user_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_leaderboard_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Remove the old version of the session from its owner's totals
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE leaderboard_stats
+        SET 
+            games_played = games_played - 1,
+            total_score = total_score - COALESCE(OLD.total_score, 0),
+            total_attempts = total_attempts - COALESCE(OLD.total_attempts, 0),
+            avg_time_sum = avg_time_sum - COALESCE(OLD.avg_drawing_time_ms, 0),
+            avg_time_count = avg_time_count - (OLD.avg_drawing_time_ms IS NOT NULL)::integer
+        WHERE user_id = OLD.user_id;
+    END IF;
+
+    -- Add the new version
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO leaderboard_stats (
+            user_id, games_played, total_score, total_attempts, avg_time_sum, avg_time_count, best_streak
+        )
+        VALUES (
+            NEW.user_id,
+            1,
+            COALESCE(NEW.total_score, 0),
+            COALESCE(NEW.total_attempts, 0),
+            COALESCE(NEW.avg_drawing_time_ms, 0),
+            (NEW.avg_drawing_time_ms IS NOT NULL)::integer,
+            NEW.streak_count
+        )
+        ON CONFLICT (user_id) DO UPDATE SET
+            games_played = leaderboard_stats.games_played + 1,
+            total_score = leaderboard_stats.total_score + EXCLUDED.total_score,
+            total_attempts = leaderboard_stats.total_attempts + EXCLUDED.total_attempts,
+            avg_time_sum = leaderboard_stats.avg_time_sum + EXCLUDED.avg_time_sum,
+            avg_time_count = leaderboard_stats.avg_time_count + EXCLUDED.avg_time_count,
+            best_streak = GREATEST(leaderboard_stats.best_streak, EXCLUDED.best_streak);
+    END IF;
+
+    -- A maximum can't be decremented; rescan the owner's sessions only when
+    -- the session holding the best streak shrank or went away (rare)
+    IF TG_OP = 'DELETE'
+        OR (TG_OP = 'UPDATE' AND (NEW.user_id <> OLD.user_id OR NEW.streak_count < OLD.streak_count)) THEN
+        UPDATE leaderboard_stats
+        SET best_streak = (SELECT MAX(streak_count) FROM game_sessions WHERE user_id = OLD.user_id)
+        WHERE user_id = OLD.user_id
+          AND best_streak IS NOT DISTINCT FROM OLD.streak_count;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_add_leaderboard_user
+AFTER INSERT ON users
+FOR EACH ROW
+EXECUTE FUNCTION add_leaderboard_user();
+
+CREATE TRIGGER trg_update_leaderboard_stats
+AFTER INSERT OR UPDATE OR DELETE ON game_sessions
+FOR EACH ROW
+EXECUTE FUNCTION update_leaderboard_stats();
+
+INSERT INTO leaderboard_stats (
+    user_id, games_played, total_score, total_attempts, avg_time_sum, avg_time_count, best_streak
+)
+SELECT 
+    u.id,
+    COUNT(gs.id),
+    COALESCE(SUM(gs.total_score), 0),
+    COALESCE(SUM(gs.total_attempts), 0),
+    COALESCE(SUM(gs.avg_drawing_time_ms), 0),
+    COUNT(gs.avg_drawing_time_ms),
+    MAX(gs.streak_count)
+FROM users u
+LEFT JOIN game_sessions gs ON gs.user_id = u.id
+GROUP BY u.id
+ON CONFLICT (user_id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,196 @@
+-- Migration 004: store performance record dates on user_metrics.
+-- The dashboard performance panel used to derive these dates by joining every
+-- session of a user with every attempt of that user (sessions x attempts rows).
+-- The attempts trigger and session completion now keep them current, so the
+-- panel is a single-row lookup.
+
+BEGIN;
+
+ALTER TABLE user_metrics ADD COLUMN IF NOT EXISTS best_score_date TIMESTAMP;
+ALTER TABLE user_metrics ADD COLUMN IF NOT EXISTS fastest_correct_date TIMESTAMP;
+ALTER TABLE user_metrics ADD COLUMN IF NOT EXISTS highest_streak_date TIMESTAMP;
+
+-- Backfill with the same definitions the old panel query used
+UPDATE user_metrics um
+SET 
+    best_score_date = (
+        SELECT MAX(gs.created_at)
+        FROM game_sessions gs
+        WHERE gs.user_id = um.user_id AND gs.total_score = um.best_score
+    ),
+    fastest_correct_date = (
+        SELECT MIN(da.created_at)
+        FROM drawing_attempts da
+        WHERE da.user_id = um.user_id AND da.is_correct AND da.drawing_time_ms = um.fastest_correct_ms
+    ),
+    highest_streak_date = (
+        SELECT MAX(gs.created_at)
+        FROM game_sessions gs
+        WHERE gs.user_id = um.user_id AND gs.streak_count = um.highest_streak
+    );
+
+-- Trigger to update user metrics.
+-- Runs once per INSERT statement over the inserted rows (new_attempts). Session
+-- streaks and counts are advanced from the state stored on game_sessions, so the
+-- work per inserted attempt is constant no matter how long the session is.
+CREATE OR REPLACE FUNCTION update_user_metrics()
+RETURNS TRIGGER AS $$
+DECLARE
+    batch record;
+    correct boolean;
+    run integer;
+    best integer;
+BEGIN
+    -- Update game session statistics for every session touched by the batch
+    FOR batch IN
+        SELECT 
+            session_id,
+            array_agg(is_correct ORDER BY created_at, id) as results,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful
+        FROM new_attempts
+        GROUP BY session_id
+    LOOP
+        SELECT COALESCE(current_streak, 0), COALESCE(streak_count, 0)
+        INTO run, best
+        FROM game_sessions
+        WHERE id = batch.session_id
+        FOR UPDATE;
+
+        FOREACH correct IN ARRAY batch.results LOOP
+            IF correct THEN
+                run := run + 1;
+                best := GREATEST(best, run);
+            ELSE
+                run := 0;
+            END IF;
+        END LOOP;
+
+        UPDATE game_sessions
+        SET 
+            current_streak = run,
+            streak_count = best,
+            successful_attempts = COALESCE(successful_attempts, 0) + batch.successful,
+            total_score = COALESCE(successful_attempts, 0) + batch.successful,  -- Update total_score based on successful attempts
+            total_attempts = COALESCE(total_attempts, 0) + batch.total
+        WHERE id = batch.session_id;
+    END LOOP;
+
+    -- Update user metrics with one upsert per user in the batch
+    INSERT INTO user_metrics (
+        user_id,
+        total_attempts,
+        successful_attempts,
+        avg_drawing_time_ms,
+        fastest_correct_ms,
+        fastest_correct_date,
+        highest_streak,
+        highest_streak_date,
+        best_score,
+        best_score_date
+    )
+    SELECT 
+        b.user_id,
+        b.total,
+        b.successful,
+        b.avg_time,
+        b.fastest_correct,
+        b.fastest_correct_date,
+        s.streak,
+        s.streak_date,
+        s.score,
+        s.score_date
+    FROM (
+        SELECT 
+            user_id,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful,
+            AVG(drawing_time_ms)::integer as avg_time,
+            MIN(drawing_time_ms) FILTER (WHERE is_correct) as fastest_correct,
+            (array_agg(created_at ORDER BY drawing_time_ms, created_at) FILTER (WHERE is_correct))[1] as fastest_correct_date
+        FROM new_attempts
+        GROUP BY user_id
+    ) b
+    JOIN (
+        SELECT 
+            na.user_id,
+            MAX(gs.streak_count) as streak,
+            (array_agg(gs.created_at ORDER BY gs.streak_count DESC, gs.created_at DESC))[1] as streak_date,
+            MAX(gs.successful_attempts) as score,
+            (array_agg(gs.created_at ORDER BY gs.successful_attempts DESC, gs.created_at DESC))[1] as score_date
+        FROM (SELECT DISTINCT user_id, session_id FROM new_attempts) na
+        JOIN game_sessions gs ON gs.id = na.session_id
+        GROUP BY na.user_id
+    ) s ON s.user_id = b.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_attempts = user_metrics.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_metrics.successful_attempts + EXCLUDED.successful_attempts,
+        avg_drawing_time_ms = (
+            (user_metrics.avg_drawing_time_ms * user_metrics.total_attempts + 
+             EXCLUDED.avg_drawing_time_ms * EXCLUDED.total_attempts) / 
+            (user_metrics.total_attempts + EXCLUDED.total_attempts)
+        ),
+        -- LEAST/GREATEST ignore NULLs, so batches without a correct attempt keep the old value.
+        -- Record dates follow their record: a faster time moves fastest_correct_date (ties
+        -- keep the earlier attempt); an equal or higher streak/score moves the date to the
+        -- batch's session (ties go to the later session).
+        fastest_correct_ms = LEAST(user_metrics.fastest_correct_ms, EXCLUDED.fastest_correct_ms),
+        fastest_correct_date = CASE
+            WHEN EXCLUDED.fastest_correct_ms < user_metrics.fastest_correct_ms
+                OR user_metrics.fastest_correct_ms IS NULL
+            THEN EXCLUDED.fastest_correct_date
+            ELSE user_metrics.fastest_correct_date
+        END,
+        highest_streak = GREATEST(user_metrics.highest_streak, EXCLUDED.highest_streak),
+        highest_streak_date = CASE
+            WHEN EXCLUDED.highest_streak >= COALESCE(user_metrics.highest_streak, 0)
+            THEN EXCLUDED.highest_streak_date
+            ELSE user_metrics.highest_streak_date
+        END,
+        best_score = GREATEST(user_metrics.best_score, EXCLUDED.best_score),
+        best_score_date = CASE
+            WHEN EXCLUDED.best_score >= COALESCE(user_metrics.best_score, 0)
+            THEN EXCLUDED.best_score_date
+            ELSE user_metrics.best_score_date
+        END,
+        last_updated = CURRENT_TIMESTAMP;
+
+    -- Update difficulty-specific accuracy.
+    -- Each correct attempt halves the old value and adds half its own accuracy,
+    -- so k attempts fold to: old * 0.5^k + sum(accuracy_i * 0.5^(k - i + 1)).
+    WITH ordered AS (
+        SELECT 
+            user_id,
+            difficulty,
+            recognition_accuracy,
+            row_number() OVER w as pos,
+            COUNT(*) OVER (PARTITION BY user_id, difficulty) as k
+        FROM new_attempts
+        WHERE is_correct AND recognition_accuracy IS NOT NULL
+        WINDOW w AS (PARTITION BY user_id, difficulty ORDER BY created_at, id)
+    ),
+    folded AS (
+        SELECT 
+            user_id,
+            MAX(k) FILTER (WHERE difficulty = 'EASY') as easy_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'EASY') as easy_sum,
+            MAX(k) FILTER (WHERE difficulty = 'MEDIUM') as medium_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'MEDIUM') as medium_sum,
+            MAX(k) FILTER (WHERE difficulty = 'HARD') as hard_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'HARD') as hard_sum
+        FROM ordered
+        GROUP BY user_id
+    )
+    UPDATE user_metrics um
+    SET 
+        easy_accuracy = COALESCE(um.easy_accuracy * power(0.5, f.easy_k) + f.easy_sum, um.easy_accuracy),
+        medium_accuracy = COALESCE(um.medium_accuracy * power(0.5, f.medium_k) + f.medium_sum, um.medium_accuracy),
+        hard_accuracy = COALESCE(um.hard_accuracy * power(0.5, f.hard_k) + f.hard_sum, um.hard_accuracy)
+    FROM folded f
+    WHERE um.user_id = f.user_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,100 @@
+-- Migration 005: per-user daily and weekly attempt rollups.
+-- weekly_progress_view grouped all of drawing_attempts by user and week on
+-- every read. The rollups are updated by a statement-level trigger on insert
+-- and the view now reads the weekly one.
+
+BEGIN;
+
+-- Per-user attempt rollups, maintained by trg_update_attempt_rollups on insert.
+-- Sums and counts (not averages) so batches can be added to them.
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    successful_attempts INTEGER NOT NULL DEFAULT 0,
+    drawing_time_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_weekly_stats (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    week_start TIMESTAMP NOT NULL,  -- DATE_TRUNC('week', created_at)
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    successful_attempts INTEGER NOT NULL DEFAULT 0,
+    drawing_time_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, week_start)
+);
+
+-- Block attempt inserts until the trigger is in place so the backfill and
+-- the trigger neither miss nor double-count rows
+LOCK TABLE drawing_attempts IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO user_daily_stats (user_id, day, total_attempts, successful_attempts, drawing_time_sum)
+SELECT user_id, created_at::date, COUNT(*), COUNT(*) FILTER (WHERE is_correct), SUM(drawing_time_ms)
+FROM drawing_attempts
+WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+GROUP BY user_id, created_at::date;
+
+INSERT INTO user_weekly_stats (user_id, week_start, total_attempts, successful_attempts, drawing_time_sum)
+SELECT user_id, DATE_TRUNC('week', created_at), COUNT(*), COUNT(*) FILTER (WHERE is_correct), SUM(drawing_time_ms)
+FROM drawing_attempts
+WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+GROUP BY user_id, DATE_TRUNC('week', created_at);
+
+-- Trigger to add inserted attempts to the daily and weekly rollups
+CREATE OR REPLACE FUNCTION update_attempt_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_daily_stats (user_id, day, total_attempts, successful_attempts, drawing_time_sum)
+    SELECT 
+        user_id,
+        created_at::date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_correct),
+        SUM(drawing_time_ms)
+    FROM new_attempts
+    WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+    GROUP BY user_id, created_at::date
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        total_attempts = user_daily_stats.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_daily_stats.successful_attempts + EXCLUDED.successful_attempts,
+        drawing_time_sum = user_daily_stats.drawing_time_sum + EXCLUDED.drawing_time_sum;
+
+    INSERT INTO user_weekly_stats (user_id, week_start, total_attempts, successful_attempts, drawing_time_sum)
+    SELECT 
+        user_id,
+        DATE_TRUNC('week', created_at),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_correct),
+        SUM(drawing_time_ms)
+    FROM new_attempts
+    WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+    GROUP BY user_id, DATE_TRUNC('week', created_at)
+    ON CONFLICT (user_id, week_start) DO UPDATE SET
+        total_attempts = user_weekly_stats.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_weekly_stats.successful_attempts + EXCLUDED.successful_attempts,
+        drawing_time_sum = user_weekly_stats.drawing_time_sum + EXCLUDED.drawing_time_sum;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_update_attempt_rollups
+AFTER INSERT ON drawing_attempts
+REFERENCING NEW TABLE AS new_attempts
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_attempt_rollups();
+
+-- Weekly progress view, read from the weekly rollup (same columns and
+-- arithmetic as aggregating drawing_attempts directly)
+CREATE OR REPLACE VIEW weekly_progress_view AS
+SELECT 
+    user_id,
+    week_start,
+    total_attempts::BIGINT as total_attempts,
+    successful_attempts::BIGINT as successful_attempts,
+    (drawing_time_sum::NUMERIC / total_attempts)::NUMERIC(10,2) as avg_drawing_time,
+    ((successful_attempts::NUMERIC / total_attempts * 100))::NUMERIC(10,2) as accuracy
+FROM user_weekly_stats;
+
+COMMIT;
@@ -0,0 +1,32 @@
+-- Migration 006: composite and covering indexes for the dashboard read paths.
+-- The new indexes lead with the same column as the single-column ones they
+-- replace, so those are dropped; idx_attempts_difficulty and
+-- idx_attempts_created no longer serve any query (weekly progress reads the
+-- rollups since migration 005) and only slow down attempt inserts.
+--
+-- Uses CONCURRENTLY so attempts can still be written while it runs; that
+-- can't happen inside a transaction block, so run this file with plain
+-- `psql -f` (autocommit) and re-run it if a build is interrupted.
+
+-- Recent activities: a user's attempts, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attempts_user_created
+    ON drawing_attempts(user_id, created_at DESC);
+
+-- Session details and streak order: a session's attempts in insert order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attempts_session_created
+    ON drawing_attempts(session_id, created_at, id);
+
+-- Difficulty stats: covers the aggregated columns for an index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attempts_user_difficulty
+    ON drawing_attempts(user_id, difficulty)
+    INCLUDE (is_correct, drawing_time_ms, recognition_accuracy);
+
+-- Session list keyset pagination
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_user_start
+    ON game_sessions(user_id, start_time DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_attempts_user;
+DROP INDEX CONCURRENTLY IF EXISTS idx_attempts_session;
+DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_user;
+DROP INDEX CONCURRENTLY IF EXISTS idx_attempts_difficulty;
+DROP INDEX CONCURRENTLY IF EXISTS idx_attempts_created;
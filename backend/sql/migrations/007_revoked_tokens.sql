@@ -0,0 +1,30 @@
+-- Migration 007: store revocations by token hash with an expiry.
+-- token_blacklist kept the full JWT text, indexed twice, and was never
+-- cleaned up. revoked_tokens keys on SHA-256 of the token and records when
+-- the token expires so expired rows can be pruned.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_hash BYTEA PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked ON revoked_tokens(revoked_at);
+
+-- A token was issued before it was blacklisted, so it expires no later than
+-- blacklisted_on + ACCESS_TOKEN_EXPIRE_MINUTES (360); rows past that are dropped
+INSERT INTO revoked_tokens (token_hash, expires_at, revoked_at)
+SELECT
+    sha256(convert_to(token, 'UTF8')),
+    blacklisted_on + INTERVAL '360 minutes',
+    blacklisted_on
+FROM token_blacklist
+WHERE blacklisted_on + INTERVAL '360 minutes' > NOW()
+ON CONFLICT (token_hash) DO NOTHING;
+
+DROP TABLE token_blacklist;
+
+COMMIT;
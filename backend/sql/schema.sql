@@ -23,6 +23,7 @@ CREATE TABLE IF NOT EXISTS game_sessions (
     successful_attempts INTEGER DEFAULT 0,
     avg_drawing_time_ms INTEGER DEFAULT 0,
     streak_count INTEGER DEFAULT 0,
+    current_streak INTEGER DEFAULT 0,  -- run of correct attempts at the end of the session so far
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -56,15 +57,42 @@ CREATE TABLE IF NOT EXISTS user_metrics (
     medium_accuracy FLOAT DEFAULT 0,
     hard_accuracy FLOAT DEFAULT 0,
     avg_drawing_time_ms INTEGER DEFAULT 0,
+    best_score_date TIMESTAMP,  -- created_at of the (latest) session holding best_score
+    fastest_correct_date TIMESTAMP,  -- created_at of the (earliest) attempt holding fastest_correct_ms
+    highest_streak_date TIMESTAMP,  -- created_at of the (latest) session holding highest_streak
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Indexes for performance
-CREATE INDEX idx_attempts_user ON drawing_attempts(user_id);
-CREATE INDEX idx_attempts_session ON drawing_attempts(session_id);
-CREATE INDEX idx_sessions_user ON game_sessions(user_id);
-CREATE INDEX idx_attempts_difficulty ON drawing_attempts(difficulty);
-CREATE INDEX idx_attempts_created ON drawing_attempts(created_at);
+-- Recent activities: a user's attempts, newest first
+CREATE INDEX idx_attempts_user_created ON drawing_attempts(user_id, created_at DESC);
+-- Session details and streak order: a session's attempts in insert order
+CREATE INDEX idx_attempts_session_created ON drawing_attempts(session_id, created_at, id);
+-- Difficulty stats: covers the aggregated columns for an index-only scan
+CREATE INDEX idx_attempts_user_difficulty ON drawing_attempts(user_id, difficulty)
+    INCLUDE (is_correct, drawing_time_ms, recognition_accuracy);
+-- Session list keyset pagination
+CREATE INDEX idx_sessions_user_start ON game_sessions(user_id, start_time DESC, id DESC);
+
+-- Per-user attempt rollups, maintained by trg_update_attempt_rollups on insert.
+-- Sums and counts (not averages) so batches can be added to them.
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    successful_attempts INTEGER NOT NULL DEFAULT 0,
+    drawing_time_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_weekly_stats (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    week_start TIMESTAMP NOT NULL,  -- DATE_TRUNC('week', created_at)
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    successful_attempts INTEGER NOT NULL DEFAULT 0,
+    drawing_time_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, week_start)
+);
 
 -- Views for dashboard queries
 CREATE OR REPLACE VIEW user_progress_view AS
@@ -85,135 +113,327 @@ SELECT
 FROM users u
 LEFT JOIN user_metrics um ON u.id = um.user_id;
 
--- Weekly progress view
+-- Weekly progress view, read from the weekly rollup (same columns and
+-- arithmetic as aggregating drawing_attempts directly)
 CREATE OR REPLACE VIEW weekly_progress_view AS
 SELECT 
     user_id,
-    DATE_TRUNC('week', created_at) as week_start,
-    COUNT(*) as total_attempts,
-    SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as successful_attempts,
-    (AVG(drawing_time_ms))::NUMERIC(10,2) as avg_drawing_time,
-    ((SUM(CASE WHEN is_correct THEN 1 ELSE 0 END)::NUMERIC / COUNT(*) * 100))::NUMERIC(10,2) as accuracy
-FROM drawing_attempts
-GROUP BY user_id, DATE_TRUNC('week', created_at);
-
--- Trigger to update user metrics
+    week_start,
+    total_attempts::BIGINT as total_attempts,
+    successful_attempts::BIGINT as successful_attempts,
+    (drawing_time_sum::NUMERIC / total_attempts)::NUMERIC(10,2) as avg_drawing_time,
+    ((successful_attempts::NUMERIC / total_attempts * 100))::NUMERIC(10,2) as accuracy
+FROM user_weekly_stats;
+
+-- Trigger to update user metrics.
+-- Runs once per INSERT statement over the inserted rows (new_attempts). Session
+-- streaks and counts are advanced from the state stored on game_sessions, so the
+-- work per inserted attempt is constant no matter how long the session is.
 CREATE OR REPLACE FUNCTION update_user_metrics()
 RETURNS TRIGGER AS $$
 DECLARE
-    current_streak integer;
-    max_streak integer;
-    session_score integer;
-    total_session_attempts integer;
+    batch record;
+    correct boolean;
+    run integer;
+    best integer;
 BEGIN
-    -- Calculate current streak using a simpler approach
-    WITH consecutive_correct AS (
+    -- Update game session statistics for every session touched by the batch
+    FOR batch IN
         SELECT 
-            row_number() OVER (ORDER BY created_at) - 
-            row_number() OVER (PARTITION BY is_correct ORDER BY created_at) as grp,
-            is_correct
-        FROM drawing_attempts
-        WHERE session_id = NEW.session_id
-        ORDER BY created_at
-    )
-    SELECT COALESCE(MAX(cnt), 0)
-    INTO current_streak
-    FROM (
-        SELECT COUNT(*) as cnt
-        FROM consecutive_correct
-        WHERE is_correct = true
-        GROUP BY grp
-    ) as streak_counts;
+            session_id,
+            array_agg(is_correct ORDER BY created_at, id) as results,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful
+        FROM new_attempts
+        GROUP BY session_id
+    LOOP
+        SELECT COALESCE(current_streak, 0), COALESCE(streak_count, 0)
+        INTO run, best
+        FROM game_sessions
+        WHERE id = batch.session_id
+        FOR UPDATE;
 
-    -- Get current session statistics
-    SELECT 
-        COUNT(*) FILTER (WHERE is_correct = true),
-        COUNT(*)
-    INTO session_score, total_session_attempts
-    FROM drawing_attempts
-    WHERE session_id = NEW.session_id;
-
-    -- Update game session statistics
-    UPDATE game_sessions
-    SET 
-        streak_count = current_streak,
-        successful_attempts = session_score,
-        total_score = session_score,  -- Update total_score based on successful attempts
-        total_attempts = total_session_attempts  -- Update total_attempts
-    WHERE id = NEW.session_id;
+        FOREACH correct IN ARRAY batch.results LOOP
+            IF correct THEN
+                run := run + 1;
+                best := GREATEST(best, run);
+            ELSE
+                run := 0;
+            END IF;
+        END LOOP;
+
+        UPDATE game_sessions
+        SET 
+            current_streak = run,
+            streak_count = best,
+            successful_attempts = COALESCE(successful_attempts, 0) + batch.successful,
+            total_score = COALESCE(successful_attempts, 0) + batch.successful,  -- Update total_score based on successful attempts
+            total_attempts = COALESCE(total_attempts, 0) + batch.total
+        WHERE id = batch.session_id;
+    END LOOP;
 
-    -- Update user metrics
+    -- Update user metrics with one upsert per user in the batch
     INSERT INTO user_metrics (
         user_id,
         total_attempts,
         successful_attempts,
         avg_drawing_time_ms,
         fastest_correct_ms,
+        fastest_correct_date,
         highest_streak,
-        best_score
-    )
-    VALUES (
-        NEW.user_id,
-        1,
-        CASE WHEN NEW.is_correct THEN 1 ELSE 0 END,
-        NEW.drawing_time_ms,
-        CASE WHEN NEW.is_correct THEN NEW.drawing_time_ms ELSE NULL END,
-        current_streak,
-        session_score
+        highest_streak_date,
+        best_score,
+        best_score_date
     )
+    SELECT 
+        b.user_id,
+        b.total,
+        b.successful,
+        b.avg_time,
+        b.fastest_correct,
+        b.fastest_correct_date,
+        s.streak,
+        s.streak_date,
+        s.score,
+        s.score_date
+    FROM (
+        SELECT 
+            user_id,
+            COUNT(*) as total,
+            COUNT(*) FILTER (WHERE is_correct) as successful,
+            AVG(drawing_time_ms)::integer as avg_time,
+            MIN(drawing_time_ms) FILTER (WHERE is_correct) as fastest_correct,
+            (array_agg(created_at ORDER BY drawing_time_ms, created_at) FILTER (WHERE is_correct))[1] as fastest_correct_date
+        FROM new_attempts
+        GROUP BY user_id
+    ) b
+    JOIN (
+        SELECT 
+            na.user_id,
+            MAX(gs.streak_count) as streak,
+            (array_agg(gs.created_at ORDER BY gs.streak_count DESC, gs.created_at DESC))[1] as streak_date,
+            MAX(gs.successful_attempts) as score,
+            (array_agg(gs.created_at ORDER BY gs.successful_attempts DESC, gs.created_at DESC))[1] as score_date
+        FROM (SELECT DISTINCT user_id, session_id FROM new_attempts) na
+        JOIN game_sessions gs ON gs.id = na.session_id
+        GROUP BY na.user_id
+    ) s ON s.user_id = b.user_id
     ON CONFLICT (user_id) DO UPDATE SET
-        total_attempts = user_metrics.total_attempts + 1,
-        successful_attempts = user_metrics.successful_attempts + 
-            CASE WHEN NEW.is_correct THEN 1 ELSE 0 END,
+        total_attempts = user_metrics.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_metrics.successful_attempts + EXCLUDED.successful_attempts,
         avg_drawing_time_ms = (
-            (user_metrics.avg_drawing_time_ms * user_metrics.total_attempts + NEW.drawing_time_ms) / 
-            (user_metrics.total_attempts + 1)
+            (user_metrics.avg_drawing_time_ms * user_metrics.total_attempts + 
+             EXCLUDED.avg_drawing_time_ms * EXCLUDED.total_attempts) / 
+            (user_metrics.total_attempts + EXCLUDED.total_attempts)
         ),
-        fastest_correct_ms = CASE 
-            WHEN NEW.is_correct THEN
-                LEAST(
-                    COALESCE(user_metrics.fastest_correct_ms, NEW.drawing_time_ms),
-                    NEW.drawing_time_ms
-                )
-            ELSE user_metrics.fastest_correct_ms
+        -- LEAST/GREATEST ignore NULLs, so batches without a correct attempt keep the old value.
+        -- Record dates follow their record: a faster time moves fastest_correct_date (ties
+        -- keep the earlier attempt); an equal or higher streak/score moves the date to the
+        -- batch's session (ties go to the later session).
+        fastest_correct_ms = LEAST(user_metrics.fastest_correct_ms, EXCLUDED.fastest_correct_ms),
+        fastest_correct_date = CASE
+            WHEN EXCLUDED.fastest_correct_ms < user_metrics.fastest_correct_ms
+                OR user_metrics.fastest_correct_ms IS NULL
+            THEN EXCLUDED.fastest_correct_date
+            ELSE user_metrics.fastest_correct_date
+        END,
+        highest_streak = GREATEST(user_metrics.highest_streak, EXCLUDED.highest_streak),
+        highest_streak_date = CASE
+            WHEN EXCLUDED.highest_streak >= COALESCE(user_metrics.highest_streak, 0)
+            THEN EXCLUDED.highest_streak_date
+            ELSE user_metrics.highest_streak_date
+        END,
+        best_score = GREATEST(user_metrics.best_score, EXCLUDED.best_score),
+        best_score_date = CASE
+            WHEN EXCLUDED.best_score >= COALESCE(user_metrics.best_score, 0)
+            THEN EXCLUDED.best_score_date
+            ELSE user_metrics.best_score_date
         END,
-        highest_streak = GREATEST(user_metrics.highest_streak, current_streak),
-        best_score = GREATEST(user_metrics.best_score, session_score),
         last_updated = CURRENT_TIMESTAMP;
 
-    -- Update difficulty-specific accuracy
-    IF NEW.is_correct THEN
-        CASE NEW.difficulty
-            WHEN 'EASY' THEN
-                UPDATE user_metrics 
-                SET easy_accuracy = (easy_accuracy + NEW.recognition_accuracy) / 2
-                WHERE user_id = NEW.user_id;
-            WHEN 'MEDIUM' THEN
-                UPDATE user_metrics 
-                SET medium_accuracy = (medium_accuracy + NEW.recognition_accuracy) / 2
-                WHERE user_id = NEW.user_id;
-            WHEN 'HARD' THEN
-                UPDATE user_metrics 
-                SET hard_accuracy = (hard_accuracy + NEW.recognition_accuracy) / 2
-                WHERE user_id = NEW.user_id;
-        END CASE;
-    END IF;
+    -- Update difficulty-specific accuracy.
+    -- Each correct attempt halves the old value and adds half its own accuracy,
+    -- so k attempts fold to: old * 0.5^k + sum(accuracy_i * 0.5^(k - i + 1)).
+    WITH ordered AS (
+        SELECT 
+            user_id,
+            difficulty,
+            recognition_accuracy,
+            row_number() OVER w as pos,
+            COUNT(*) OVER (PARTITION BY user_id, difficulty) as k
+        FROM new_attempts
+        WHERE is_correct AND recognition_accuracy IS NOT NULL
+        WINDOW w AS (PARTITION BY user_id, difficulty ORDER BY created_at, id)
+    ),
+    folded AS (
+        SELECT 
+            user_id,
+            MAX(k) FILTER (WHERE difficulty = 'EASY') as easy_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'EASY') as easy_sum,
+            MAX(k) FILTER (WHERE difficulty = 'MEDIUM') as medium_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'MEDIUM') as medium_sum,
+            MAX(k) FILTER (WHERE difficulty = 'HARD') as hard_k,
+            SUM(recognition_accuracy * power(0.5, k - pos + 1)) FILTER (WHERE difficulty = 'HARD') as hard_sum
+        FROM ordered
+        GROUP BY user_id
+    )
+    UPDATE user_metrics um
+    SET 
+        easy_accuracy = COALESCE(um.easy_accuracy * power(0.5, f.easy_k) + f.easy_sum, um.easy_accuracy),
+        medium_accuracy = COALESCE(um.medium_accuracy * power(0.5, f.medium_k) + f.medium_sum, um.medium_accuracy),
+        hard_accuracy = COALESCE(um.hard_accuracy * power(0.5, f.hard_k) + f.hard_sum, um.hard_accuracy)
+    FROM folded f
+    WHERE um.user_id = f.user_id;
 
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_update_user_metrics
 AFTER INSERT ON drawing_attempts
-FOR EACH ROW
+REFERENCING NEW TABLE AS new_attempts
+FOR EACH STATEMENT
 EXECUTE FUNCTION update_user_metrics();
 
+-- Trigger to add inserted attempts to the daily and weekly rollups
+CREATE OR REPLACE FUNCTION update_attempt_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_daily_stats (user_id, day, total_attempts, successful_attempts, drawing_time_sum)
+    SELECT 
+        user_id,
+        created_at::date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_correct),
+        SUM(drawing_time_ms)
+    FROM new_attempts
+    WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+    GROUP BY user_id, created_at::date
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        total_attempts = user_daily_stats.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_daily_stats.successful_attempts + EXCLUDED.successful_attempts,
+        drawing_time_sum = user_daily_stats.drawing_time_sum + EXCLUDED.drawing_time_sum;
 
-CREATE TABLE IF NOT EXISTS token_blacklist (
-    id SERIAL PRIMARY KEY,
-    token TEXT NOT NULL UNIQUE,
-    blacklisted_on TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    INSERT INTO user_weekly_stats (user_id, week_start, total_attempts, successful_attempts, drawing_time_sum)
+    SELECT 
+        user_id,
+        DATE_TRUNC('week', created_at),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_correct),
+        SUM(drawing_time_ms)
+    FROM new_attempts
+    WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+    GROUP BY user_id, DATE_TRUNC('week', created_at)
+    ON CONFLICT (user_id, week_start) DO UPDATE SET
+        total_attempts = user_weekly_stats.total_attempts + EXCLUDED.total_attempts,
+        successful_attempts = user_weekly_stats.successful_attempts + EXCLUDED.successful_attempts,
+        drawing_time_sum = user_weekly_stats.drawing_time_sum + EXCLUDED.drawing_time_sum;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_update_attempt_rollups
+AFTER INSERT ON drawing_attempts
+REFERENCING NEW TABLE AS new_attempts
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_attempt_rollups();
+
+
+-- Leaderboard totals per user, maintained by triggers on users and game_sessions
+-- so /api/game/leaderboard reads a small indexed table instead of aggregating
+-- every session on each request.
+CREATE TABLE IF NOT EXISTS leaderboard_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    total_score BIGINT NOT NULL DEFAULT 0,
+    total_attempts BIGINT NOT NULL DEFAULT 0,
+    avg_time_sum BIGINT NOT NULL DEFAULT 0,  -- sum of sessions' avg_drawing_time_ms
+    avg_time_count INTEGER NOT NULL DEFAULT 0,  -- sessions with a non-NULL avg_drawing_time_ms
+    best_streak INTEGER  -- NULL until the user has a session
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard_stats(total_score DESC);
+
+CREATE OR REPLACE FUNCTION add_leaderboard_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO leaderboard_stats (user_id) VALUES (NEW.id)
+    ON CONFLICT (user_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_leaderboard_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Remove the old version of the session from its owner's totals
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE leaderboard_stats
+        SET 
+            games_played = games_played - 1,
+            total_score = total_score - COALESCE(OLD.total_score, 0),
+            total_attempts = total_attempts - COALESCE(OLD.total_attempts, 0),
+            avg_time_sum = avg_time_sum - COALESCE(OLD.avg_drawing_time_ms, 0),
+            avg_time_count = avg_time_count - (OLD.avg_drawing_time_ms IS NOT NULL)::integer
+        WHERE user_id = OLD.user_id;
+    END IF;
+
+    -- Add the new version
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO leaderboard_stats (
+            user_id, games_played, total_score, total_attempts, avg_time_sum, avg_time_count, best_streak
+        )
+        VALUES (
+            NEW.user_id,
+            1,
+            COALESCE(NEW.total_score, 0),
+            COALESCE(NEW.total_attempts, 0),
+            COALESCE(NEW.avg_drawing_time_ms, 0),
+            (NEW.avg_drawing_time_ms IS NOT NULL)::integer,
+            NEW.streak_count
+        )
+        ON CONFLICT (user_id) DO UPDATE SET
+            games_played = leaderboard_stats.games_played + 1,
+            total_score = leaderboard_stats.total_score + EXCLUDED.total_score,
+            total_attempts = leaderboard_stats.total_attempts + EXCLUDED.total_attempts,
+            avg_time_sum = leaderboard_stats.avg_time_sum + EXCLUDED.avg_time_sum,
+            avg_time_count = leaderboard_stats.avg_time_count + EXCLUDED.avg_time_count,
+            best_streak = GREATEST(leaderboard_stats.best_streak, EXCLUDED.best_streak);
+    END IF;
+
+    -- A maximum can't be decremented; rescan the owner's sessions only when
+    -- the session holding the best streak shrank or went away (rare)
+    IF TG_OP = 'DELETE'
+        OR (TG_OP = 'UPDATE' AND (NEW.user_id <> OLD.user_id OR NEW.streak_count < OLD.streak_count)) THEN
+        UPDATE leaderboard_stats
+        SET best_streak = (SELECT MAX(streak_count) FROM game_sessions WHERE user_id = OLD.user_id)
+        WHERE user_id = OLD.user_id
+          AND best_streak IS NOT DISTINCT FROM OLD.streak_count;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_add_leaderboard_user
+AFTER INSERT ON users
+FOR EACH ROW
+EXECUTE FUNCTION add_leaderboard_user();
+
+CREATE TRIGGER trg_update_leaderboard_stats
+AFTER INSERT OR UPDATE OR DELETE ON game_sessions
+FOR EACH ROW
+EXECUTE FUNCTION update_leaderboard_stats();
+
+
+-- Logged-out tokens, keyed by SHA-256 of the JWT. Rows are only needed until
+-- the token would have expired anyway; the API prunes them periodically.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_hash BYTEA PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX idx_token_blacklist_token ON token_blacklist(token);
+CREATE INDEX idx_revoked_tokens_expires ON revoked_tokens(expires_at);
+CREATE INDEX idx_revoked_tokens_revoked ON revoked_tokens(revoked_at);
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+import psycopg
+import pytest
+from psycopg import ClientCursor
+from app.core.config import settings
+from app.db.connection import close_all_connections, init_connection_pool
+from app.services.ai import RecognitionEngine
+from app.services.recognizers.fake import FakeRecognizer
+
+# Tests reuse a few of the scripts' helpers, which import each other as top-level modules
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "integration: needs the PostgreSQL database at DATABASE_URL (schema and migrations applied); "
+        "skipped when it can't be reached"
+    )
+
+@pytest.fixture
+def make_engine():
+    """Build a RecognitionEngine over a FakeRecognizer with steady latency.
+    Keyword arguments go to the engine and override its configured limits."""
+    def make(latency: float = 0.01, recognizer=None, **limits):
+        limits = {"max_concurrency": 2, "max_queue": 4, "timeout": 5, "max_batch_size": 1, **limits}
+        return RecognitionEngine(recognizer or FakeRecognizer(latency=latency, jitter=0), **limits)
+    return make
+
+@pytest.fixture(scope="session")
+def database_url():
+    if not settings.DATABASE_URL:
+        pytest.skip("DATABASE_URL is not set")
+    try:
+        psycopg.connect(settings.DATABASE_URL, connect_timeout=3).close()
+    except psycopg.OperationalError as e:
+        pytest.skip(f"Database unreachable: {e}")
+    return settings.DATABASE_URL
+
+@pytest.fixture
+def db(database_url):
+    """A connection to the test database; everything the test writes is rolled back"""
+    with psycopg.connect(database_url, cursor_factory=ClientCursor) as conn:
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+@pytest.fixture
+def run_with_pool(database_url):
+    """Runs an async test body with the app's connection pool open: run_with_pool(body) -> body()'s result.
+
+    The query functions commit, so bodies write only for users from make_user.
+    """
+    def run(body):
+        async def main():
+            await init_connection_pool()
+            try:
+                return await body()
+            finally:
+                await close_all_connections()
+        return asyncio.run(main())
+    return run
+
+@pytest.fixture
+def make_user(database_url):
+    """Creates committed users, returned as (id, username); they are deleted with
+    everything they own (sessions, attempts, metrics, rollups) afterwards"""
+    prefix = f"test_{uuid.uuid4().hex[:8]}"
+    user_ids = []
+
+    def make(password: str = "x"):
+        username = f"{prefix}_{len(user_ids)}"
+        with psycopg.connect(database_url) as conn:
+            user_id = conn.execute(
+                "INSERT INTO users (username, password, email, name) VALUES (%s, %s, %s, %s) RETURNING id",
+                (username, password, f"{username}@test.local", username)
+            ).fetchone()[0]
+        user_ids.append(user_id)
+        return user_id, username
+
+    yield make
+    with psycopg.connect(database_url) as conn:
+        conn.execute("DELETE FROM users WHERE id = ANY(%s)", (user_ids,))
+
+@pytest.fixture
+def sample_games(db):
+    """Users with sessions and attempts, inserted the way the app inserts them so
+    the triggers maintain every derived table. Returns the new user ids."""
+    rng = random.Random(0)
+    prefix = f"test_{uuid.uuid4().hex[:8]}"
+    started = datetime(2024, 1, 1, 12)
+    user_ids = []
+    with db.cursor() as cur:
+        for i in range(12):
+            cur.execute(
+                "INSERT INTO users (username, password, email, name) VALUES (%s, 'x', %s, %s) RETURNING id",
+                (f"{prefix}_{i}", f"{prefix}_{i}@test.local", f"Test {i}")
+            )
+            user_id = cur.fetchone()[0]
+            user_ids.append(user_id)
+            for _ in range(rng.randint(0, 4)):
+                start = started + timedelta(days=rng.randint(0, 20), hours=i)
+                cur.execute(
+                    """
+                    INSERT INTO game_sessions (user_id, start_time, end_time, total_time_seconds, avg_drawing_time_ms)
+                    VALUES (%s, %s, %s, 60, %s) RETURNING id
+                    """,
+                    (user_id, start, start + timedelta(minutes=1), rng.randint(2000, 3000))
+                )
+                session_id = cur.fetchone()[0]
+                attempts = [
+                    cur.mogrify("(%s,%s,'cat',%s,%s,%s,%s,%s)", (
+                        user_id, session_id, rng.choice(["EASY", "MEDIUM", "HARD"]), rng.random() < 0.7,
+                        rng.randint(1500, 4000), rng.random(), start + timedelta(seconds=3 * a)
+                    ))
+                    for a in range(rng.randint(1, 12))
+                ]
+                # In two statements, like a game that records some attempts during play and the rest after
+                half = len(attempts) // 2
+                for batch in (attempts[:half], attempts[half:]):
+                    if batch:
+                        cur.execute(f"""
+                            INSERT INTO drawing_attempts
+                            (user_id, session_id, word_prompt, difficulty, is_correct,
+                             drawing_time_ms, recognition_accuracy, created_at)
+                            VALUES {','.join(batch)}
+                        """)
+    return user_ids
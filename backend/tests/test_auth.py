@@ -0,0 +1,280 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import psycopg
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.core import cache as cache_module
+from app.core import security
+from app.core.config import BCRYPT_PROFILE_ROUNDS, Settings, settings
+from app.core.http import close_http_client
+from app.core.security import create_access_token, token_digest
+from app.db.connection import close_all_connections, get_db_cursor, init_connection_pool
+from app.db.queries.auth_queries import revoke_token
+from app.schemas.auth import UserLogin
+from app.services.auth import auth_cache, authenticate_user, invalidate_token, verify_token
+from app.services.google_auth import handle_google_auth
+from app.services.revocation import revocation_list
+from google_userinfo_stub import start_stub
+
+# Password hashing
+
+def test_password_hash_profile_sets_bcrypt_rounds():
+    assert Settings(PASSWORD_HASH_PROFILE="fast", BCRYPT_ROUNDS=None).BCRYPT_ROUNDS == BCRYPT_PROFILE_ROUNDS["fast"]
+    assert Settings(PASSWORD_HASH_PROFILE="fast", BCRYPT_ROUNDS=6).BCRYPT_ROUNDS == 6
+
+def test_unknown_password_hash_profile_names_the_valid_ones():
+    with pytest.raises(ValidationError, match="use one of: default, fast"):
+        Settings(PASSWORD_HASH_PROFILE="quick", BCRYPT_ROUNDS=None)
+
+@pytest.mark.integration
+def test_login_rehashes_a_password_stored_with_another_cost(run_with_pool, make_user, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", security.build_password_context(5))
+    _, outdated = make_user(password=security.build_password_context(4).hash("secret"))
+    _, current = make_user(password=security.pwd_context.hash("secret"))
+
+    async def body():
+        async def stored_hash(username):
+            async with get_db_cursor() as cur:
+                await cur.execute("SELECT password FROM users WHERE username = %s", (username,))
+                return (await cur.fetchone())[0]
+
+        current_hash = await stored_hash(current)
+        with pytest.raises(HTTPException):
+            await authenticate_user(UserLogin(username=outdated, password="wrong"))
+        after_failure = await stored_hash(outdated)
+        await authenticate_user(UserLogin(username=outdated, password="secret"))
+        await authenticate_user(UserLogin(username=current, password="secret"))
+        return after_failure, await stored_hash(outdated), current_hash, await stored_hash(current)
+
+    after_failure, rehashed, current_hash, current_after = run_with_pool(body)
+    assert after_failure.startswith("$2b$04$")
+    assert rehashed.startswith("$2b$05$") and security.pwd_context.verify("secret", rehashed)
+    assert current_after == current_hash
+
+# Token verification (needs the database)
+
+@pytest.fixture
+def user_token(make_user, database_url):
+    """make(lifetime) -> (user_id, token) for a new user; revocations of the
+    tokens it hands out are deleted afterwards"""
+    digests = []
+
+    def make(lifetime: timedelta = timedelta(minutes=5)):
+        user_id, username = make_user()
+        token = create_access_token({"sub": username}, expires_delta=lifetime)
+        digests.append(token_digest(token))
+        return user_id, token
+
+    yield make
+    with psycopg.connect(database_url) as conn:
+        conn.execute("DELETE FROM revoked_tokens WHERE token_hash = ANY(%s)", (digests,))
+
+async def rejection_status(token):
+    with pytest.raises(HTTPException) as raised:
+        await verify_token(token)
+    return raised.value.status_code
+
+@pytest.mark.integration
+def test_logout_drops_the_cached_token(run_with_pool, user_token):
+    user_id, token = user_token()
+
+    async def body():
+        await revocation_list.rebuild()
+        assert (await verify_token(token))["id"] == user_id
+        assert auth_cache.get(token_digest(token)) is not None
+        await invalidate_token(token)
+        assert auth_cache.get(token_digest(token)) is None
+        return await rejection_status(token)
+
+    assert run_with_pool(body) == 401
+
+@pytest.mark.integration
+def test_cached_token_is_rejected_after_another_worker_revokes_it(run_with_pool, user_token):
+    user_id, token = user_token()
+    digest = token_digest(token)
+
+    async def body():
+        await revocation_list.rebuild()
+        await verify_token(token)
+        # Stored by another worker: nothing here drops the cached entry
+        await revoke_token(digest, datetime.now(timezone.utc) + timedelta(minutes=5))
+        await revocation_list.sync()
+        assert auth_cache.get(digest) is not None
+        return await rejection_status(token)
+
+    assert run_with_pool(body) == 401
+
+@pytest.mark.integration
+@pytest.mark.parametrize("lifetime, ttl", [
+    (timedelta(seconds=60), 60),
+    (timedelta(days=1), settings.AUTH_CACHE_MAX_TTL_SECONDS),
+])
+def test_cached_token_expires_with_its_jwt(run_with_pool, user_token, monkeypatch, lifetime, ttl):
+    _, token = user_token(lifetime)
+
+    async def body():
+        await revocation_list.rebuild()
+        await verify_token(token)
+
+    cached_at = time.monotonic()
+    run_with_pool(body)
+    # Only move the cache's clock once the event loop, which reads it too, is done
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: cached_at + ttl - 2)
+    assert auth_cache.get(token_digest(token)) is not None
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: cached_at + ttl + 5)
+    assert auth_cache.get(token_digest(token)) is None
+
+# Token revocation (needs the database)
+
+async def filter_hit(digest):
+    """Whether the revocation filter holds digest: only filter hits cost a query"""
+    checks = revocation_list.db_checks
+    await revocation_list.is_revoked(digest)
+    return revocation_list.db_checks > checks
+
+@pytest.mark.integration
+def test_logged_out_token_is_rejected_and_others_skip_the_database(run_with_pool, user_token):
+    _, token = user_token()
+    _, other = user_token()
+
+    async def body():
+        await revocation_list.rebuild()
+        await verify_token(token)
+        await invalidate_token(token)
+        checks = revocation_list.db_checks
+        status = await rejection_status(token)
+        confirmed = revocation_list.db_checks - checks
+        checks = revocation_list.db_checks
+        await verify_token(other)
+        return status, confirmed, revocation_list.db_checks - checks
+
+    assert run_with_pool(body) == (401, 1, 0)
+
+@pytest.mark.integration
+def test_sync_picks_up_revocations_from_other_processes(run_with_pool, user_token, database_url):
+    _, token = user_token()
+    _, late = user_token()
+
+    def revoke_elsewhere(digest, committed_late_by: timedelta = timedelta()):
+        with psycopg.connect(database_url) as conn:
+            conn.execute(
+                "INSERT INTO revoked_tokens (token_hash, expires_at, revoked_at) "
+                "VALUES (%s, NOW() + interval '5 minutes', NOW() - %s)",
+                (digest, committed_late_by)
+            )
+
+    async def body():
+        await revocation_list.rebuild()
+        revoke_elsewhere(token_digest(token))
+        before = await revocation_list.is_revoked(token_digest(token))
+        await revocation_list.sync()
+        after = await revocation_list.is_revoked(token_digest(token))
+        # Stamped before the watermark the last sync reached, as when a
+        # transaction commits a while after its revoked_at; the overlap catches it
+        revoke_elsewhere(token_digest(late), committed_late_by=timedelta(seconds=10))
+        await revocation_list.sync()
+        return before, after, await rejection_status(token), await rejection_status(late)
+
+    assert run_with_pool(body) == (False, True, 401, 401)
+
+@pytest.mark.integration
+def test_prune_drops_expired_revocations_from_table_and_filter(run_with_pool, user_token):
+    _, expired = user_token()
+    _, live = user_token()
+    expired_digest, live_digest = token_digest(expired), token_digest(live)
+
+    async def body():
+        await revocation_list.rebuild()
+        now = datetime.now(timezone.utc)
+        for digest, expires_at in ((expired_digest, now - timedelta(minutes=1)), (live_digest, now + timedelta(minutes=5))):
+            await revoke_token(digest, expires_at)
+            revocation_list.add(digest)
+        before = (await filter_hit(expired_digest), await filter_hit(live_digest))
+        await revocation_list.prune()
+        after = (await filter_hit(expired_digest), await filter_hit(live_digest))
+        async with get_db_cursor() as cur:
+            await cur.execute(
+                "SELECT token_hash FROM revoked_tokens WHERE token_hash = ANY(%s)",
+                ([expired_digest, live_digest],)
+            )
+            stored = {bytes(row[0]) for row in await cur.fetchall()}
+        return before, after, stored
+
+    assert run_with_pool(body) == ((True, True), (False, True), {live_digest})
+
+# Google sign-in against scripts/google_userinfo_stub.py (needs the database)
+
+# Response delay of the stub for "slow:" tokens, well past the client timeout below
+STUB_DELAY_SECONDS = 3.0
+
+@pytest.fixture
+def google_sign_in(database_url, monkeypatch):
+    """Runs scenario(stub, base) with the userinfo stub up and the pool open.
+
+    base is a fresh username prefix; users whose email starts with it are
+    deleted afterwards.
+    """
+    monkeypatch.setattr(settings, "HTTP_TIMEOUT_SECONDS", 0.5)
+
+    def run(scenario):
+        async def main():
+            stub, server, task, url = await start_stub(STUB_DELAY_SECONDS, 0)
+            monkeypatch.setattr(settings, "GOOGLE_USERINFO_URL", url)
+            await init_connection_pool()
+            base = f"test_{uuid.uuid4().hex[:8]}"
+            try:
+                return await scenario(stub, base)
+            finally:
+                async with get_db_cursor() as cur:
+                    await cur.execute("DELETE FROM users WHERE email LIKE %s", (f"{base}%",))
+                await close_all_connections()
+                await close_http_client()
+                server.should_exit = True
+                await task
+        return asyncio.run(main())
+    return run
+
+@pytest.mark.integration
+def test_repeat_sign_in_uses_the_userinfo_cache(google_sign_in):
+    async def scenario(stub, base):
+        first = await handle_google_auth(f"stub:{base}@stub.local")
+        requests = stub.state.requests
+        again = await handle_google_auth(f"stub:{base}@stub.local")
+        assert first["user"]["username"] == base
+        assert again["user"]["id"] == first["user"]["id"]
+        assert stub.state.requests == requests
+    google_sign_in(scenario)
+
+@pytest.mark.integration
+def test_clashing_username_gets_a_suffix(google_sign_in):
+    async def scenario(stub, base):
+        await handle_google_auth(f"stub:{base}@stub.local")
+        clash = await handle_google_auth(f"stub:{base}@other.stub.local")
+        assert clash["user"]["username"].startswith(f"{base}_")
+    google_sign_in(scenario)
+
+@pytest.mark.integration
+def test_concurrent_first_sign_ins_create_one_user(google_sign_in):
+    async def scenario(stub, base):
+        results = await asyncio.gather(*(handle_google_auth(f"stub:{base}_race@stub.local") for _ in range(8)))
+        assert len({result["user"]["id"] for result in results}) == 1
+    google_sign_in(scenario)
+
+@pytest.mark.integration
+def test_invalid_token_is_rejected(google_sign_in):
+    async def scenario(stub, base):
+        with pytest.raises(ValueError):
+            await handle_google_auth("not-a-token")
+    google_sign_in(scenario)
+
+@pytest.mark.integration
+def test_slow_userinfo_endpoint_fails_within_the_timeout(google_sign_in):
+    async def scenario(stub, base):
+        started = time.perf_counter()
+        with pytest.raises(ValueError):
+            await handle_google_auth(f"slow:{base}_slow@stub.local")
+        assert time.perf_counter() - started < STUB_DELAY_SECONDS
+    google_sign_in(scenario)
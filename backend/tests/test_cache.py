@@ -0,0 +1,161 @@
+import asyncio
+import random
+import pytest
+from app.core import cache as cache_module
+from app.core.bloom import BloomFilter
+from app.core.cache import NearDuplicateCache, TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stands in for time.monotonic in app.core.cache; advance it with clock[0] += seconds"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+# TTLCache
+
+def test_get_and_set_count_hits_and_misses():
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    assert cache.get("a", "missing") == "missing"
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+def test_entries_expire(clock):
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    clock[0] += 10
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    clock[0] += 60
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("test_ttl", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+def test_invalidate_drops_only_the_owners_entries():
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    cache.set("a1", 1, owner="alice")
+    cache.set("a2", 2, owner="alice")
+    cache.set("b1", 3, owner="bob")
+    cache.invalidate("alice")
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") == 3
+
+def test_get_or_load_loads_once():
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return "value"
+
+    async def run():
+        return [await cache.get_or_load("k", loader) for _ in range(3)]
+
+    assert asyncio.run(run()) == ["value"] * 3
+    assert len(loads) == 1
+
+def test_load_started_before_invalidation_is_not_stored():
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+
+    async def stale_loader():
+        cache.invalidate("alice")  # a logout lands while the load is in flight
+        return "stale"
+
+    assert asyncio.run(cache.get_or_load("k", stale_loader, owner="alice")) == "stale"
+    assert cache.get("k") is None
+
+def test_get_many_or_load_loads_only_the_misses():
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    asked = []
+
+    async def loader(keys):
+        asked.append(keys)
+        return {key: key * 2 for key in keys}
+
+    assert asyncio.run(cache.get_many_or_load(["a", "b", "c"], loader)) == {"a": 1, "b": "bb", "c": "cc"}
+    assert asked == [["b", "c"]]
+    assert cache.get("b") == "bb"
+
+# NearDuplicateCache
+
+def flip(key, *bits):
+    for bit in bits:
+        key ^= 1 << bit
+    return key
+
+def test_near_duplicate_within_distance_hits():
+    cache = NearDuplicateCache("test_near", maxsize=10, ttl=60, bits=64, max_distance=3)
+    key = 0x0123456789ABCDEF
+    cache.set(key, "cat")
+    assert cache.get(flip(key, 0, 17, 63)) == "cat"
+    assert cache.get(flip(key, 0, 17, 40, 63)) is None
+    assert cache.near_hits == 1
+
+def test_nearest_prefers_the_closest_entry():
+    cache = NearDuplicateCache("test_near", maxsize=10, ttl=60, bits=64, max_distance=4)
+    cache.set(0, "far")
+    cache.set(flip(0, 1, 2), "near")
+    assert cache.nearest(flip(0, 1, 2, 3)) == flip(0, 1, 2)
+    assert cache.get(flip(0, 1, 2, 3)) == "near"
+
+def test_max_distance_zero_matches_exactly():
+    cache = NearDuplicateCache("test_near", maxsize=10, ttl=60, bits=64, max_distance=0)
+    cache.set(5, "cat")
+    assert cache.get(5) == "cat"
+    assert cache.get(flip(5, 10)) is None
+
+def test_evicted_and_cleared_keys_leave_the_band_index():
+    cache = NearDuplicateCache("test_near", maxsize=1, ttl=60, bits=64, max_distance=2)
+    cache.set(0, "first")
+    cache.set(flip(0, 30, 31, 32, 33, 34, 35), "second")
+    assert cache.nearest(flip(0, 1)) is None
+    cache.clear()
+    assert cache.nearest(flip(0, 30, 31, 32, 33, 34, 35)) is None
+    assert all(not index for index in cache._index)
+
+def test_expired_near_match_is_a_miss(clock):
+    cache = NearDuplicateCache("test_near", maxsize=10, ttl=60, bits=64, max_distance=2)
+    cache.set(0, "cat")
+    clock[0] += 61
+    assert cache.get(flip(0, 5)) is None
+
+# BloomFilter
+
+@pytest.mark.parametrize("digest_bytes", [32, 8])  # 8-byte digests run out and get rehashed
+def test_bloom_filter_never_misses_an_added_digest(digest_bytes):
+    rng = random.Random(1)
+    bloom = BloomFilter(2000, 0.001)
+    digests = [rng.randbytes(digest_bytes) for _ in range(2000)]
+    for digest in digests:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests)
+    assert bloom.count == 2000
+
+@pytest.mark.parametrize("capacity, error_rate", [(10000, 0.01), (10000, 0.001), (1000, 0.05)])
+def test_bloom_filter_false_positive_rate_at_capacity(capacity, error_rate):
+    rng = random.Random(2)
+    bloom = BloomFilter(capacity, error_rate)
+    for _ in range(capacity):
+        bloom.add(rng.randbytes(32))
+    trials = 100000
+    false_positives = sum(rng.randbytes(32) in bloom for _ in range(trials))
+    # The size is rounded up to a power of two, which only lowers the rate
+    assert false_positives / trials <= error_rate
+
+def test_bloom_filter_of_nothing_contains_nothing():
+    bloom = BloomFilter(0)
+    assert bloom.capacity == 1
+    assert bytes(32) not in bloom
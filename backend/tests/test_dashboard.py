@@ -0,0 +1,91 @@
+import pytest
+from app.db.queries.dashboard_queries import get_user_sessions
+from app.db.queries.game_queries import create_game_session
+from app.schemas.game import GameSession
+
+# Daily and weekly attempt rollups (need the database)
+
+# weekly_progress_view before the rollups, aggregating every attempt on each read
+LEGACY_WEEKLY_PROGRESS = """
+    SELECT
+        user_id,
+        DATE_TRUNC('week', created_at) as week_start,
+        COUNT(*) as total_attempts,
+        SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as successful_attempts,
+        (AVG(drawing_time_ms))::NUMERIC(10,2) as avg_drawing_time,
+        ((SUM(CASE WHEN is_correct THEN 1 ELSE 0 END)::NUMERIC / COUNT(*) * 100))::NUMERIC(10,2) as accuracy
+    FROM drawing_attempts
+    GROUP BY user_id, DATE_TRUNC('week', created_at)
+"""
+
+ROLLUP_DRIFT_QUERY = """
+    WITH expected AS (
+        SELECT
+            user_id,
+            {bucket} as bucket,
+            COUNT(*) as total_attempts,
+            COUNT(*) FILTER (WHERE is_correct) as successful_attempts,
+            SUM(drawing_time_ms) as drawing_time_sum
+        FROM drawing_attempts
+        WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY 1, 2
+    )
+    SELECT COALESCE(e.user_id, r.user_id), COALESCE(e.bucket, r.{column})
+    FROM expected e
+    FULL JOIN {table} r ON r.user_id = e.user_id AND r.{column} = e.bucket
+    WHERE (e.total_attempts, e.successful_attempts, e.drawing_time_sum)
+          IS DISTINCT FROM
+          (r.total_attempts, r.successful_attempts, r.drawing_time_sum)
+"""
+
+@pytest.mark.integration
+@pytest.mark.parametrize("table, column, bucket", [
+    ("user_daily_stats", "day", "created_at::date"),
+    ("user_weekly_stats", "week_start", "DATE_TRUNC('week', created_at)"),
+])
+def test_rollups_match_attempts(db, sample_games, table, column, bucket):
+    with db.cursor() as cur:
+        cur.execute(ROLLUP_DRIFT_QUERY.format(table=table, column=column, bucket=bucket))
+        assert cur.fetchall() == []
+
+@pytest.mark.integration
+def test_weekly_progress_view_matches_the_aggregate_query(db, sample_games):
+    with db.cursor() as cur:
+        cur.execute(f"{LEGACY_WEEKLY_PROGRESS} ORDER BY user_id, week_start")
+        expected = cur.fetchall()
+        cur.execute("SELECT * FROM weekly_progress_view ORDER BY user_id, week_start")
+        assert cur.fetchall() == expected
+
+# Session list pagination (needs the database)
+
+@pytest.mark.integration
+def test_session_pages_follow_the_cursor(run_with_pool, make_user):
+    user_id, _ = make_user()
+
+    async def body():
+        created = [await create_game_session(GameSession(user_id=user_id)) for _ in range(5)]
+        pages, before_id = [], None
+        while True:
+            page = await get_user_sessions(user_id, limit=2, before_id=before_id)
+            if not page:
+                return created, pages
+            pages.append([session["id"] for session in page])
+            before_id = page[-1]["id"]
+
+    created, pages = run_with_pool(body)
+    assert pages == [created[4:2:-1], created[2:0:-1], created[:1]]
+
+@pytest.mark.integration
+def test_session_list_rejects_a_cursor_that_isnt_the_users(run_with_pool, make_user):
+    user_id, _ = make_user()
+    other_id, _ = make_user()
+
+    async def body():
+        await create_game_session(GameSession(user_id=user_id))
+        others = await create_game_session(GameSession(user_id=other_id))
+        return (
+            await get_user_sessions(user_id, before_id=others),
+            await get_user_sessions(user_id, before_id=others + 1000000),
+        )
+
+    assert run_with_pool(body) == (None, None)
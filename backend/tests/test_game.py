@@ -0,0 +1,474 @@
+import asyncio
+import json
+import logging
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from app.db.connection import get_db_cursor
+from app.db.queries.game_queries import (
+    LEADERBOARD_QUERY, complete_game_session, create_game_session, save_drawing_attempt, save_drawing_attempts
+)
+from app.core.config import settings
+from app.core.words import VOCABULARY
+from app.core.exceptions import (
+    ImageTooLarge, InvalidImage, RecognitionError, RecognitionOverloaded, RecognitionTimeout
+)
+from app.services.ai import recognition_engine
+from app.services.imaging import decode_strokes, strokes_square
+from app.services.recognizers.base import Guess
+from app.services.recognizers.fake import FakeRecognizer
+from app.schemas.game import (
+    DrawingAttempt, DrawingAttemptBatch, GameSession, GameSessionComplete, MAX_ATTEMPTS_PER_BATCH
+)
+from app.services.recognizers.gemini import parse_guesses
+from app.services.recognizers.local import BITMAP_SIZE, LocalRecognizer
+from main import app
+from train_local_recognizer import load_quickdraw
+
+class FailingRecognizer(FakeRecognizer):
+    async def recognize(self, image):
+        await super().recognize(image)
+        raise RuntimeError("model unavailable")
+
+    async def recognize_batch(self, images):
+        await super().recognize(images[0])
+        raise RuntimeError("model unavailable")
+
+async def recognize_all(engine, count):
+    return await asyncio.gather(*(engine.recognize(b"png") for _ in range(count)), return_exceptions=True)
+
+def encode_strokes(strokes):
+    """The client's encoding: per stroke, its point count, then the first point and the deltas"""
+    values = []
+    for stroke in strokes:
+        stroke = np.asarray(stroke)
+        values.append([len(stroke)])
+        values.append(np.diff(stroke, axis=0, prepend=[[0, 0]]).ravel())
+    return np.concatenate(values).astype("<i2").tobytes()
+
+# Recognition engine
+
+def test_engine_returns_guesses(make_engine):
+    engine = make_engine()
+    assert asyncio.run(engine.recognize(b"png")) == [Guess("cat", 0.9)]
+    stats = engine.stats()
+    assert stats["completed"] == 1
+    assert stats["recognizer_calls"] == 1
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+
+def test_engine_caps_concurrent_calls(make_engine):
+    engine = make_engine(latency=0.1, max_concurrency=2, max_queue=4)
+
+    async def run():
+        calls = asyncio.gather(*(engine.recognize(b"png") for _ in range(6)))
+        await asyncio.sleep(0.03)
+        seen = (engine.in_flight, engine.queued)
+        await calls
+        return seen
+
+    assert asyncio.run(run()) == (2, 4)
+    assert engine.completed == 6
+
+def test_engine_sheds_calls_past_the_queue(make_engine):
+    engine = make_engine(latency=0.05, max_concurrency=1, max_queue=1)
+    results = asyncio.run(recognize_all(engine, 4))
+    assert sum(isinstance(r, RecognitionOverloaded) for r in results) == 2
+    assert sum(r == [Guess("cat", 0.9)] for r in results) == 2
+    assert engine.rejected == 2
+    assert engine.admitted == 0
+
+def test_engine_times_out(make_engine):
+    engine = make_engine(latency=0.5, timeout=0.05)
+    with pytest.raises(RecognitionTimeout):
+        asyncio.run(engine.recognize(b"png"))
+    assert engine.timed_out == 1
+    assert engine.admitted == 0 and engine.in_flight == 0
+
+def test_engine_wraps_recognizer_errors(make_engine):
+    engine = make_engine(recognizer=FailingRecognizer(latency=0))
+    with pytest.raises(RecognitionError, match="model unavailable"):
+        asyncio.run(engine.recognize(b"png"))
+    assert engine.failed == 1
+
+def test_batching_coalesces_concurrent_calls(make_engine):
+    engine = make_engine(latency=0.02, max_concurrency=1, max_queue=8, max_batch_size=4, max_batch_wait=0.05)
+    results = asyncio.run(recognize_all(engine, 8))
+    assert results == [[Guess("cat", 0.9)]] * 8
+    assert engine.recognizer_calls == 2
+    assert engine.stats()["avg_batch_size"] == 4
+
+def test_batching_flushes_a_partial_batch_after_the_wait(make_engine):
+    engine = make_engine(latency=0, max_batch_size=8, max_batch_wait=0.01)
+    results = asyncio.run(recognize_all(engine, 3))
+    assert len(results) == 3
+    assert engine.recognizer_calls == 1
+    assert engine.completed == 3
+
+def test_batching_times_out_and_frees_the_slot(make_engine):
+    engine = make_engine(latency=0.5, timeout=0.05, max_batch_size=4, max_batch_wait=0.01)
+
+    async def run():
+        results = await recognize_all(engine, 3)
+        # The batch itself gives up at the timeout too
+        await asyncio.sleep(0.1)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RecognitionTimeout) for r in results)
+    assert engine.timed_out == 3
+    assert engine.in_flight == 0 and engine.admitted == 0
+
+def test_batching_fails_every_caller_in_a_failed_batch(make_engine):
+    engine = make_engine(recognizer=FailingRecognizer(latency=0), max_batch_size=4, max_batch_wait=0.01)
+    results = asyncio.run(recognize_all(engine, 4))
+    assert all(isinstance(r, RecognitionError) for r in results)
+    assert engine.failed == 4
+    assert engine.recognizer_calls == 1
+
+# Stroke input
+
+def test_decode_strokes_round_trips_points():
+    strokes = [[[10, 20], [15, 18], [400, 300]], [[7, 7]]]
+    decoded = decode_strokes(encode_strokes(strokes), max_points=10)
+    assert [stroke.tolist() for stroke in decoded] == strokes
+
+def test_decode_strokes_accepts_exactly_max_points():
+    assert len(decode_strokes(encode_strokes([[[i, i] for i in range(5)]]), max_points=5)[0]) == 5
+
+@pytest.mark.parametrize("data", [
+    b"",                                       # no strokes
+    b"\x01",                                   # half an int16
+    np.array([0], "<i2").tobytes(),            # a stroke of zero points
+    np.array([-1, 0, 0], "<i2").tobytes(),     # negative count
+    np.array([3, 1, 1, 2, 2], "<i2").tobytes(),  # count past the end of the data
+])
+def test_decode_strokes_rejects_malformed_data(data):
+    with pytest.raises(InvalidImage) as raised:
+        decode_strokes(data, max_points=100)
+    assert not isinstance(raised.value, ImageTooLarge)
+
+def test_decode_strokes_rejects_too_many_points():
+    with pytest.raises(ImageTooLarge):
+        decode_strokes(encode_strokes([[[0, 0]] * 4, [[1, 1]] * 3]), max_points=6)
+
+def test_decode_strokes_rejects_oversized_data_before_parsing():
+    # Not even a valid stroke, but too long to be one within the limit
+    with pytest.raises(ImageTooLarge):
+        decode_strokes(np.zeros(3 * 10 + 1, "<i2").tobytes(), max_points=10)
+
+def test_strokes_square_ignores_position():
+    stroke = np.array([[0, 0], [40, 30], [80, 0]])
+    square = strokes_square([stroke], target=64)
+    assert square.shape[0] == square.shape[1] and square.any()
+    assert np.array_equal(square, strokes_square([stroke + [500, 200]], target=64))
+
+# Gemini answers
+
+def test_parse_guesses_reads_the_json_list():
+    text = json.dumps([{"word": "Dog", "probability": 0.2}, {"word": "cat.", "probability": 0.7}])
+    assert parse_guesses(text, top_k=5) == [Guess("cat", 0.7), Guess("dog", 0.2)]
+
+def test_parse_guesses_strips_a_code_fence():
+    text = '```json\n[{"word": "cat", "probability": 0.5}]\n```'
+    assert parse_guesses(text, top_k=5) == [Guess("cat", 0.5)]
+
+def test_parse_guesses_renormalizes_and_clips():
+    text = json.dumps([
+        {"word": "cat", "probability": 1.5},
+        {"word": "dog", "probability": 1.0},
+        {"word": "cow", "probability": -0.3},
+    ])
+    guesses = parse_guesses(text, top_k=5)
+    assert [guess.word for guess in guesses] == ["cat", "dog", "cow"]
+    assert [guess.probability for guess in guesses] == pytest.approx([0.5, 0.5, 0.0])
+
+def test_parse_guesses_keeps_top_k():
+    text = json.dumps([{"word": w, "probability": p} for w, p in [("a", 0.1), ("b", 0.4), ("c", 0.3)]])
+    assert [guess.word for guess in parse_guesses(text, top_k=2)] == ["b", "c"]
+
+def test_parse_guesses_falls_back_to_the_first_word():
+    assert parse_guesses("Cat.", top_k=5) == [Guess("cat", 0.0)]
+
+@pytest.mark.parametrize("text", ["", "[]", '[{"word": "cat"}]', '{"word": "cat", "probability": 0.9}'])
+def test_parse_guesses_gives_zero_probability_without_a_usable_list(text):
+    guesses = parse_guesses(text, top_k=5)
+    assert len(guesses) == 1 and guesses[0].probability == 0.0
+
+# Local recognizer
+
+def save_weights(path, labels):
+    np.savez(
+        path, weights=np.zeros((BITMAP_SIZE * BITMAP_SIZE, len(labels))), bias=np.zeros(len(labels)),
+        labels=np.array(labels), temperature=1.0
+    )
+
+def test_local_recognizer_without_weights_names_the_trainer(tmp_path):
+    with pytest.raises(FileNotFoundError, match="train_local_recognizer.py"):
+        LocalRecognizer.load(str(tmp_path / "missing.npz"))
+
+def test_startup_fails_without_local_weights(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RECOGNITION_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_RECOGNIZER_WEIGHTS", str(tmp_path / "missing.npz"))
+    monkeypatch.setattr(recognition_engine, "_recognizer", None)
+    with pytest.raises(FileNotFoundError, match="train_local_recognizer.py"):
+        with TestClient(app):
+            pass
+
+def test_local_recognizer_reports_words_it_cannot_guess(tmp_path, caplog):
+    save_weights(tmp_path / "weights.npz", VOCABULARY[1:-1])
+    with caplog.at_level(logging.WARNING, logger="app.services.recognizers.local"):
+        recognizer = LocalRecognizer.load(str(tmp_path / "weights.npz"))
+    assert recognizer.missing_words == [VOCABULARY[0], VOCABULARY[-1]]
+    assert f"{VOCABULARY[0]}, {VOCABULARY[-1]}" in caplog.text
+
+def test_local_recognizer_covering_the_vocabulary_loads_quietly(tmp_path, caplog):
+    save_weights(tmp_path / "weights.npz", VOCABULARY)
+    with caplog.at_level(logging.WARNING, logger="app.services.recognizers.local"):
+        assert LocalRecognizer.load(str(tmp_path / "weights.npz")).missing_words == []
+    assert caplog.text == ""
+
+def test_trainer_fails_on_vocabulary_words_without_bitmaps(tmp_path):
+    for word in ("cat", "dog"):
+        np.save(tmp_path / f"{word}.npy", np.full((3, BITMAP_SIZE * BITMAP_SIZE), 255, dtype=np.uint8))
+    with pytest.raises(SystemExit, match="treehouse") as raised:
+        load_quickdraw(str(tmp_path), 2, np.random.default_rng(0))
+    assert "--allow-missing" in str(raised.value)
+
+    _, targets, labels = load_quickdraw(str(tmp_path), 2, np.random.default_rng(0), allow_missing=True)
+    assert labels == ["cat", "dog"]
+    assert targets.tolist() == [0, 0, 1, 1]
+
+# Attempt batches
+
+# (is_correct, difficulty, drawing_time_ms, recognition_accuracy) in play order: runs of 2, 3 and 1
+PLAYED_ATTEMPTS = [
+    (True, "EASY", 2400, 0.9), (True, "MEDIUM", 3100, 0.6), (False, "HARD", 5000, 0.1),
+    (True, "EASY", 1800, 0.8), (True, "HARD", 4200, 0.5), (True, "EASY", 2000, 0.95),
+    (False, "MEDIUM", 3900, 0.2), (True, "MEDIUM", 2700, 0.7),
+]
+
+def played_attempts(session_id, user_id, word="cat"):
+    return [
+        DrawingAttempt(
+            session_id=session_id, user_id=user_id, word_prompt=f"{word}{i}", difficulty=difficulty,
+            is_correct=is_correct, drawing_time_ms=drawing_time_ms, recognition_accuracy=accuracy
+        )
+        for i, (is_correct, difficulty, drawing_time_ms, accuracy) in enumerate(PLAYED_ATTEMPTS)
+    ]
+
+def test_attempt_batch_is_capped():
+    attempt = played_attempts(1, 1)[0]
+    assert len(DrawingAttemptBatch(attempts=[attempt] * MAX_ATTEMPTS_PER_BATCH).attempts) == MAX_ATTEMPTS_PER_BATCH
+    with pytest.raises(ValidationError):
+        DrawingAttemptBatch(attempts=[attempt] * (MAX_ATTEMPTS_PER_BATCH + 1))
+    with pytest.raises(ValidationError):
+        DrawingAttemptBatch(attempts=[])
+
+def test_attempts_endpoint_rejects_oversized_batches():
+    # Validation fails before the handler runs, so no database is needed
+    payload = json.loads(played_attempts(1, 1)[0].model_dump_json())
+    response = TestClient(app).post("/api/game/attempts", json={"attempts": [payload] * (MAX_ATTEMPTS_PER_BATCH + 1)})
+    assert response.status_code == 422
+
+@pytest.mark.integration
+def test_batch_returns_ids_in_attempt_order(run_with_pool, make_user):
+    user_id, _ = make_user()
+
+    async def body():
+        session_id = await create_game_session(GameSession(user_id=user_id))
+        attempt_ids = await save_drawing_attempts(played_attempts(session_id, user_id, word="word"))
+        async with get_db_cursor() as cur:
+            await cur.execute(
+                "SELECT id, word_prompt FROM drawing_attempts WHERE session_id = %s ORDER BY created_at, id",
+                (session_id,)
+            )
+            return attempt_ids, await cur.fetchall()
+
+    attempt_ids, rows = run_with_pool(body)
+    assert attempt_ids == [row[0] for row in rows]
+    assert [row[1] for row in rows] == [f"word{i}" for i in range(len(PLAYED_ATTEMPTS))]
+
+@pytest.mark.integration
+def test_metrics_trigger_runs_once_per_statement(db):
+    with db.cursor() as cur:
+        # Bit 0 of tgtype is TRIGGER_TYPE_ROW
+        cur.execute("SELECT tgtype & 1 FROM pg_trigger WHERE tgname = 'trg_update_user_metrics'")
+        assert cur.fetchone() == (0,)
+
+@pytest.mark.integration
+def test_batches_update_metrics_like_single_inserts(run_with_pool, make_user):
+    batched, _ = make_user()
+    single, _ = make_user()
+
+    async def body():
+        batched_session = await create_game_session(GameSession(user_id=batched))
+        attempts = played_attempts(batched_session, batched)
+        # Split inside the run of 3, so the streak has to carry over between statements
+        await save_drawing_attempts(attempts[:4])
+        await save_drawing_attempts(attempts[4:])
+
+        single_session = await create_game_session(GameSession(user_id=single))
+        for attempt in played_attempts(single_session, single):
+            await save_drawing_attempt(attempt)
+
+        async with get_db_cursor() as cur:
+            await cur.execute("""
+                SELECT gs.total_attempts, gs.successful_attempts, gs.streak_count, gs.current_streak,
+                       um.total_attempts, um.successful_attempts, um.fastest_correct_ms, um.highest_streak,
+                       um.best_score, um.easy_accuracy, um.medium_accuracy, um.hard_accuracy, um.avg_drawing_time_ms
+                FROM game_sessions gs
+                JOIN user_metrics um ON um.user_id = gs.user_id
+                WHERE gs.id = ANY(%s)
+                ORDER BY gs.id = %s DESC
+            """, ([batched_session, single_session], batched_session))
+            return await cur.fetchall()
+
+    batched_row, single_row = run_with_pool(body)
+    successful = sum(attempt[0] for attempt in PLAYED_ATTEMPTS)
+    assert batched_row[:9] == (8, successful, 3, 1, 8, successful, 1800, 3, successful)
+    assert batched_row[:9] == single_row[:9]
+    assert batched_row[9:12] == pytest.approx(single_row[9:12])
+    # Batches truncate the running average less often, so allow for the per-row rounding
+    mean_time = sum(attempt[2] for attempt in PLAYED_ATTEMPTS) / len(PLAYED_ATTEMPTS)
+    assert batched_row[12] == pytest.approx(mean_time, abs=1)
+    assert single_row[12] == pytest.approx(mean_time, abs=len(PLAYED_ATTEMPTS))
+
+# Session completion
+
+def completion(session_id, total_score, total_attempts, total_time_seconds):
+    return GameSessionComplete(
+        session_id=session_id, total_score=total_score, total_attempts=total_attempts,
+        total_time_seconds=total_time_seconds, username="ignored"
+    )
+
+@pytest.mark.integration
+def test_completing_a_session_returns_its_summary_and_updates_metrics(run_with_pool, make_user):
+    user_id, _ = make_user()
+
+    async def body():
+        first = await create_game_session(GameSession(user_id=user_id))
+        await save_drawing_attempts(played_attempts(first, user_id))
+        first_summary = await complete_game_session(first, completion(first, 6, 8, 95))
+
+        # A worse game afterwards: counted, but best_score and its date stay
+        second = await create_game_session(GameSession(user_id=user_id))
+        await save_drawing_attempts(played_attempts(second, user_id)[:3])
+        second_summary = await complete_game_session(second, completion(second, 2, 3, 40))
+
+        async with get_db_cursor() as cur:
+            await cur.execute("""
+                SELECT um.total_games_played, um.total_time_spent_seconds, um.best_score,
+                       um.best_score_date = gs.created_at
+                FROM user_metrics um
+                JOIN game_sessions gs ON gs.id = %s
+                WHERE um.user_id = %s
+            """, (first, user_id))
+            return first_summary, second_summary, await cur.fetchone()
+
+    first, second, metrics = run_with_pool(body)
+    times = [attempt[2] for attempt in PLAYED_ATTEMPTS]
+    # What the five-statement version wrote: the client's score, attempts and time, the
+    # session's correct count, its longest run of correct attempts and its mean drawing time
+    assert first["user_id"] == user_id and first["end_time"] is not None
+    assert {key: first[key] for key in (
+        "total_score", "total_attempts", "total_time_seconds",
+        "successful_attempts", "streak_count", "avg_drawing_time_ms"
+    )} == {
+        "total_score": 6, "total_attempts": 8, "total_time_seconds": 95,
+        "successful_attempts": 6, "streak_count": 3, "avg_drawing_time_ms": round(sum(times) / len(times))
+    }
+    assert (second["successful_attempts"], second["streak_count"]) == (2, 2)
+    assert metrics == (2, 95 + 40, 6, True)
+
+@pytest.mark.integration
+def test_completing_an_unknown_session_returns_none(run_with_pool):
+    async def body():
+        async with get_db_cursor() as cur:
+            await cur.execute("SELECT COALESCE(MAX(id), 0) + 1000 FROM game_sessions")
+            session_id = (await cur.fetchone())[0]
+        return await complete_game_session(session_id, completion(session_id, 1, 1, 10))
+
+    assert run_with_pool(body) is None
+
+# Materialized leaderboard (needs the database)
+
+# The leaderboard query before leaderboard_stats, aggregating every session per request
+LEGACY_LEADERBOARD_QUERY = """
+    WITH rankings AS (
+        SELECT
+            u.id,
+            u.username,
+            COUNT(DISTINCT gs.id) as games_played,
+            COALESCE(SUM(gs.total_score), 0) as total_score,
+            COALESCE(SUM(gs.total_attempts), 0) as total_attempts,
+            ROUND(AVG(gs.avg_drawing_time_ms)::numeric, 2) as avg_time,
+            MAX(gs.streak_count) as best_streak,
+            RANK() OVER (ORDER BY COALESCE(SUM(gs.total_score), 0) DESC) as rank
+        FROM users u
+        LEFT JOIN game_sessions gs ON u.id = gs.user_id
+        GROUP BY u.id, u.username
+    )
+    SELECT username, games_played, total_score, total_attempts, avg_time, best_streak, rank
+    FROM rankings
+    WHERE rank <= 10
+    OR (id = %s AND %s IS NOT NULL)
+    ORDER BY rank ASC
+"""
+
+LEADERBOARD_DRIFT_QUERY = """
+    WITH expected AS (
+        SELECT
+            u.id as user_id,
+            COUNT(gs.id) as games_played,
+            COALESCE(SUM(gs.total_score), 0) as total_score,
+            COALESCE(SUM(gs.total_attempts), 0) as total_attempts,
+            COALESCE(SUM(gs.avg_drawing_time_ms), 0) as avg_time_sum,
+            COUNT(gs.avg_drawing_time_ms) as avg_time_count,
+            MAX(gs.streak_count) as best_streak
+        FROM users u
+        LEFT JOIN game_sessions gs ON gs.user_id = u.id
+        GROUP BY u.id
+    )
+    SELECT e.user_id
+    FROM expected e
+    FULL JOIN leaderboard_stats l ON l.user_id = e.user_id
+    WHERE (e.games_played, e.total_score, e.total_attempts, e.avg_time_sum, e.avg_time_count, e.best_streak)
+          IS DISTINCT FROM
+          (l.games_played, l.total_score, l.total_attempts, l.avg_time_sum, l.avg_time_count, l.best_streak)
+"""
+
+def shrink_best_sessions(db, user_ids):
+    """Delete one user's best-streak session and zero another's, the cases
+    where the leaderboard trigger has to rescan the user's sessions"""
+    with db.cursor() as cur:
+        for statement, user_id in (
+            ("DELETE FROM game_sessions", user_ids[0]),
+            ("UPDATE game_sessions SET streak_count = 0", user_ids[1]),
+        ):
+            cur.execute(f"""
+                {statement}
+                WHERE id = (SELECT id FROM game_sessions WHERE user_id = %s ORDER BY streak_count DESC, id LIMIT 1)
+            """, (user_id,))
+
+def leaderboard_rows(cur, query, params):
+    cur.execute(query, params)
+    # Ties are ordered by username on both sides
+    return sorted((tuple(row) for row in cur.fetchall()), key=lambda row: (row[6], row[0]))
+
+@pytest.mark.integration
+def test_leaderboard_stats_match_sessions(db, sample_games):
+    shrink_best_sessions(db, sample_games)
+    with db.cursor() as cur:
+        cur.execute(LEADERBOARD_DRIFT_QUERY)
+        assert cur.fetchall() == []
+
+@pytest.mark.integration
+def test_leaderboard_query_matches_the_aggregate_query(db, sample_games):
+    shrink_best_sessions(db, sample_games)
+    with db.cursor() as cur:
+        cur.execute("SELECT id FROM users WHERE id <> ALL(%s) ORDER BY random() LIMIT 20", (sample_games,))
+        user_ids = [None] + sample_games + [row[0] for row in cur.fetchall()]
+        for user_id in user_ids:
+            expected = leaderboard_rows(cur, LEGACY_LEADERBOARD_QUERY, (user_id, user_id))
+            assert leaderboard_rows(cur, LEADERBOARD_QUERY, (user_id,)) == expected, f"user_id={user_id}"
@@ -1,4 +1,5 @@
 import React, { useEffect, useRef, ForwardedRef } from 'react';
+import { Stroke } from '@/lib/strokes';
 
 interface CanvasProps {
   tool: 'pen' | 'eraser';
@@ -8,6 +9,9 @@ interface CanvasProps {
   width?: number;
   height?: number;
   onDrawStart?: () => void;
+  // Pen strokes in canvas pixels, for sending the drawing without a PNG. Set to null
+  // once the eraser is used, since erasing can't be expressed as strokes.
+  strokesRef?: React.MutableRefObject<Stroke[] | null>;
 }
 
 interface Coordinates {
@@ -20,6 +24,7 @@ const Canvas = React.forwardRef<HTMLCanvasElement, CanvasProps>(({
   isDrawing,
   setIsDrawing,
   onDrawStart,
+  strokesRef,
   className = "",
   width = 400,
   height = 300 
@@ -120,6 +125,14 @@ const Canvas = React.forwardRef<HTMLCanvasElement, CanvasProps>(({
     ctx.beginPath();
     ctx.moveTo(coords.x, coords.y);
 
+    if (strokesRef) {
+      if (tool === 'eraser') {
+        strokesRef.current = null;
+      } else if (strokesRef.current) {
+        strokesRef.current.push([[Math.round(coords.x), Math.round(coords.y)]]);
+      }
+    }
+
     ctx.lineCap = 'round';
     ctx.lineJoin = 'round';
     if (tool === 'eraser') {
@@ -148,6 +161,17 @@ const Canvas = React.forwardRef<HTMLCanvasElement, CanvasProps>(({
     ctx.stroke();
     ctx.beginPath();
     ctx.moveTo(coords.x, coords.y);
+    recordPoint(coords);
+  };
+
+  const recordPoint = (coords: Coordinates) => {
+    const strokes = strokesRef?.current;
+    if (!strokes || strokes.length === 0 || tool === 'eraser') return;
+    const stroke = strokes[strokes.length - 1];
+    const x = Math.round(coords.x);
+    const y = Math.round(coords.y);
+    const [lastX, lastY] = stroke[stroke.length - 1];
+    if (x !== lastX || y !== lastY) stroke.push([x, y]);
   };
 
   const stopDrawing = () => {
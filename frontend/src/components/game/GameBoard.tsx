@@ -6,6 +6,7 @@ import Help from '../doodle/Help';
 import { useGame } from '@/contexts/GameContext';
 import { gameService } from '@/services';
 import { toast } from '@/hooks/use-toast';
+import { Stroke } from '@/lib/strokes';
 
 export const GameBoard = () => {
   const { state, handleAttempt, startDrawing } = useGame();
@@ -13,6 +14,7 @@ export const GameBoard = () => {
   const [isDrawing, setIsDrawing] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const canvasRef = useRef<HTMLCanvasElement>(null);
+  const strokesRef = useRef<Stroke[] | null>([]);
 
   const clearCanvas = () => {
     if (!canvasRef.current) return;
@@ -21,6 +23,7 @@ export const GameBoard = () => {
       ctx.fillStyle = '#FFFFFF';
       ctx.fillRect(0, 0, canvasRef.current.width, canvasRef.current.height);
     }
+    strokesRef.current = [];
   };
 
   const handleCanvasStart = () => {
@@ -34,9 +37,7 @@ export const GameBoard = () => {
     try {
       setIsLoading(true);
       
-      const canvas = canvasRef.current;
-      const imageData = canvas.toDataURL('image/png');
-      const { result, confidence } = await gameService.recognize(imageData);
+      const { result, confidence } = await gameService.recognizeDrawing(canvasRef.current, strokesRef.current);
       
       const isCorrect = result.toLowerCase() === state.currentWord.toLowerCase();
       // Pass the confidence (recognition accuracy) from the recognition result
@@ -66,6 +67,7 @@ export const GameBoard = () => {
         <Card className="p-4 border-2 border-black shadow-[4px_4px_0_0_rgba(0,0,0,1)]">
           <Canvas
             ref={canvasRef}
+            strokesRef={strokesRef}
             tool={tool}
             isDrawing={isDrawing}
             setIsDrawing={setIsDrawing}
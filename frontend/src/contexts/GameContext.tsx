@@ -1,6 +1,7 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import { Challenge, generateGameChallenges, getRandomChallenge } from '@/lib/challenge';
-import { gameService } from '@/services';
+import { gameService, AttemptData } from '@/services';
+import { MAX_ATTEMPTS_PER_BATCH } from '@/services/game';
 import { toast } from '@/hooks/use-toast';
 import { Badge } from '@/components/ui/badge';
 
@@ -8,6 +9,10 @@ const GAME_DURATION = 60 * 2; // 2 minutes
 const CHALLENGE_TIME = 30; // 30 seconds per challenge
 const MAX_CHALLENGES = 15; // 15 challenges per game
 const TOTAL_GAME_TIME = CHALLENGE_TIME * MAX_CHALLENGES; // 450 seconds total
+// Buffered attempts are sent once this many are waiting or the oldest is this old,
+// when the page is hidden or left, and before the session is completed
+const ATTEMPT_FLUSH_SIZE = 5;
+const ATTEMPT_FLUSH_AGE_MS = 15 * 1000;
 
 interface GameState {
   username: string;
@@ -74,6 +79,57 @@ export const GameProvider = ({ children }: { children: React.ReactNode }) => {
     challenges: [],
     currentChallengeIndex: 0,
   });
+  // Attempts waiting to be saved. They stay here until the server has them, so a
+  // failed send is retried by the next flush, even one in a later game.
+  const pendingAttempts = useRef<AttemptData[]>([]);
+  const flushTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const flushing = useRef<Promise<void> | null>(null);
+
+  // Only touches refs, so the copy captured by the listeners below stays valid
+  const flushAttempts = (keepalive = false): Promise<void> => {
+    if (flushTimer.current) {
+      clearTimeout(flushTimer.current);
+      flushTimer.current = null;
+    }
+    if (flushing.current) {
+      // One send at a time; whatever arrived meanwhile goes in the next
+      return flushing.current.then(() => flushAttempts(keepalive));
+    }
+    const batch = pendingAttempts.current.slice(0, MAX_ATTEMPTS_PER_BATCH);
+    if (batch.length === 0) return Promise.resolve();
+
+    flushing.current = gameService.trackAttempts(batch, { keepalive })
+      .then(() => {
+        pendingAttempts.current = pendingAttempts.current.slice(batch.length);
+      })
+      .finally(() => {
+        flushing.current = null;
+      });
+    return flushing.current.then(() => {
+      if (pendingAttempts.current.length > 0) return flushAttempts(keepalive);
+    });
+  };
+
+  const flushInBackground = (keepalive = false) => {
+    flushAttempts(keepalive).catch(error => {
+      console.error('[GameContext] Failed to save attempts, keeping them for the next try:', error);
+    });
+  };
+
+  useEffect(() => {
+    const onVisibilityChange = () => {
+      if (document.visibilityState === 'hidden') flushInBackground(true);
+    };
+    const onPageHide = () => flushInBackground(true);
+    document.addEventListener('visibilitychange', onVisibilityChange);
+    window.addEventListener('pagehide', onPageHide);
+    return () => {
+      document.removeEventListener('visibilitychange', onVisibilityChange);
+      window.removeEventListener('pagehide', onPageHide);
+      // Leaving the game page abandons the game; save what it has
+      flushInBackground(true);
+    };
+  }, []);
 
   useEffect(() => {
     let timer: NodeJS.Timeout;
@@ -158,6 +214,8 @@ export const GameProvider = ({ children }: { children: React.ReactNode }) => {
 
     try {
       if (state.sessionId) {
+        await flushAttempts();
+
         console.log('[GameContext] Calling completeSession API');
         await gameService.completeSession({
           sessionId: state.sessionId,
@@ -241,35 +299,31 @@ export const GameProvider = ({ children }: { children: React.ReactNode }) => {
     const isCorrect = result.toLowerCase() === state.currentWord.toLowerCase();
     const userData = JSON.parse(localStorage.getItem('user') || '{}');
 
-    try {
-      await gameService.trackAttempt({
-        sessionId: state.sessionId,
-        userId: userData.id,
-        wordPrompt: state.currentWord,
-        difficulty: state.currentChallenge.difficulty,
-        isCorrect,
-        drawingTimeMs: drawingTime,
-        recognitionAccuracy: accuracy,
-      });
+    pendingAttempts.current.push({
+      sessionId: state.sessionId,
+      userId: userData.id,
+      wordPrompt: state.currentWord,
+      difficulty: state.currentChallenge.difficulty,
+      isCorrect,
+      drawingTimeMs: drawingTime,
+      recognitionAccuracy: accuracy,
+    });
+    if (pendingAttempts.current.length >= ATTEMPT_FLUSH_SIZE) {
+      flushInBackground();
+    } else if (!flushTimer.current) {
+      flushTimer.current = setTimeout(() => flushInBackground(), ATTEMPT_FLUSH_AGE_MS);
+    }
 
-      updateScore(isCorrect);
+    updateScore(isCorrect);
 
-      // Only proceed to next challenge if correct
-      if (isCorrect) {
-        setState(prev => ({
-          ...prev,
-          challengesCompleted: prev.challengesCompleted + 1,
-          challengeTimeLeft: CHALLENGE_TIME,
-        }));
-        setNextChallenge(); // Use the new function instead of setCurrentWord
-      }
-    } catch (error) {
-      console.error('Failed to track attempt:', error);
-      toast({
-        title: "Error",
-        description: "Failed to save your attempt",
-        variant: "destructive",
-      });
+    // Only proceed to next challenge if correct
+    if (isCorrect) {
+      setState(prev => ({
+        ...prev,
+        challengesCompleted: prev.challengesCompleted + 1,
+        challengeTimeLeft: CHALLENGE_TIME,
+      }));
+      setNextChallenge(); // Use the new function instead of setCurrentWord
     }
   };
 
@@ -5,26 +5,14 @@ export const useDashboardData = () => {
   const { data, isLoading, isError } = useQuery({
     queryKey: ['dashboardData'],
     queryFn: async () => {
-      const [
-        overallStats,
-        weeklyProgress,
-        difficultyStats,
-        recentActivities,
-        performanceMetrics
-      ] = await Promise.all([
-        dashboardService.getOverallStats(),
-        dashboardService.getWeeklyProgress(),
-        dashboardService.getDifficultyStats(),
-        dashboardService.getRecentActivities(10),
-        dashboardService.getPerformanceMetrics()
-      ]);
+      const summary = await dashboardService.getSummary(undefined, 10);
 
       return {
-        overallStats,
-        weeklyProgress,
-        difficultyStats,
-        recentActivities,
-        performanceMetrics
+        overallStats: summary.overall,
+        weeklyProgress: summary.weekly,
+        difficultyStats: summary.difficulty,
+        recentActivities: summary.recent,
+        performanceMetrics: summary.performance
       };
     }
   });
@@ -5,7 +5,8 @@ const baseURL = import.meta.env.VITE_BACKEND_URL || '';
 type RequestOptions = {
   method: string;
   headers?: Record<string, string>;
-  body?: string;
+  body?: BodyInit;
+  keepalive?: boolean;
 };
 
 async function handleResponse<T>(response: Response): Promise<T> {
@@ -67,10 +68,20 @@ export const api = {
   get: <T>(endpoint: string): Promise<T> => 
     fetchWithAuth<T>(endpoint),
 
-  post: <T>(endpoint: string, data?: unknown): Promise<T> => 
+  // keepalive lets the request outlive the page (bodies up to 64 KB), e.g. when sent on pagehide
+  post: <T>(endpoint: string, data?: unknown, options: { keepalive?: boolean } = {}): Promise<T> => 
     fetchWithAuth<T>(endpoint, {
       method: 'POST',
       body: data ? JSON.stringify(data) : undefined,
+      ...options,
+    }),
+
+  // Sends raw bytes (e.g. a canvas PNG) instead of JSON
+  postBinary: <T>(endpoint: string, body: Blob, contentType: string): Promise<T> =>
+    fetchWithAuth<T>(endpoint, {
+      method: 'POST',
+      headers: { 'Content-Type': contentType },
+      body,
     }),
 
   put: <T>(endpoint: string, data: unknown): Promise<T> => 
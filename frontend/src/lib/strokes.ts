@@ -0,0 +1,30 @@
+export type Point = [number, number];
+export type Stroke = Point[];
+
+// Little-endian int16 throughout. Each stroke is its point count, then its first
+// point in canvas pixels and the step to every later point. The backend reads it
+// with decode_strokes in app/services/imaging.py.
+export const encodeStrokes = (strokes: Stroke[]): string => {
+  const drawn = strokes.filter((stroke) => stroke.length > 0);
+  const values = drawn.reduce((total, stroke) => total + 1 + 2 * stroke.length, 0);
+  const view = new DataView(new ArrayBuffer(values * 2));
+  let offset = 0;
+  const put = (value: number) => {
+    view.setInt16(offset, value, true);
+    offset += 2;
+  };
+  for (const stroke of drawn) {
+    put(stroke.length);
+    let [lastX, lastY] = [0, 0];
+    for (const [x, y] of stroke) {
+      put(x - lastX);
+      put(y - lastY);
+      [lastX, lastY] = [x, y];
+    }
+  }
+
+  const bytes = new Uint8Array(view.buffer);
+  let binary = '';
+  for (let i = 0; i < bytes.length; i++) binary += String.fromCharCode(bytes[i]);
+  return btoa(binary);
+};
@@ -7,9 +7,11 @@ import { Card } from '@/components/ui/card';
 import { Challenge, DOODLE_CHALLENGES } from '@/lib/challenge';
 import { toast } from "@/hooks/use-toast";
 import { gameService } from '@/services';
+import { Stroke } from '@/lib/strokes';
 
 const Practice = () => {
   const canvasRef = useRef(null);
+  const strokesRef = useRef<Stroke[] | null>([]);
   const [isDrawing, setIsDrawing] = useState(false);
   const [tool, setTool] = useState<DrawingTool>('pen');
   const [challenge, setChallenge] = useState<Challenge>(DOODLE_CHALLENGES[0]);
@@ -34,6 +36,7 @@ const Practice = () => {
     const ctx = canvas.getContext('2d');
     ctx.fillStyle = '#FFFFFF';
     ctx.fillRect(0, 0, canvas.width, canvas.height);
+    strokesRef.current = [];
     setResult('');
   };
 
@@ -42,9 +45,7 @@ const Practice = () => {
     
     setIsLoading(true);
     try {
-      const canvas = canvasRef.current;
-      const imageData = canvas.toDataURL('image/png');
-      const response = await gameService.recognize(imageData);
+      const response = await gameService.recognizeDrawing(canvasRef.current, strokesRef.current);
       
       if (response.result.toLowerCase() === challenge.word.toLowerCase()) {
         toast({
@@ -104,6 +105,7 @@ const Practice = () => {
               <Card className="p-4 border-2 border-black shadow-[4px_4px_0_0_rgba(0,0,0,1)]">
                 <Canvas
                   ref={canvasRef}
+                  strokesRef={strokesRef}
                   tool={tool}
                   isDrawing={isDrawing}
                   setIsDrawing={setIsDrawing}
@@ -93,7 +93,25 @@ export interface SessionDetail {
   }[];
 }
 
+export type DashboardSection = 'overall' | 'weekly' | 'difficulty' | 'recent' | 'performance';
+
+export interface DashboardSummary {
+  overall?: OverallStats;
+  weekly?: WeeklyProgress[];
+  difficulty?: DifficultyStats[];
+  recent?: RecentActivity[];
+  performance?: PerformanceMetrics;
+}
+
 export const dashboardService = {
+  getSummary: async (sections?: DashboardSection[], recentLimit: number = 10) => {
+    const params = new URLSearchParams({ recent_limit: String(recentLimit) });
+    if (sections?.length) {
+      params.set('sections', sections.join(','));
+    }
+    return api.get<DashboardSummary>(`/api/dashboard/summary?${params}`);
+  },
+
   getOverallStats: async () => {
     return api.get<OverallStats>('/api/dashboard/stats/overall');
   },
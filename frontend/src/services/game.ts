@@ -1,8 +1,15 @@
 import { api } from '@/lib/api';
+import { Stroke, encodeStrokes } from '@/lib/strokes';
+
+export interface Guess {
+  word: string;
+  probability: number;
+}
 
 interface RecognizeResponse {
   result: string;
-  confidence: number;  // Add this field to match the backend response
+  confidence: number;  // The recognizer's probability that result is right
+  guesses: Guess[];  // Most likely first; result and confidence are the first one
 }
 
 interface SessionResponse {
@@ -17,7 +24,7 @@ interface GameSessionData {
   username: string;
 }
 
-interface AttemptData {
+export interface AttemptData {
   sessionId: number;
   userId: number;
   wordPrompt: string;
@@ -37,6 +44,27 @@ interface LeaderboardEntry {
   rank: number;
 }
 
+// DrawingAttemptBatch's limit on the server
+export const MAX_ATTEMPTS_PER_BATCH = 250;
+
+const toAttemptPayload = (data: AttemptData) => ({
+  session_id: data.sessionId,
+  user_id: data.userId,
+  word_prompt: data.wordPrompt,
+  difficulty: data.difficulty,
+  is_correct: data.isCorrect,
+  drawing_time_ms: data.drawingTimeMs,
+  recognition_accuracy: data.recognitionAccuracy,
+});
+
+export const canvasToPng = (canvas: HTMLCanvasElement): Promise<Blob> =>
+  new Promise((resolve, reject) => {
+    canvas.toBlob(
+      (blob) => (blob ? resolve(blob) : reject(new Error('Could not read the canvas'))),
+      'image/png'
+    );
+  });
+
 export const gameService = {
   recognize: async (imageData: string): Promise<RecognizeResponse> => {
     return api.post<RecognizeResponse>('/api/game/recognize', { 
@@ -44,6 +72,21 @@ export const gameService = {
     });
   },
 
+  // Raw PNG upload: no base64 or JSON overhead, and the server can refuse it early
+  recognizeCanvas: async (canvas: HTMLCanvasElement): Promise<RecognizeResponse> => {
+    const image = await canvasToPng(canvas);
+    return api.postBinary<RecognizeResponse>('/api/game/recognize/upload', image, 'image/png');
+  },
+
+  // Strokes are a few hundred bytes against tens of kilobytes of PNG; the PNG is
+  // only sent when there are no strokes to send, e.g. after the eraser was used
+  recognizeDrawing: async (canvas: HTMLCanvasElement, strokes: Stroke[] | null): Promise<RecognizeResponse> => {
+    if (strokes && strokes.length > 0) {
+      return api.post<RecognizeResponse>('/api/game/recognize', { strokes: encodeStrokes(strokes) });
+    }
+    return gameService.recognizeCanvas(canvas);
+  },
+
   startSession: async () => {
     const userData = JSON.parse(localStorage.getItem('user') || '{}');
     if (!userData.id) throw new Error('User not authenticated');
@@ -64,15 +107,13 @@ export const gameService = {
     }),
 
   trackAttempt: (data: AttemptData) => 
-    api.post('/api/game/attempt', {
-      session_id: data.sessionId,
-      user_id: data.userId,
-      word_prompt: data.wordPrompt,
-      difficulty: data.difficulty,
-      is_correct: data.isCorrect,
-      drawing_time_ms: data.drawingTimeMs,
-      recognition_accuracy: data.recognitionAccuracy,
-    }),
+    api.post('/api/game/attempt', toAttemptPayload(data)),
+
+  // At most MAX_ATTEMPTS_PER_BATCH attempts per call
+  trackAttempts: (attempts: AttemptData[], options: { keepalive?: boolean } = {}) =>
+    api.post('/api/game/attempts', {
+      attempts: attempts.map(toAttemptPayload),
+    }, options),
 
   getLeaderboard: async () => {
     const userData = JSON.parse(localStorage.getItem('user') || '{}');